@@ -0,0 +1,69 @@
+"""Бенчмарки проекта Yatube API.
+
+Запуск из корня репозитория: `python -m benchmarks.<имя_модуля>`.
+Каждый бенчмарк работает на отдельной тестовой базе, которая создаётся
+перед замером и удаляется после него.
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(BASE_DIR, 'yatube_api')
+
+
+def setup_django(settings_module='yatube_api.settings', database=None,
+                 caches=None):
+    """Настраивает Django для запуска бенчмарка вне manage.py.
+
+    database — путь к файлу тестовой базы SQLite; по умолчанию база
+    создаётся в памяти. caches заменяет настройку CACHES.
+    """
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    from django.conf import settings
+    if database:
+        settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = (
+            database
+        )
+    if caches:
+        settings.CACHES = caches
+    # Бенчмарки шлют запросы от одного пользователя быстрее лимитов.
+    settings.API_THROTTLING = {'ENABLED': False}
+    django.setup()
+
+
+@contextmanager
+def test_database(keepdb=False):
+    """Создаёт тестовую базу на время бенчмарка.
+
+    С keepdb=True существующая база переиспользуется и не удаляется,
+    чтобы большой набор данных не генерировать при каждом запуске.
+    """
+    from django.db import connection
+    from django.test.utils import (setup_test_environment,
+                                   teardown_test_environment)
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(
+        verbosity=0, keepdb=keepdb
+    )
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(
+            old_name, verbosity=0, keepdb=keepdb
+        )
+        teardown_test_environment()
+
+
+def timeit(func, repeat=5):
+    """Возвращает лучшее время выполнения функции в секундах."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
@@ -0,0 +1,324 @@
+"""Нагрузочный бенчмарк эндпоинтов API v1.
+
+Генерирует синтетический набор данных и замеряет задержки (перцентили),
+пропускную способность и число запросов к БД для каждого маршрута из
+api.urls в двух режимах: через тестовый клиент Django в том же процессе
+и через локальный многопоточный WSGI-сервер.
+
+Примеры:
+    python -m benchmarks.api --output bench.json
+    python -m benchmarks.api --posts 1000000 --comments 10000000 \\
+        --database /tmp/bench.sqlite3 --keepdb
+    python -m benchmarks.api --compare bench.json
+"""
+import argparse
+import http.client
+import json
+import platform
+import random
+import re
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+
+from benchmarks import BASE_DIR, setup_django, test_database
+from benchmarks.data import BENCH_PASSWORD, BENCH_USERNAME, populate
+
+ROUTES = (
+    ('posts-list', 'GET', '/api/v1/posts/?page_size=20'),
+    ('posts-list', 'GET', '/api/v1/posts/?limit=20&offset={offset}'),
+    ('posts-list', 'GET', '/api/v1/posts/?search={post_id}&page_size=20'),
+    ('posts-list', 'GET',
+     '/api/v1/posts/?group=group-{group_index}&page_size=20'),
+    ('posts-detail', 'GET', '/api/v1/posts/{post_id}/'),
+    ('comments-list', 'GET', '/api/v1/posts/{post_id}/comments/'),
+    ('comments-detail', 'GET',
+     '/api/v1/posts/{post_id}/comments/{comment_id}/'),
+    ('groups-list', 'GET', '/api/v1/groups/'),
+    ('groups-detail', 'GET', '/api/v1/groups/{group_id}/'),
+    ('group-posts', 'GET', '/api/v1/groups/group-{group_index}/posts/'),
+    ('api-token-auth', 'POST', '/api/v1/api-token-auth/'),
+)
+QUERIES_PATTERN = re.compile(r'desc="(\d+) queries"')
+
+
+def percentile(values, percent):
+    """Возвращает перцентиль по методу ближайшего ранга."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, int(round(percent / 100 * len(ordered))) - 1)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def summarize(latencies, queries, errors, elapsed):
+    """Сводит замеры маршрута в словарь метрик."""
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'mean_ms': (sum(latencies) / len(latencies) * 1000
+                    if latencies else None),
+        'p50_ms': (percentile(latencies, 50) or 0) * 1000,
+        'p90_ms': (percentile(latencies, 90) or 0) * 1000,
+        'p99_ms': (percentile(latencies, 99) or 0) * 1000,
+        'max_ms': max(latencies, default=0) * 1000,
+        'throughput_rps': len(latencies) / elapsed if elapsed else None,
+        'queries_mean': (sum(queries) / len(queries) if queries else None),
+    }
+
+
+class Target:
+    """Формирует пути и тела запросов со случайными объектами."""
+
+    def __init__(self, sizes, seed=0):
+        self.sizes = sizes
+        self.random = random.Random(seed)
+
+    def path(self, template):
+        """Подставляет в шаблон пути случайные существующие объекты."""
+        post_id = self.random.randint(1, max(self.sizes['posts'], 1))
+        group_id = self.random.randint(1, max(self.sizes['groups'], 1))
+        return template.format(
+            post_id=post_id,
+            comment_id=post_id,
+            group_id=group_id,
+            group_index=group_id - 1,
+            offset=self.random.randint(0, max(self.sizes['posts'] - 20, 0)),
+        )
+
+    @staticmethod
+    def body(method):
+        """Возвращает тело запроса для небезопасных методов."""
+        if method == 'POST':
+            return {'username': BENCH_USERNAME, 'password': BENCH_PASSWORD}
+        return None
+
+
+def run_client(route, target, token, requests):
+    """Замеряет маршрут через тестовый клиент Django."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIClient
+
+    name, method, template = route
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+    latencies, queries, errors = [], [], 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        path = target.path(template)
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            response = client.generic(
+                method, path, json.dumps(target.body(method) or {}),
+                content_type='application/json'
+            )
+            latencies.append(time.perf_counter() - start)
+        queries.append(len(context.captured_queries))
+        errors += response.status_code >= 400
+    return summarize(latencies, queries, errors,
+                     time.perf_counter() - started)
+
+
+def start_server():
+    """Запускает многопоточный WSGI-сервер Django в фоновом потоке."""
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.core.servers.basehttp import (ThreadedWSGIServer,
+                                              WSGIRequestHandler)
+
+    class QuietHandler(WSGIRequestHandler):
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler,
+                                allow_reuse_address=True)
+    server.set_app(WSGIHandler())
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_server(route, target, token, requests, concurrency, port):
+    """Замеряет маршрут через WSGI-сервер несколькими клиентами."""
+    name, method, template = route
+    latencies, queries = [], []
+    errors = 0
+    lock = threading.Lock()
+    per_worker = max(requests // concurrency, 1)
+    paths = [[target.path(template) for _ in range(per_worker)]
+             for _ in range(concurrency)]
+    body = target.body(method)
+    payload = json.dumps(body).encode() if body else None
+    headers = {'Authorization': f'Token {token}',
+               'Content-Type': 'application/json'}
+
+    def worker(worker_paths):
+        nonlocal errors
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        for path in worker_paths:
+            start = time.perf_counter()
+            connection.request(method, path, body=payload, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            elapsed = time.perf_counter() - start
+            match = QUERIES_PATTERN.search(
+                response.getheader('Server-Timing', '')
+            )
+            with lock:
+                latencies.append(elapsed)
+                errors += response.status >= 400
+                if match:
+                    queries.append(int(match.group(1)))
+            if response.getheader('Connection', '').lower() == 'close':
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port)
+        connection.close()
+
+    threads = [threading.Thread(target=worker, args=(worker_paths,))
+               for worker_paths in paths]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, queries, errors,
+                     time.perf_counter() - started)
+
+
+def check_routes():
+    """Проверяет, что имена маршрутов совпадают с api.urls."""
+    from django.urls import resolve
+
+    for name, _, template in ROUTES:
+        path = template.format(post_id=1, comment_id=1, group_id=1,
+                               group_index=0, offset=0).split('?')[0]
+        resolved = resolve(path).url_name
+        if resolved != name:
+            raise SystemExit(f'{path}: ожидался маршрут {name}, '
+                             f'получен {resolved}')
+
+
+def git_commit():
+    """Возвращает хеш текущего коммита или None."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=BASE_DIR, text=True,
+            stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, current):
+    """Печатает изменение метрик относительно сохранённого результата."""
+    print(f'\nСравнение с {baseline["meta"].get("commit")}:')
+    for key, modes in current['results'].items():
+        for mode in ('client', 'server'):
+            metrics = modes.get(mode)
+            old = baseline['results'].get(key, {}).get(mode)
+            if not metrics or not old:
+                continue
+            changes = []
+            for metric in ('p50_ms', 'p99_ms', 'throughput_rps'):
+                if old.get(metric) and metrics.get(metric) is not None:
+                    delta = (metrics[metric] / old[metric] - 1) * 100
+                    changes.append(f'{metric} {delta:+.1f}%')
+            print(f'  {key:<55} {mode:<7} {"  ".join(changes)}')
+
+
+def main():
+    """Генерирует данные, замеряет маршруты и сохраняет результат."""
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--groups', type=int, default=10)
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--comments', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=200,
+                        help='Запросов на маршрут в каждом режиме.')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--modes', default='client,server')
+    parser.add_argument('--database',
+                        help='Файл SQLite для набора данных.')
+    parser.add_argument('--keepdb', action='store_true',
+                        help='Переиспользовать уже заполненную базу.')
+    parser.add_argument('--no-response-cache', action='store_true',
+                        help='Выключить кеш ответов API.')
+    parser.add_argument('--output', help='Файл для результата в JSON.')
+    parser.add_argument('--compare', help='Результат для сравнения.')
+    args = parser.parse_args()
+
+    setup_django(database=args.database)
+    from django import get_version
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from rest_framework.authtoken.models import Token
+
+    from posts.models import Post
+
+    if args.no_response_cache:
+        settings.API_RESPONSE_CACHE = {'ENABLED': False}
+    check_routes()
+    sizes = {'users': args.users, 'groups': args.groups,
+             'posts': args.posts, 'comments': args.comments}
+    modes = args.modes.split(',')
+    results = {}
+    with test_database(keepdb=args.keepdb):
+        if not Post.objects.exists():
+            started = time.perf_counter()
+            populate(batch_size=args.batch_size, **sizes)
+            print(f'Данные созданы за {time.perf_counter() - started:.1f} с')
+        user = get_user_model().objects.get(username=BENCH_USERNAME)
+        token = Token.objects.get_or_create(user=user)[0].key
+        server = start_server() if 'server' in modes else None
+        for route in ROUTES:
+            key = f'{route[1]} {route[2]}'
+            results[key] = {'route': route[0]}
+            if 'client' in modes:
+                results[key]['client'] = run_client(
+                    route, Target(sizes), token, args.requests
+                )
+            if server is not None:
+                results[key]['server'] = run_server(
+                    route, Target(sizes), token, args.requests,
+                    args.concurrency, server.server_address[1]
+                )
+            for mode in modes:
+                metrics = results[key][mode]
+                print(f'{key:<55} {mode:<7} '
+                      f'p50 {metrics["p50_ms"]:7.2f} мс  '
+                      f'p99 {metrics["p99_ms"]:7.2f} мс  '
+                      f'{metrics["throughput_rps"]:8.1f} rps  '
+                      f'запросов к БД {metrics["queries_mean"]}')
+        if server is not None:
+            server.shutdown()
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': get_version(),
+            'dataset': sizes,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'response_cache': not args.no_response_cache,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline:
+            compare(json.load(baseline), report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""Сравнение WSGI и ASGI при большом числе одновременных клиентов.
+
+Маршруты чтения замеряются при нескольких уровнях конкурентности через
+три сервера в том же процессе: многопоточный WSGI-сервер Django (поток
+на соединение), ASGI со стандартными синхронными представлениями (все
+представления выполняются в одном потоке) и ASGI с асинхронными
+представлениями API из yatube_api.urls_asgi (чтение в ограниченном пуле
+потоков). Кроме задержек и пропускной способности печатается
+наибольшее число потоков сервера во время замера.
+
+Параметр --latency добавляет задержку к каждому запросу к БД, чтобы
+SQLite в памяти вёл себя как сетевая БД: поток, который ждёт ответа
+БД, не занимает процессор, и выигрыш даёт число одновременно
+обслуживаемых запросов, а не скорость одного запроса.
+
+ASGI-сервер здесь минимальный, на asyncio: HTTP/1.1 с keep-alive и
+ответом целиком, без зависимостей вроде uvicorn.
+
+Запуск: `python -m benchmarks.asgi --concurrency 8,64,256`.
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+from benchmarks import setup_django, test_database
+from benchmarks.api import Target, run_server, start_server
+from benchmarks.data import BENCH_USERNAME, populate
+
+ROUTES = (
+    ('posts-list', 'GET', '/api/v1/posts/?page_size=20'),
+    ('posts-detail', 'GET', '/api/v1/posts/{post_id}/'),
+    ('comments-list', 'GET', '/api/v1/posts/{post_id}/comments/'),
+)
+REASONS = {200: 'OK', 304: 'Not Modified', 404: 'Not Found'}
+
+
+class ASGIServer:
+    """HTTP/1.1-сервер для ASGI-приложения в фоновом потоке."""
+
+    def __init__(self, application):
+        self.application = application
+        self.loop = asyncio.new_event_loop()
+        self.server = None
+        started = threading.Event()
+        threading.Thread(target=self.run, args=(started,),
+                         daemon=True).start()
+        started.wait()
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    def run(self, started):
+        """Запускает цикл событий сервера."""
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(asyncio.start_server(
+            self.handle, '127.0.0.1', 0, backlog=1024
+        ))
+        started.set()
+        self.loop.run_forever()
+
+    def shutdown(self):
+        """Останавливает сервер."""
+        self.loop.call_soon_threadsafe(self.server.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    async def handle(self, reader, writer):
+        """Обслуживает запросы одного соединения."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
+                    return
+                lines = head.decode('latin1').split('\r\n')
+                method, target, _ = lines[0].split(' ')
+                headers = [line.split(':', 1) for line in lines[1:] if line]
+                headers = [(name.strip().lower().encode('latin1'),
+                            value.strip().encode('latin1'))
+                           for name, value in headers]
+                length = int(dict(headers).get(b'content-length', 0))
+                body = await reader.readexactly(length) if length else b''
+                writer.write(await self.respond(method, target, headers,
+                                                body))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def respond(self, method, target, headers, body):
+        """Вызывает приложение и возвращает ответ целиком."""
+        path, _, query = target.partition('?')
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'},
+            'http_version': '1.1', 'method': method, 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(),
+            'query_string': query.encode('latin1'), 'root_path': '',
+            'headers': headers, 'server': ('127.0.0.1', self.port),
+            'client': ('127.0.0.1', 0),
+        }
+        messages = [{'type': 'http.request', 'body': body,
+                     'more_body': False}]
+        start, chunks = {}, []
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await asyncio.Future()
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                start.update(message)
+            else:
+                chunks.append(message.get('body', b''))
+
+        await self.application(scope, receive, send)
+        content = b''.join(chunks)
+        status = start['status']
+        lines = [f'HTTP/1.1 {status} {REASONS.get(status, "Status")}']
+        lines += [f'{name.decode("latin1")}: {value.decode("latin1")}'
+                  for name, value in start['headers']
+                  if name.lower() != b'content-length']
+        lines.append(f'Content-Length: {len(content)}')
+        return '\r\n'.join(lines).encode('latin1') + b'\r\n\r\n' + content
+
+
+class ThreadSampler:
+    """Замеряет наибольшее число потоков сервера в фоне.
+
+    Потоки клиентов бенчмарка (функция worker) не учитываются.
+    """
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        """Периодически обновляет наибольшее число потоков."""
+        while not self.stopped.wait(self.interval):
+            self.peak = max(self.peak, sum(
+                not thread.name.endswith('(worker)')
+                for thread in threading.enumerate()
+            ))
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+
+def add_query_latency(latency):
+    """Добавляет задержку к запросам к БД всех новых соединений."""
+    from django.db.backends.signals import connection_created
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(latency)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.append(delay)
+
+    connection_created.connect(install, weak=False)
+
+
+def make_servers():
+    """Запускает серверы и возвращает их вместе с портами."""
+    from django.core.handlers.asgi import ASGIHandler
+
+    from yatube_api.asgi import YatubeASGIHandler
+
+    wsgi = start_server()
+    return (
+        ('wsgi', wsgi, wsgi.server_address[1]),
+        *((name, server, server.port) for name, server in (
+            ('asgi-sync', ASGIServer(ASGIHandler())),
+            ('asgi', ASGIServer(YatubeASGIHandler())),
+        )),
+    )
+
+
+def main():
+    """Создаёт данные и замеряет маршруты на каждом сервере."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--comments', type=int, default=50000)
+    parser.add_argument('--requests', type=int, default=1000,
+                        help='Запросов на маршрут и уровень конкурентности.')
+    parser.add_argument('--concurrency', default='8,64,256')
+    parser.add_argument('--workers', type=int, default=16,
+                        help='Размер пула потоков чтения ASGI.')
+    parser.add_argument('--latency', type=float, default=0.002,
+                        help='Задержка каждого запроса к БД в секундах.')
+    parser.add_argument('--database', help='Файл SQLite для набора данных.')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    setup_django(database=args.database)
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from rest_framework.authtoken.models import Token
+
+    settings.API_RESPONSE_CACHE = {'ENABLED': False}
+    settings.API_ASYNC = {'WORKERS': args.workers}
+    sizes = {'users': 100, 'groups': 10, 'posts': args.posts,
+             'comments': args.comments}
+    with test_database():
+        started = time.perf_counter()
+        populate(batch_size=args.batch_size, **sizes)
+        print(f'Данные созданы за {time.perf_counter() - started:.1f} с')
+        user = get_user_model().objects.get(username=BENCH_USERNAME)
+        token = Token.objects.get_or_create(user=user)[0].key
+        if args.latency:
+            add_query_latency(args.latency)
+        servers = make_servers()
+        for concurrency in map(int, args.concurrency.split(',')):
+            for route in ROUTES:
+                for name, _, port in servers:
+                    with ThreadSampler() as sampler:
+                        metrics = run_server(
+                            route, Target(sizes), token,
+                            max(args.requests, concurrency), concurrency,
+                            port
+                        )
+                    print(f'{concurrency:>4} {route[0]:<14} {name:<10} '
+                          f'p50 {metrics["p50_ms"]:8.2f} мс  '
+                          f'p99 {metrics["p99_ms"]:8.2f} мс  '
+                          f'{metrics["throughput_rps"]:7.1f} rps  '
+                          f'потоков {sampler.peak:4}  '
+                          f'ошибок {metrics["errors"]}')
+        for _, server, _ in servers:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
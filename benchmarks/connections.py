@@ -0,0 +1,131 @@
+"""Влияние постоянных соединений, пула и PRAGMA SQLite на пропускную
+способность.
+
+Запускает многопоточный WSGI-сервер с продакшен-настройками и замеряет
+чтение поста и создание комментария для нескольких профилей соединения
+с БД: стандартный (соединение на каждый запрос), постоянные соединения
+без пула, PRAGMA без пула и пул с PRAGMA. База создаётся в файле, кеш
+ответов API выключен, а общий кеш продакшена заменён кешем в памяти
+процесса.
+
+Запуск: `python -m benchmarks.connections --concurrency 8`.
+"""
+import argparse
+import os
+import secrets
+import tempfile
+import time
+
+from benchmarks import setup_django, test_database
+from benchmarks.api import Target, run_server, start_server
+from benchmarks.data import BENCH_USERNAME, populate
+
+WAL_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+}
+ROLLBACK_PRAGMAS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'busy_timeout': 5000,
+}
+PROFILES = (
+    ('default', {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False,
+                 'POOL': None, 'PRAGMAS': ROLLBACK_PRAGMAS}),
+    ('persistent', {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True,
+                    'POOL': None, 'PRAGMAS': ROLLBACK_PRAGMAS}),
+    ('pragmas', {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False,
+                 'POOL': None, 'PRAGMAS': WAL_PRAGMAS}),
+    ('pool+pragmas', {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True,
+                      'POOL': {'MAX_SIZE': 8}, 'PRAGMAS': WAL_PRAGMAS}),
+)
+ROUTES = (
+    ('posts-detail', 'GET', '/api/v1/posts/{post_id}/'),
+    ('comments-list', 'POST', '/api/v1/posts/{post_id}/comments/'),
+)
+LOCAL_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+
+
+class CommentTarget(Target):
+    """Цель запросов, которая создаёт комментарии."""
+
+    @staticmethod
+    def body(method):
+        """Возвращает тело нового комментария."""
+        return {'text': 'Комментарий бенчмарка'} if method == 'POST' else None
+
+
+def use_profile(options):
+    """Переключает настройки соединений для новых потоков сервера.
+
+    Потоки сервера создают соединения по общему словарю настроек базы,
+    поэтому достаточно изменить его и закрыть соединения прежнего
+    профиля. Режим журнала сохраняется в файле базы и переключается
+    соединением основного потока.
+    """
+    from django.db import connection, connections
+
+    from yatube_api.db.pool import close_pools
+
+    connection.close()
+    close_pools()
+    connections.settings['default'].update(options)
+    connection.ensure_connection()
+    connection.close()
+
+
+def main():
+    """Создаёт данные и замеряет маршруты для каждого профиля."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--comments', type=int, default=10000)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    directory = tempfile.TemporaryDirectory()
+    # Продакшен-настройки требуют ключ и имена хостов.
+    os.environ.setdefault('DJANGO_SECRET_KEY', secrets.token_urlsafe(50))
+    os.environ.setdefault('DJANGO_ALLOWED_HOSTS', '127.0.0.1')
+    # Сервер бенчмарка — один процесс, поэтому общий кеш не нужен.
+    setup_django('yatube_api.settings_production',
+                 database=os.path.join(directory.name, 'bench.sqlite3'),
+                 caches=LOCAL_CACHES)
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from rest_framework.authtoken.models import Token
+
+    from yatube_api.db.pool import close_pools
+
+    settings.API_RESPONSE_CACHE = {'ENABLED': False}
+    sizes = {'users': 100, 'groups': 10, 'posts': args.posts,
+             'comments': args.comments}
+    with directory, test_database():
+        started = time.perf_counter()
+        populate(batch_size=args.batch_size, **sizes)
+        print(f'Данные созданы за {time.perf_counter() - started:.1f} с')
+        user = get_user_model().objects.get(username=BENCH_USERNAME)
+        token = Token.objects.get_or_create(user=user)[0].key
+        server = start_server()
+        port = server.server_address[1]
+        for profile, options in PROFILES:
+            use_profile(options)
+            for route in ROUTES:
+                metrics = run_server(route, CommentTarget(sizes), token,
+                                     args.requests, args.concurrency, port)
+                print(f'{profile:<14} {route[1]:<5} {route[0]:<15} '
+                      f'p50 {metrics["p50_ms"]:7.2f} мс  '
+                      f'p99 {metrics["p99_ms"]:7.2f} мс  '
+                      f'{metrics["throughput_rps"]:8.1f} rps  '
+                      f'ошибок {metrics["errors"]}')
+        server.shutdown()
+        close_pools()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Генерация синтетических данных для бенчмарков.
+
+Все объекты создаются через bulk_create пачками с заранее известными
+идентификаторами, поэтому генерация не требует чтения созданных строк и
+не держит в памяти больше одной пачки.
+"""
+from itertools import islice
+
+BENCH_USERNAME = 'bench'
+BENCH_PASSWORD = 'bench-password-1'
+
+
+def batches(objects, size):
+    """Разбивает поток объектов на списки не длиннее size."""
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, size))
+        if not batch:
+            return
+        yield batch
+
+
+def bulk_insert(model, objects, batch_size):
+    """Вставляет объекты пачками."""
+    for batch in batches(objects, batch_size):
+        model.objects.bulk_create(batch, batch_size=batch_size)
+
+
+def populate(users=100, groups=10, posts=10000, comments=100000,
+             batch_size=5000, with_images=False):
+    """Заполняет БД пользователями, группами, постами и комментариями.
+
+    Первый пользователь — BENCH_USERNAME с паролем BENCH_PASSWORD, от
+    его имени выполняются запросы бенчмарка. Счётчики комментариев
+    постов пересчитываются после вставки.
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.core.management import call_command
+
+    from posts.models import Comment, Group, Post
+
+    User = get_user_model()
+    password = make_password(BENCH_PASSWORD)
+    bulk_insert(User, (
+        User(id=index + 1,
+             username=BENCH_USERNAME if index == 0 else f'user{index}',
+             password=password)
+        for index in range(users)
+    ), batch_size)
+    bulk_insert(Group, (
+        Group(id=index + 1, title=f'Группа {index}', slug=f'group-{index}',
+              description='Описание группы')
+        for index in range(groups)
+    ), batch_size)
+    bulk_insert(Post, (
+        Post(id=index + 1, text=f'Пост {index} ' * 10,
+             author_id=index % users + 1,
+             group_id=index % groups + 1 if groups and index % 3 else None,
+             image='posts/image.jpg' if with_images and index % 2 else '')
+        for index in range(posts)
+    ), batch_size)
+    bulk_insert(Comment, (
+        Comment(id=index + 1, text=f'Комментарий {index}',
+                author_id=index % users + 1, post_id=index % posts + 1)
+        for index in range(comments if posts else 0)
+    ), batch_size)
+    call_command('recompute_post_counters', batch_size=batch_size,
+                 verbosity=0)
@@ -0,0 +1,149 @@
+"""Сравнение стоимости чтения и записи ленты подписок.
+
+Сравниваются чтение первой страницы ленты запросом по всем авторам из
+подписок (pull), чтение предвычисленной ленты (холодное и из кеша) и
+стоимость рассылки поста подписчикам для обычного и популярного автора
+при гибридной схеме и при рассылке всем (push).
+
+Запуск: `python -m benchmarks.feed --users 2000 --follows 50`.
+"""
+import argparse
+import random
+import time
+
+from benchmarks import setup_django, test_database, timeit
+from benchmarks.data import bulk_insert, populate
+
+PAGE_SIZE = 20
+
+
+def per_call(func, args, repeat):
+    """Возвращает лучшее среднее время вызова func по списку аргументов."""
+    return timeit(lambda: [func(arg) for arg in args], repeat) / len(args)
+
+
+def configure(threshold):
+    """Задаёт порог рассылки и сбрасывает множество популярных авторов."""
+    from django.conf import settings
+    from django.core.cache import cache
+
+    from api.timelines import PULLED_AUTHORS_KEY
+
+    settings.API_TIMELINES = {'FANOUT_THRESHOLD': threshold,
+                              'FEED_SIZE': 500}
+    cache.delete(PULLED_AUTHORS_KEY)
+
+
+def generate_follows(users, authors, celebrities, follows, rng):
+    """Генерирует подписки на популярных и случайных обычных авторов."""
+    from posts.models import Follow
+
+    for user_id in range(1, users + 1):
+        followed = set(celebrities) | set(
+            rng.sample(authors, min(follows, len(authors)))
+        )
+        followed.discard(user_id)
+        for author_id in followed:
+            yield Follow(user_id=user_id, following_id=author_id)
+
+
+def read_pull(user_id):
+    """Читает первую страницу ленты запросом по всем подпискам."""
+    from posts.models import Post
+
+    return list(Post.objects.filter(
+        author__following__user_id=user_id
+    ).order_by('-pub_date', '-id').values_list('id', flat=True)[:PAGE_SIZE])
+
+
+def read_timeline(user_id):
+    """Читает первую страницу предвычисленной ленты."""
+    from api.timelines import HomeTimeline
+
+    entries, _ = HomeTimeline(user_id).page(None, PAGE_SIZE)
+    return [-entry[1] for entry in entries]
+
+
+def read_cold(user_id):
+    """Читает первую страницу ленты после её удаления из кеша."""
+    from api.timelines import HomeTimeline
+
+    HomeTimeline(user_id).clear()
+    return read_timeline(user_id)
+
+
+def bench_reads(sample, repeat):
+    """Печатает стоимость чтения ленты разными способами."""
+    for user_id in sample:
+        if read_timeline(user_id) != read_pull(user_id):
+            raise SystemExit(f'Пользователь {user_id}: ленты различаются')
+    print(f'Чтение страницы из {PAGE_SIZE} постов:')
+    for name, func in (('pull (JOIN по подпискам)', read_pull),
+                       ('гибрид, лента не в кеше', read_cold),
+                       ('гибрид, лента в кеше', read_timeline)):
+        print(f'  {name:<28} {per_call(func, sample, repeat) * 1000:8.3f} мс')
+
+
+def bench_writes(args, normal, celebrities):
+    """Печатает стоимость рассылки поста при гибридной схеме и push."""
+    from django.utils import timezone
+
+    from api.timelines import HomeTimeline, fan_out_post
+
+    for user_id in range(1, args.users + 1):
+        HomeTimeline(user_id).load()
+    now = timezone.now()
+
+    def fan_out(author_id):
+        fan_out_post(author_id, now, args.posts + 1)
+
+    print('Рассылка поста подписчикам (все ленты в кеше):')
+    for scheme, threshold in (('гибрид', args.threshold),
+                              ('push', args.users + 1)):
+        configure(threshold)
+        for name, ids in (('обычный автор', normal),
+                          ('популярный автор', celebrities)):
+            cost = per_call(fan_out, ids, args.repeat)
+            print(f'  {scheme:<7} {name:<20} {cost * 1000:8.3f} мс')
+
+
+def main():
+    """Генерирует подписки и печатает стоимость чтения и записи ленты."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--posts', type=int, default=20000)
+    parser.add_argument('--follows', type=int, default=50,
+                        help='Подписок на обычных авторов у пользователя.')
+    parser.add_argument('--celebrities', type=int, default=3,
+                        help='Авторов, на которых подписаны все.')
+    parser.add_argument('--threshold', type=int, default=1000)
+    parser.add_argument('--sample', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    setup_django()
+    from posts.models import Follow
+
+    rng = random.Random(0)
+    celebrities = list(range(2, args.celebrities + 2))
+    authors = range(args.celebrities + 2, args.users + 1)
+    with test_database():
+        started = time.perf_counter()
+        populate(users=args.users, groups=0, posts=args.posts, comments=0,
+                 batch_size=args.batch_size)
+        bulk_insert(Follow, generate_follows(
+            args.users, authors, celebrities, args.follows, rng
+        ), args.batch_size)
+        print(f'Данные созданы за {time.perf_counter() - started:.1f} с, '
+              f'подписок {Follow.objects.count()}')
+
+        configure(args.threshold)
+        bench_reads(rng.sample(range(1, args.users + 1),
+                               min(args.sample, args.users)), args.repeat)
+        bench_writes(args, [rng.choice(authors) for _ in range(args.sample)],
+                     celebrities)
+
+
+if __name__ == '__main__':
+    main()
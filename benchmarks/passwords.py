@@ -0,0 +1,89 @@
+"""Сравнение хешеров паролей и проверки паролей при потоке входов.
+
+Для каждого хешера печатается время одной проверки пароля, а затем
+время проверки пачки паролей из нескольких потоков в потоке запроса
+(WORKERS=0) и в пуле процессов api.passwords. Хешеры Argon2 и bcrypt
+требуют пакетов argon2-cffi и bcrypt; недоступные хешеры пропускаются.
+
+Запуск: `python -m benchmarks.passwords --hashers pbkdf2_sha256,argon2
+--logins 64 --threads 16 --workers 4`.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import setup_django, timeit
+
+HASHERS = {
+    'pbkdf2_sha256': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'bcrypt_sha256': 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+}
+
+
+def load_hasher(name):
+    """Возвращает хешер по имени или None, если он недоступен."""
+    from django.utils.module_loading import import_string
+
+    try:
+        hasher = import_string(HASHERS[name])()
+        hasher.encode('password', hasher.salt())
+    except (ImportError, ValueError) as error:
+        print(f'{name:<15} пропущен: {error}')
+        return None
+    return hasher
+
+
+def logins(encoded, count, threads, workers):
+    """Возвращает время проверки count паролей из threads потоков."""
+    from django.conf import settings
+
+    from api.passwords import verifier
+
+    settings.API_LOGIN = {'WORKERS': workers, 'MAX_PENDING': count}
+    with ThreadPoolExecutor(threads) as executor:
+
+        def run(prefix, count):
+            list(executor.map(
+                lambda index: verifier.verify(f'{prefix}-{index}', encoded),
+                range(count)
+            ))
+
+        # Прогрев запускает процессы пула.
+        run('warmup', max(workers, 1))
+        start = time.perf_counter()
+        run('password', count)
+        return time.perf_counter() - start
+
+
+def main():
+    """Печатает время проверки пароля для каждого хешера."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--hashers', default=','.join(HASHERS))
+    parser.add_argument('--logins', type=int, default=32)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth.hashers import check_password
+
+    for name in args.hashers.split(','):
+        hasher = load_hasher(name)
+        if hasher is None:
+            continue
+        settings.PASSWORD_HASHERS = [HASHERS[name]]
+        encoded = hasher.encode('password', hasher.salt())
+        single = timeit(lambda: check_password('password', encoded),
+                        args.repeat)
+        inline = logins(encoded, args.logins, args.threads, 0)
+        pooled = logins(encoded, args.logins, args.threads, args.workers)
+        print(f'{name:<15} проверка {single * 1000:8.1f} мс  '
+              f'{args.logins} входов: в потоках {inline:6.2f} с  '
+              f'в пуле из {args.workers} процессов {pooled:6.2f} с')
+
+
+if __name__ == '__main__':
+    main()
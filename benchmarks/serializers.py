@@ -0,0 +1,59 @@
+"""Сравнение обычных и быстрых сериализаторов на чтении списков.
+
+Запуск: `python -m benchmarks.serializers --rows 5000`.
+"""
+import argparse
+
+from benchmarks import setup_django, test_database, timeit
+from benchmarks.data import populate
+
+
+def main():
+    """Печатает время обычной и быстрой сериализации и ускорение."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test import RequestFactory
+
+    from api.fast_serializers import get_reader
+    from api.querysets import optimize_queryset
+    from api.serializers import (CommentSerializer, GroupSerializer,
+                                 PostSerializer)
+
+    with test_database():
+        populate(users=10, posts=args.rows, comments=args.rows,
+                 with_images=True)
+        context = {'request': RequestFactory().get('/api/v1/')}
+        for serializer_class in (PostSerializer, CommentSerializer,
+                                 GroupSerializer):
+            model = serializer_class.Meta.model
+            queryset = optimize_queryset(
+                model.objects.order_by('id'), serializer_class
+            )
+            reader = get_reader(serializer_class)
+
+            def regular():
+                return serializer_class(
+                    queryset.all(), many=True, context=context
+                ).data
+
+            def fast():
+                return reader.read(queryset.all(), context)
+
+            if regular() != fast():
+                raise SystemExit(
+                    f'{serializer_class.__name__}: результаты различаются'
+                )
+            regular_time = timeit(regular, args.repeat)
+            fast_time = timeit(fast, args.repeat)
+            print(f'{serializer_class.__name__:<20} '
+                  f'обычный {regular_time * 1000:8.1f} мс  '
+                  f'быстрый {fast_time * 1000:8.1f} мс  '
+                  f'ускорение x{regular_time / fast_time:.1f}')
+
+
+if __name__ == '__main__':
+    main()
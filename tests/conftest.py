@@ -1,6 +1,8 @@
 import sys
 import os
 
+import pytest
+
 
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(root_dir)
@@ -33,3 +35,31 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def sync_image_processing(settings):
+    settings.POST_IMAGE_PROCESSING = {'ASYNC': False}
+
+
+@pytest.fixture(autouse=True)
+def inline_password_checks(settings):
+    settings.API_LOGIN = {'WORKERS': 0}
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    from django.core.cache import caches
+
+    from api.authentication import token_cache, user_cache
+    from api.passwords import verifier
+    from api.throttling import buckets
+    from api.tokens import revocations
+    yield
+    token_cache.clear()
+    user_cache.clear()
+    revocations.clear()
+    buckets.clear()
+    verifier.clear()
+    for cache in caches.all():
+        cache.clear()
@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsyncReadPath:
+
+    @pytest.fixture
+    def asgi_get(self, token, settings):
+        settings.ROOT_URLCONF = 'yatube_api.urls_asgi'
+        settings.API_RESPONSE_CACHE = {'ENABLED': False}
+        client = AsyncClient()
+
+        async def request(path, method, extra):
+            return await getattr(client, method)(
+                path, authorization=f'Token {token}', **extra
+            )
+
+        def get(path, method='get', **extra):
+            return async_to_sync(request)(path, method, extra)
+
+        return get
+
+    @staticmethod
+    def body(response):
+        if response.streaming:
+            return b''.join(response.streaming_content)
+        return response.content
+
+    def test_read_views_are_async(self):
+        import asyncio
+
+        from django.urls import get_resolver
+
+        resolver = get_resolver('yatube_api.urls_asgi')
+        for path in ('/api/v1/posts/', '/api/v1/posts/1/',
+                     '/api/v1/posts/1/comments/', '/api/v1/groups/'):
+            assert asyncio.iscoroutinefunction(resolver.resolve(path).func), (
+                f'Проверьте, что `{path}` под ASGI обслуживается асинхронным '
+                'представлением.'
+            )
+        admin = resolver.resolve('/admin/').func
+        assert not asyncio.iscoroutinefunction(admin)
+
+    def test_reads_match_sync(self, asgi_get, user_client, post,
+                              comment_1_post, group_1):
+        for path in ('/api/v1/posts/', f'/api/v1/posts/{post.id}/',
+                     f'/api/v1/posts/{post.id}/comments/',
+                     '/api/v1/groups/', f'/api/v1/groups/{group_1.id}/',
+                     '/api/v1/posts/?stream=true'):
+            response = asgi_get(path)
+            assert response.status_code == 200
+            assert self.body(response) == self.body(user_client.get(path)), (
+                f'Проверьте, что `{path}` под ASGI отвечает так же, '
+                'как под WSGI.'
+            )
+
+    def test_reads_run_in_pool(self, asgi_get, post, monkeypatch):
+        from api.views import PostViewSet
+
+        threads = []
+        retrieve = PostViewSet.retrieve
+
+        def record(self, request, *args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return retrieve(self, request, *args, **kwargs)
+
+        monkeypatch.setattr(PostViewSet, 'retrieve', record)
+        response = asgi_get(f'/api/v1/posts/{post.id}/')
+        assert response.status_code == 200
+        assert threads[0].startswith('api-read'), (
+            'Проверьте, что чтение выполняется в пуле потоков.'
+        )
+        assert 'desc="0 queries"' not in response['Server-Timing'], (
+            'Проверьте, что запросы к БД из пула учитываются в метриках.'
+        )
+
+    def test_writes(self, asgi_get, post):
+        response = asgi_get(
+            f'/api/v1/posts/{post.id}/comments/', method='post',
+            data={'text': 'Асинхронно'}, content_type='application/json'
+        )
+        assert response.status_code == 201, response.content
+        assert post.comments.get().text == 'Асинхронно'
+
+    def test_asgi_application_uses_async_urls(self, post, token):
+        from yatube_api.asgi import application
+
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': '/api/v1/groups/',
+            'query_string': b'', 'server': ('testserver', 80),
+            'headers': [(b'authorization', f'Token {token}'.encode())],
+        }
+        async_to_sync(application)(scope, receive, send)
+        assert messages[0]['status'] == 200
+        assert messages[1]['body'] == b'[]'
@@ -0,0 +1,99 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Comment, Post
+
+
+@pytest.mark.django_db
+class TestBulkAPI:
+
+    def test_bulk_create_posts(self, user_client, user, group_1):
+        data = [{'text': f'Пост {index}', 'group': group_1.id}
+                for index in range(3)]
+        response = user_client.post('/api/v1/posts/bulk/', data=data,
+                                    format='json')
+        assert response.status_code == 201, response.content
+        assert len(response.json()) == 3
+        assert Post.objects.filter(author=user, group=group_1).count() == 3
+
+    def test_bulk_create_single_insert(self, user_client, user, post):
+        data = [{'text': f'Пост {index}'} for index in range(3)]
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.post('/api/v1/posts/bulk/', data=data,
+                                        format='json')
+        assert response.status_code == 201, response.content
+        inserts = [query for query in queries.captured_queries
+                   if query['sql'].startswith('INSERT INTO "posts_post"')]
+        assert len(inserts) == 1, (
+            'Проверьте, что пакет постов сохраняется одним запросом INSERT.'
+        )
+        created = {item['id']: item['text'] for item in response.json()}
+        assert created == dict(
+            Post.objects.exclude(pk=post.pk).values_list('pk', 'text')
+        ), 'Проверьте, что ответ содержит id созданных постов.'
+
+    def test_bulk_create_is_atomic(self, user_client):
+        data = [{'text': 'Пост'}, {'group': 1}]
+        response = user_client.post('/api/v1/posts/bulk/', data=data,
+                                    format='json')
+        assert response.status_code == 400
+        assert not Post.objects.exists()
+
+    def test_bulk_create_comments(self, user_client, post):
+        data = [{'text': 'Коммент 1'}, {'text': 'Коммент 2'}]
+        response = user_client.post(
+            f'/api/v1/posts/{post.id}/comments/bulk/', data=data,
+            format='json'
+        )
+        assert response.status_code == 201, response.content
+        assert Comment.objects.filter(post=post).count() == 2
+        post.refresh_from_db()
+        assert post.comment_count == 2
+
+    def test_bulk_update(self, user_client, post, post_2):
+        data = [{'id': post.id, 'text': 'Новый 1'},
+                {'id': post_2.id, 'text': 'Новый 2'}]
+        response = user_client.patch('/api/v1/posts/bulk/', data=data,
+                                     format='json')
+        assert response.status_code == 200, response.content
+        post.refresh_from_db()
+        assert post.text == 'Новый 1'
+        detail = user_client.get(f'/api/v1/posts/{post_2.id}/').json()
+        assert detail['text'] == 'Новый 2', (
+            'Проверьте, что массовое изменение сбрасывает кеш ответов.'
+        )
+
+    def test_bulk_update_foreign_post_forbidden(self, user_client, post,
+                                                another_post):
+        data = [{'id': post.id, 'text': 'Новый'},
+                {'id': another_post.id, 'text': 'Чужой'}]
+        response = user_client.patch('/api/v1/posts/bulk/', data=data,
+                                     format='json')
+        assert response.status_code == 403
+        post.refresh_from_db()
+        assert post.text != 'Новый'
+
+    def test_bulk_delete(self, user_client, post, post_2, comment_1_post):
+        response = user_client.delete(
+            '/api/v1/posts/bulk/', data=[post.id, post_2.id], format='json'
+        )
+        assert response.status_code == 204
+        assert not Post.objects.exists()
+        assert not Comment.objects.exists()
+
+    def test_bulk_delete_missing(self, user_client, post):
+        response = user_client.delete(
+            '/api/v1/posts/bulk/', data=[post.id, post.id + 100],
+            format='json'
+        )
+        assert response.status_code == 404
+        assert Post.objects.filter(id=post.id).exists()
+
+    def test_bulk_size_limit(self, user_client, monkeypatch):
+        from api.views import PostViewSet
+        monkeypatch.setattr(PostViewSet, 'bulk_max_size', 2)
+        response = user_client.post(
+            '/api/v1/posts/bulk/', data=[{'text': 'Пост'}] * 3, format='json'
+        )
+        assert response.status_code == 400
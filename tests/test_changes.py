@@ -0,0 +1,164 @@
+import pytest
+from django.db import transaction
+from django.db.models.signals import pre_delete
+from django.utils import timezone
+
+from api import changes
+from api.models import Change
+from posts.models import Comment, Group, Post
+from tests.utils import count_queries
+
+URL = '/api/v1/changes/'
+
+
+@pytest.mark.django_db
+class TestChanges:
+
+    @staticmethod
+    def cursor(client):
+        response = client.get(URL)
+        assert response.status_code == 200, response.content
+        return response.json()['cursor']
+
+    @staticmethod
+    def changes(client, since):
+        response = client.get(URL, {'since': since})
+        assert response.status_code == 200, response.content
+        return response.json()
+
+    def test_requires_authentication(self, client):
+        assert client.get(URL).status_code == 401
+
+    def test_invalid_cursor(self, user_client):
+        response = user_client.get(URL, {'since': 'abc'})
+        assert response.status_code == 400
+        assert 'since' in response.json()
+
+    def test_create_update_delete(self, user_client, user, group_1):
+        cursor = self.cursor(user_client)
+        post = Post.objects.create(text='Пост', author=user, group=group_1)
+        comment = Comment.objects.create(text='Коммент', post=post,
+                                         author=user)
+        post.refresh_from_db()
+        post.text = 'Изменён'
+        post.save()
+        data = self.changes(user_client, cursor)
+        assert [item['text'] for item in data['posts']] == ['Изменён'], (
+            'Проверьте, что несколько изменений объекта дают одну запись '
+            'с текущим состоянием.'
+        )
+        assert data['posts'][0]['comment_count'] == 1
+        assert [item['id'] for item in data['comments']] == [comment.id]
+        assert data['deleted'] == {'posts': [], 'comments': [],
+                                   'groups': []}
+        assert data['has_more'] is False
+
+        cursor = data['cursor']
+        assert self.changes(user_client, cursor)['posts'] == []
+        post_id = post.id
+        post.delete()
+        data = self.changes(user_client, cursor)
+        assert data['deleted'] == {'posts': [post_id],
+                                   'comments': [comment.id], 'groups': []}, (
+            'Проверьте, что удаление поста записывает и каскадно '
+            'удалённые комментарии.'
+        )
+        assert data['posts'] == []
+
+    def test_group_delete_updates_posts(self, user_client, post_2, group_1):
+        cursor = self.cursor(user_client)
+        group_id = group_1.id
+        group_1.delete()
+        data = self.changes(user_client, cursor)
+        assert data['deleted']['groups'] == [group_id]
+        assert [(item['id'], item['group']) for item in data['posts']] == [
+            (post_2.id, None)
+        ], 'Проверьте, что посты удалённой группы попадают в журнал.'
+
+    def test_batches(self, user_client, user, settings):
+        settings.API_CHANGES = {'BATCH_SIZE': 2}
+        cursor = self.cursor(user_client)
+        posts = [Post.objects.create(text=f'Пост {index}', author=user)
+                 for index in range(3)]
+        first = self.changes(user_client, cursor)
+        assert first['has_more'] is True
+        second = self.changes(user_client, first['cursor'])
+        assert second['has_more'] is False
+        assert [item['id'] for item in first['posts'] + second['posts']] == [
+            post.id for post in posts
+        ]
+
+    def test_queries_independent_of_changes(self, user_client, user,
+                                            another_user, group_1):
+        def change(size):
+            for index in range(size):
+                post = Post.objects.create(text=f'Пост {index}',
+                                           author=user, group=group_1)
+                Comment.objects.create(text='Коммент', post=post,
+                                       author=another_user)
+            Group.objects.create(title=f'Группа {size}', slug=f'g-{size}')
+
+        counts = []
+        for size in (1, 10):
+            cursor = self.cursor(user_client)
+            change(size)
+            response, num_queries = count_queries(
+                user_client, f'{URL}?since={cursor}'
+            )
+            assert response.status_code == 200
+            counts.append(num_queries)
+        assert counts[0] == counts[1], (
+            'Проверьте, что число запросов не зависит от числа изменений.'
+        )
+
+    def test_raw_save_not_recorded(self, user):
+        Change.objects.all().delete()
+        Post(text='Пост', author=user,
+             pub_date=timezone.now()).save_base(raw=True)
+        assert not Change.objects.exists()
+
+    def test_change_written_with_object(self, user_client, post,
+                                        monkeypatch):
+        def fail(*entries):
+            raise RuntimeError('журнал недоступен')
+
+        monkeypatch.setattr(changes, 'record', fail)
+        posts, comments = Post.objects.count(), Comment.objects.count()
+        with pytest.raises(RuntimeError):
+            user_client.post('/api/v1/posts/', {'text': 'Пост'})
+        with pytest.raises(RuntimeError):
+            user_client.post(f'/api/v1/posts/{post.pk}/comments/',
+                             {'text': 'Коммент'})
+        with pytest.raises(RuntimeError):
+            user_client.patch(f'/api/v1/posts/{post.pk}/',
+                              {'text': 'Изменён'})
+        post.refresh_from_db()
+        assert (Post.objects.count(), Comment.objects.count()) == (
+            posts, comments
+        ) and post.text != 'Изменён', (
+            'Проверьте, что объект и запись журнала сохраняются в одной '
+            'транзакции.'
+        )
+
+    def test_comment_recorded_after_failed_post_delete(self, post,
+                                                       comment_1_post):
+        def fail(sender, instance, **kwargs):
+            raise RuntimeError('удаление прервано')
+
+        pre_delete.connect(fail, sender=Post)
+        try:
+            with pytest.raises(RuntimeError), transaction.atomic():
+                post.delete()
+        finally:
+            pre_delete.disconnect(fail, sender=Post)
+        Change.objects.all().delete()
+        comment_id = comment_1_post.pk
+        comment_1_post.delete()
+        assert set(Change.objects.values_list('kind', 'object_id',
+                                              'deleted')) == {
+            (Change.Kind.COMMENT, comment_id, True),
+            (Change.Kind.POST, post.pk, False),
+        }, (
+            'Проверьте, что прерванное удаление поста не отключает запись '
+            'об удалении его комментариев в журнал.'
+        )
@@ -0,0 +1,111 @@
+import pytest
+from rest_framework import generics
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api import caching
+from api.mixins import ConditionalResponseMixin
+from api.serializers import GroupSerializer
+from posts.models import Group
+from tests.utils import count_queries
+
+
+@pytest.mark.django_db
+class TestConditionalResponses:
+
+    def test_post_detail_not_modified(self, user_client, post):
+        url = f'/api/v1/posts/{post.id}/'
+        response = user_client.get(url)
+        etag = response['ETag']
+        assert etag
+        assert not response.has_header('Last-Modified'), (
+            'Проверьте, что ответ не содержит Last-Modified: точности в '
+            'секунду недостаточно для версий данных.'
+        )
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            f'Проверьте, что `{url}` с актуальным ETag возвращает 304.'
+        )
+
+    def test_cache_keyed_by_host_and_scheme(self, user_client, post):
+        url = f'/api/v1/posts/{post.id}/'
+        response = user_client.get(url)
+        assert response.json()['image'].startswith('http://testserver/')
+        for extra, prefix in (({'HTTP_HOST': 'example.com'},
+                               'http://example.com/'),
+                              ({'secure': True}, 'https://testserver/')):
+            other = user_client.get(url, **extra)
+            assert other['ETag'] != response['ETag']
+            assert other.json()['image'].startswith(prefix), (
+                'Проверьте, что ответ из кеша не отдаётся для другого хоста '
+                'или схемы.'
+            )
+
+    def test_not_modified_without_queries(self, user_client, post):
+        url = f'/api/v1/posts/{post.id}/comments/'
+        etag = user_client.get(url)['ETag']
+        response, num_queries = count_queries(
+            user_client, url, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == 304
+        assert num_queries == 0
+
+    def test_cached_response_without_queries(self, user_client, post):
+        user_client.get('/api/v1/posts/')
+        response, num_queries = count_queries(user_client, '/api/v1/posts/')
+        assert response.status_code == 200
+        assert num_queries == 0
+
+    def test_etag_changes_after_update(self, user_client, post,
+                                       comment_1_post):
+        url = f'/api/v1/posts/{post.id}/comments/'
+        etag = user_client.get(url)['ETag']
+        user_client.patch(
+            f'{url}{comment_1_post.id}/', data={'text': 'Изменено'}
+        )
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.json()[0]['text'] == 'Изменено'
+
+    def test_group_delete_invalidates_posts(self, user_client, post_2,
+                                            group_1):
+        assert user_client.get('/api/v1/posts/').json()[0]['group']
+        group_1.delete()
+        assert user_client.get('/api/v1/posts/').json()[0]['group'] is None
+
+    def test_user_save_keeps_etag(self, user_client, user, post):
+        url = f'/api/v1/posts/{post.id}/'
+        etag = user_client.get(url)['ETag']
+        user.last_login = user.date_joined
+        user.save(update_fields=['last_login'])
+        user.set_password('новый пароль')
+        user.save()
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что сохранение пользователя без смены имени не '
+            'меняет версии ответов.'
+        )
+        user.username = 'переименован'
+        user.save()
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.json()['author'] == 'переименован'
+
+    def test_default_cache_scopes(self, user, group_1):
+        class GroupListView(ConditionalResponseMixin, generics.ListAPIView):
+            queryset = Group.objects.all()
+            serializer_class = GroupSerializer
+
+        def get_etag():
+            request = APIRequestFactory().get('/groups/')
+            force_authenticate(request, user)
+            response = GroupListView.as_view()(request)
+            assert response.status_code == 200
+            return response['ETag']
+
+        etag = get_etag()
+        assert get_etag() == etag
+        caching.bump_versions(caching.GLOBAL_SCOPE)
+        assert get_etag() != etag, (
+            'Проверьте, что без get_cache_scopes() ответ зависит от общей '
+            'области.'
+        )
@@ -0,0 +1,96 @@
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models.signals import pre_delete
+
+from posts.models import Comment, Post
+
+
+@pytest.mark.django_db
+class TestCommentCounters:
+
+    def test_counters_follow_comments(self, user_client, post):
+        url = f'/api/v1/posts/{post.id}/comments/'
+        first = user_client.post(url, data={'text': 'Первый'}).json()
+        user_client.post(url, data={'text': 'Второй'})
+        post.refresh_from_db()
+        assert post.comment_count == 2
+        last = Comment.objects.filter(post=post).latest('created')
+        assert post.last_comment_at == last.created
+
+        user_client.delete(f'{url}{last.id}/')
+        post.refresh_from_db()
+        assert post.comment_count == 1
+        assert post.last_comment_at == Comment.objects.get(
+            id=first['id']).created
+
+    def test_counters_in_response(self, user_client, post, comment_1_post,
+                                  comment_2_post):
+        data = user_client.get(f'/api/v1/posts/{post.id}/').json()
+        assert data['comment_count'] == 2, (
+            'Проверьте, что ответ с постом содержит поле `comment_count`.'
+        )
+        assert data['last_comment_at']
+        listed = user_client.get('/api/v1/posts/').json()
+        assert listed[0]['comment_count'] == 2
+
+    def test_post_update_keeps_counters(self, user, post):
+        from api.querysets import optimize_queryset
+        from api.serializers import PostSerializer
+
+        loaded = optimize_queryset(Post.objects.all(),
+                                   PostSerializer).get(pk=post.pk)
+        Comment.objects.create(text='Новый', post=post, author=user)
+        serializer = PostSerializer(loaded, data={'text': 'Изменён'},
+                                    partial=True)
+        assert serializer.is_valid(), serializer.errors
+        serializer.save()
+        post.refresh_from_db()
+        assert post.text == 'Изменён'
+        assert post.comment_count == 1, (
+            'Проверьте, что изменение поста не перезаписывает счётчик '
+            'комментариев устаревшим значением.'
+        )
+        assert post.last_comment_at is not None
+
+    def test_counters_read_only(self, user_client, post):
+        user_client.patch(f'/api/v1/posts/{post.id}/',
+                          data={'comment_count': 100})
+        post.refresh_from_db()
+        assert post.comment_count == 0
+
+    def test_post_delete_skips_counter_updates(
+            self, post, comment_1_post, comment_2_post,
+            django_assert_max_num_queries):
+        with django_assert_max_num_queries(6):
+            post.delete()
+        assert not Comment.objects.exists()
+
+    def test_failed_post_delete_keeps_counting(self, post, comment_1_post,
+                                               comment_2_post):
+        def fail(sender, instance, **kwargs):
+            raise RuntimeError('удаление прервано')
+
+        pre_delete.connect(fail, sender=Post)
+        try:
+            with pytest.raises(RuntimeError), transaction.atomic():
+                post.delete()
+        finally:
+            pre_delete.disconnect(fail, sender=Post)
+        comment_1_post.delete()
+        post.refresh_from_db()
+        assert post.comment_count == 1, (
+            'Проверьте, что прерванное удаление поста не отключает '
+            'пересчёт его счётчиков.'
+        )
+
+    def test_recompute_command(self, post, another_post, comment_1_post,
+                               comment_2_post):
+        Post.objects.update(comment_count=42, last_comment_at=None)
+        call_command('recompute_post_counters', batch_size=1)
+        post.refresh_from_db()
+        another_post.refresh_from_db()
+        assert post.comment_count == 2
+        assert post.last_comment_at == comment_2_post.created
+        assert another_post.comment_count == 0
+        assert another_post.last_comment_at is None
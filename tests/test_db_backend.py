@@ -0,0 +1,186 @@
+import importlib
+import threading
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, connection
+
+from yatube_api.db.base import DatabaseWrapper
+from yatube_api.db.pool import close_pools
+
+
+class TestPooledSQLite:
+
+    @pytest.fixture
+    def make_wrapper(self, tmp_path, django_db_blocker):
+        wrappers = []
+
+        def make(**options):
+            settings_dict = {
+                **connection.settings_dict,
+                'ENGINE': 'yatube_api.db',
+                'NAME': str(tmp_path / 'db.sqlite3'),
+                'CONN_MAX_AGE': 600,
+                'CONN_HEALTH_CHECKS': True,
+                'POOL': {'MAX_SIZE': 2},
+                'PRAGMAS': {'journal_mode': 'WAL', 'synchronous': 'NORMAL',
+                            'busy_timeout': 1234},
+                **options,
+            }
+            wrapper = DatabaseWrapper(settings_dict, alias='pooled')
+            wrappers.append(wrapper)
+            return wrapper
+
+        with django_db_blocker.unblock():
+            yield make
+            for wrapper in wrappers:
+                wrapper.inc_thread_sharing()
+                wrapper.close()
+        close_pools()
+
+    @staticmethod
+    def pragma(wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied(self, make_wrapper):
+        wrapper = make_wrapper()
+        assert self.pragma(wrapper, 'journal_mode') == 'wal', (
+            'Проверьте, что PRAGMAS выполняются при открытии соединения.'
+        )
+        assert self.pragma(wrapper, 'synchronous') == 1
+        assert self.pragma(wrapper, 'busy_timeout') == 1234
+
+    def test_connection_reused_between_threads(self, make_wrapper):
+        raw = []
+
+        def request():
+            wrapper = make_wrapper()
+            wrapper.ensure_connection()
+            raw.append(wrapper.connection)
+            wrapper.close_if_unusable_or_obsolete()
+            assert wrapper.connection is None
+
+        for _ in range(3):
+            thread = threading.Thread(target=request)
+            thread.start()
+            thread.join()
+        assert raw[0] is raw[1] is raw[2], (
+            'Проверьте, что соединение, освобождённое в конце запроса, '
+            'переиспользуется следующим потоком.'
+        )
+
+    def test_pool_size_is_bounded(self, make_wrapper):
+        wrappers = [make_wrapper() for _ in range(3)]
+        for wrapper in wrappers:
+            wrapper.ensure_connection()
+        for wrapper in wrappers:
+            wrapper.close()
+        assert len(wrappers[0].get_pool().idle) == 2
+
+    def test_expired_connection_not_reused(self, make_wrapper):
+        wrapper = make_wrapper(CONN_MAX_AGE=0)
+        wrapper.ensure_connection()
+        first = wrapper.connection
+        wrapper.close()
+        wrapper.ensure_connection()
+        assert wrapper.connection is not first
+        assert not wrapper.get_pool().idle
+
+    def test_open_transaction_rolled_back_on_release(self, make_wrapper):
+        wrapper = make_wrapper()
+        with wrapper.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id integer)')
+        wrapper.set_autocommit(False)
+        with wrapper.cursor() as cursor:
+            cursor.execute('INSERT INTO item VALUES (1)')
+        wrapper.close_if_unusable_or_obsolete()
+        assert wrapper.connection is None
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM item')
+            assert cursor.fetchone()[0] == 0
+
+    def test_immediate_transactions(self, make_wrapper):
+        writer = make_wrapper(POOL=None, TRANSACTION_MODE='IMMEDIATE')
+        other = make_wrapper(POOL=None, PRAGMAS={'busy_timeout': 0})
+        with writer.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id integer)')
+        writer.set_autocommit(
+            False, force_begin_transaction_with_broken_autocommit=True
+        )
+        with writer.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM item')
+        # Транзакция IMMEDIATE уже держит блокировку записи.
+        with pytest.raises(OperationalError), other.cursor() as cursor:
+            cursor.execute('INSERT INTO item VALUES (1)')
+        with writer.cursor() as cursor:
+            cursor.execute('INSERT INTO item VALUES (2)')
+        writer.commit()
+        writer.set_autocommit(True)
+        with other.cursor() as cursor:
+            cursor.execute('SELECT id FROM item')
+            assert cursor.fetchall() == [(2,)]
+
+    def test_broken_connection_replaced(self, make_wrapper):
+        wrapper = make_wrapper(POOL=None)
+        wrapper.ensure_connection()
+        broken = wrapper.connection
+        broken.close()
+        wrapper.close_if_unusable_or_obsolete()
+        assert wrapper.connection is broken, (
+            'Проверьте, что без пула постоянное соединение не закрывается '
+            'в конце запроса.'
+        )
+        assert self.pragma(wrapper, 'busy_timeout') == 1234
+        assert wrapper.connection is not broken, (
+            'Проверьте, что неработающее соединение заменяется новым перед '
+            'первым запросом.'
+        )
+
+
+class TestProductionSettings:
+
+    @pytest.fixture
+    def production(self, monkeypatch):
+        monkeypatch.setenv('DJANGO_SECRET_KEY', 'секретный ключ')
+        monkeypatch.setenv('DJANGO_ALLOWED_HOSTS',
+                           'example.com,api.example.com')
+
+        def load():
+            return importlib.reload(
+                importlib.import_module('yatube_api.settings_production')
+            )
+
+        return load
+
+    def test_production_database(self, production):
+        settings_production = production()
+        database = settings_production.DATABASES['default']
+        assert database['ENGINE'] == 'yatube_api.db'
+        assert database['CONN_MAX_AGE'] and database['POOL'], (
+            'Проверьте, что в продакшен-настройках включены постоянные '
+            'соединения и пул.'
+        )
+        assert database['PRAGMAS']['journal_mode'] == 'WAL'
+        assert settings_production.DEBUG is False
+
+    def test_production_cache_is_shared(self, production, monkeypatch):
+        cache = production().CACHES['default']
+        assert 'LocMemCache' not in cache['BACKEND'], (
+            'Проверьте, что в продакшен-настройках используется общий кеш.'
+        )
+        monkeypatch.setenv('DJANGO_CACHE_BACKEND',
+                           'django.core.cache.backends.locmem.LocMemCache')
+        with pytest.raises(ImproperlyConfigured):
+            production()
+
+    @pytest.mark.parametrize('name', ['DJANGO_SECRET_KEY',
+                                      'DJANGO_ALLOWED_HOSTS'])
+    def test_production_requires_env(self, production, monkeypatch, name):
+        settings_production = production()
+        assert settings_production.ALLOWED_HOSTS == ['example.com',
+                                                     'api.example.com']
+        monkeypatch.delenv(name)
+        with pytest.raises(ImproperlyConfigured, match=name):
+            production()
@@ -0,0 +1,50 @@
+import pytest
+
+from api.fast_serializers import get_reader
+from api.serializers import (CommentSerializer, GroupSerializer,
+                             PostSerializer)
+from posts.models import Comment, Group, Post
+
+
+@pytest.mark.django_db
+class TestFastSerializers:
+
+    @pytest.mark.parametrize('serializer_class, model', (
+        (PostSerializer, Post),
+        (CommentSerializer, Comment),
+        (GroupSerializer, Group),
+    ))
+    def test_parity_with_serializers(self, rf, serializer_class, model,
+                                     post, post_2, comment_1_post,
+                                     comment_2_post, group_2):
+        request = rf.get('/api/v1/')
+        context = {'request': request}
+        queryset = model.objects.order_by('id')
+        expected = serializer_class(queryset, many=True,
+                                    context=context).data
+        reader = get_reader(serializer_class)
+        assert reader is not None
+        assert reader.read(queryset, context) == expected, (
+            f'Проверьте, что быстрый сериализатор для `{model.__name__}` '
+            'возвращает те же данные, что и обычный.'
+        )
+
+    def test_unsupported_serializer_falls_back(self):
+        from rest_framework import serializers
+
+        class MethodSerializer(serializers.ModelSerializer):
+            title = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Group
+                fields = ('id', 'title')
+
+        assert get_reader(MethodSerializer) is None
+
+    def test_posts_list_uses_fast_path(self, user_client, post,
+                                       another_post, monkeypatch):
+        from api.views import PostViewSet
+        fast = user_client.get('/api/v1/posts/').json()
+        monkeypatch.setattr(PostViewSet, 'fast_read', False)
+        regular = user_client.get('/api/v1/posts/').json()
+        assert fast == regular
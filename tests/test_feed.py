@@ -0,0 +1,149 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.timelines import author_timeline
+from posts.models import Follow, Post
+
+
+@pytest.mark.django_db(transaction=True)
+class TestFollow:
+
+    url = '/api/v1/follow/'
+
+    def test_follow_create_and_list(self, user_client, user, another_user):
+        response = user_client.post(
+            self.url, data={'following': another_user.username}
+        )
+        assert response.status_code == 201, response.content
+        assert response.json() == {'user': user.username,
+                                   'following': another_user.username}
+        assert user_client.get(self.url).json() == [response.json()]
+
+    def test_follow_validation(self, user_client, user, another_user):
+        assert user_client.post(self.url, data={}).status_code == 400
+        assert user_client.post(
+            self.url, data={'following': user.username}
+        ).status_code == 400, (
+            'Проверьте, что нельзя подписаться на самого себя.'
+        )
+        user_client.post(self.url, data={'following': another_user.username})
+        assert user_client.post(
+            self.url, data={'following': another_user.username}
+        ).status_code == 400
+
+    def test_follow_search(self, user_client, user, another_user,
+                           django_user_model):
+        third = django_user_model.objects.create_user(username='Third')
+        Follow.objects.create(user=user, following=another_user)
+        Follow.objects.create(user=user, following=third)
+        data = user_client.get(f'{self.url}?search=Third').json()
+        assert [item['following'] for item in data] == ['Third']
+
+    def test_follow_anonymous(self, client):
+        assert client.get(self.url).status_code == 401
+
+
+@pytest.mark.django_db(transaction=True)
+class TestFeed:
+
+    url = '/api/v1/feed/'
+
+    @pytest.fixture
+    def authors(self, django_user_model, user):
+        authors = [django_user_model.objects.create_user(username=f'a{index}')
+                   for index in range(3)]
+        for author in authors[:2]:
+            Follow.objects.create(user=user, following=author)
+        return authors
+
+    def walk(self, client, url):
+        seen = []
+        while url:
+            data = client.get(url).json()
+            seen.extend(post['id'] for post in data['results'])
+            url = data['next']
+        return seen
+
+    def create_posts(self, authors, count):
+        return [Post.objects.create(text=f'Пост {index}',
+                                    author=authors[index % len(authors)])
+                for index in range(count)]
+
+    @pytest.mark.parametrize('threshold', [1000, 0])
+    def test_feed_contains_followed_authors(self, settings, user_client,
+                                            authors, threshold):
+        settings.API_TIMELINES = {'FANOUT_THRESHOLD': threshold,
+                                  'FEED_SIZE': 3}
+        cache.clear()
+        posts = self.create_posts(authors, 6)
+        user_client.get(self.url)
+        posts += self.create_posts(authors, 6)
+        expected = [post.id for post in reversed(posts)
+                    if post.author_id != authors[2].id]
+        assert self.walk(user_client, f'{self.url}?page_size=3') == (
+            expected
+        ), (
+            'Проверьте, что `/api/v1/feed/` возвращает посты авторов из '
+            'подписок, начиная с новых.'
+        )
+
+    def test_feed_follows_changes(self, user_client, user, authors):
+        posts = self.create_posts(authors, 3)
+        user_client.get(self.url)
+        Follow.objects.filter(user=user, following=authors[0]).delete()
+        Follow.objects.create(user=user, following=authors[2])
+        posts[1].delete()
+        assert self.walk(user_client, self.url) == [posts[2].id]
+
+    def test_feed_push_updates_cached_timeline(self, settings, user_client,
+                                               authors):
+        settings.API_RESPONSE_CACHE = {'ENABLED': False}
+        user_client.get(self.url)
+        post = Post.objects.create(text='Новый', author=authors[0])
+        with CaptureQueriesContext(connection) as context:
+            data = user_client.get(self.url).json()
+        assert [item['id'] for item in data['results']] == [post.id]
+        assert not any('ORDER BY' in query['sql']
+                       for query in context.captured_queries
+                       if 'posts_post' in query['sql']), (
+            'Проверьте, что лента подписок читается из кеша.'
+        )
+
+    def test_celebrity_switch(self, settings, user_client, user,
+                              another_user, authors):
+        settings.API_TIMELINES = {'FANOUT_THRESHOLD': 1}
+        cache.clear()
+        posts = self.create_posts(authors[:1], 2)
+        user_client.get(self.url)
+        Follow.objects.create(user=another_user, following=authors[0])
+        posts += self.create_posts(authors[:1], 1)
+        assert self.walk(user_client, self.url) == [
+            post.id for post in reversed(posts)
+        ]
+        Follow.objects.filter(user=another_user).delete()
+        posts += self.create_posts(authors[:1], 1)
+        assert self.walk(user_client, self.url) == [
+            post.id for post in reversed(posts)
+        ]
+
+    def test_celebrity_switch_back(self, settings, user_client, user,
+                                   another_user, authors):
+        settings.API_TIMELINES = {'FANOUT_THRESHOLD': 1}
+        cache.clear()
+        Follow.objects.create(user=another_user, following=authors[0])
+        posts = self.create_posts(authors[:1], 2)
+        user_client.get(self.url)
+        Follow.objects.filter(user=another_user).delete()
+        posts += self.create_posts(authors[:1], 1)
+        user_client.get(self.url)
+        Follow.objects.create(user=another_user, following=authors[0])
+        posts += self.create_posts(authors[:1], 1)
+        expected = [post.id for post in reversed(posts)]
+        entries = author_timeline(authors[0].id).read(None, 10)
+        assert [-post_id for _, post_id in entries] == expected, (
+            'Проверьте, что посты, опубликованные, пока автор не был '
+            'популярным, попадают в его ленту в кеше.'
+        )
+        assert self.walk(user_client, self.url) == expected
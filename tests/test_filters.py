@@ -0,0 +1,114 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from posts.models import Post
+from tests.utils import captured_query_plans
+
+
+@pytest.mark.django_db
+class TestPostFilters:
+
+    @pytest.fixture
+    def posts(self, user, another_user, group_1):
+        posts = []
+        for index in range(6):
+            post = Post.objects.create(
+                text=f'Пост {index}',
+                author=another_user if index % 2 else user,
+                group=group_1 if index % 3 == 0 else None,
+            )
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=datetime(2024, 1, index + 1, tzinfo=timezone.utc)
+            )
+            posts.append(post)
+        return posts
+
+    @staticmethod
+    def ids(response):
+        data = response.json()
+        if isinstance(data, dict):
+            data = data['results']
+        return [post['id'] for post in data]
+
+    def test_filter_by_group(self, user_client, posts):
+        response = user_client.get('/api/v1/posts/?group=group_1')
+        assert response.status_code == 200
+        assert sorted(self.ids(response)) == [posts[0].id, posts[3].id], (
+            'Проверьте, что `/api/v1/posts/?group=` возвращает посты группы.'
+        )
+        assert user_client.get('/api/v1/posts/?group=nope').json() == []
+
+    def test_filter_by_author(self, user_client, posts, another_user):
+        response = user_client.get(
+            f'/api/v1/posts/?author={another_user.username}'
+        )
+        assert sorted(self.ids(response)) == [
+            post.id for post in posts[1::2]
+        ]
+
+    def test_filter_by_dates(self, user_client, posts):
+        response = user_client.get(
+            '/api/v1/posts/?since=2024-01-02&until=2024-01-04'
+        )
+        assert sorted(self.ids(response)) == [posts[1].id, posts[2].id], (
+            'Проверьте, что `?since=` включает дату, а `?until=` — нет.'
+        )
+        response = user_client.get(
+            '/api/v1/posts/?since=2024-01-05T00:00:00%2B00:00'
+        )
+        assert sorted(self.ids(response)) == [posts[4].id, posts[5].id]
+
+    def test_invalid_date(self, user_client, posts):
+        response = user_client.get('/api/v1/posts/?since=вчера')
+        assert response.status_code == 400
+        assert 'since' in response.json()
+
+    def test_ordering(self, user_client, posts):
+        response = user_client.get('/api/v1/posts/?ordering=pub_date')
+        assert self.ids(response) == [post.id for post in posts]
+        response = user_client.get('/api/v1/posts/?ordering=-pub_date')
+        assert self.ids(response) == [post.id for post in reversed(posts)]
+        response = user_client.get('/api/v1/posts/?ordering=text')
+        assert response.status_code == 200
+
+    def test_ordering_with_cursor(self, user_client, posts):
+        url = '/api/v1/posts/?ordering=pub_date&page_size=4'
+        data = user_client.get(url).json()
+        seen = [post['id'] for post in data['results']]
+        seen += [post['id'] for post in
+                 user_client.get(data['next']).json()['results']]
+        assert seen == [post.id for post in posts], (
+            'Проверьте, что курсорная пагинация следует `?ordering=`.'
+        )
+
+    @pytest.mark.parametrize('query, access', [
+        ('group=group_1', 'SEARCH posts_post USING INDEX '
+                          'post_group_pub_date_idx'),
+        ('author=TestUser', 'SEARCH posts_post USING INDEX '
+                            'post_author_pub_date_idx'),
+        ('since=2024-01-02&until=2024-01-04',
+         'SEARCH posts_post USING INDEX post_pub_date_id_idx'),
+        ('group=group_1&since=2024-01-02&page_size=2',
+         'SEARCH posts_post USING INDEX post_group_pub_date_idx'),
+        ('author=TestUser&ordering=pub_date&limit=2',
+         'SEARCH posts_post USING INDEX post_author_pub_date_idx'),
+        ('ordering=-pub_date&page_size=2',
+         'SCAN posts_post USING INDEX post_pub_date_id_idx'),
+    ])
+    def test_filters_use_indexes(self, user_client, posts, query, access):
+        response, plans = captured_query_plans(
+            user_client, f'/api/v1/posts/?{query}', 'posts_post'
+        )
+        assert response.status_code == 200
+        assert plans
+        for plan in plans:
+            steps = [step.replace('COVERING ', '') for step in plan
+                     if 'posts_post ' in step]
+            assert steps and all(
+                step.startswith(access) for step in steps
+            ), f'Проверьте, что `?{query}` использует индекс: {plan}'
+            assert not any('TEMP B-TREE' in step for step in plan), (
+                f'Проверьте, что `?{query}` не сортирует результат '
+                f'отдельно: {plan}'
+            )
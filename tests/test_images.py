@@ -0,0 +1,105 @@
+import io
+
+import pytest
+from PIL import Image
+
+from posts.models import Post
+
+
+def make_image(size=(1200, 800)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color='red').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestImageProcessing:
+
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        return tmp_path
+
+    def create_post(self, user_client):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        upload = SimpleUploadedFile(
+            'photo.png', make_image(), content_type='image/png'
+        )
+        response = user_client.post(
+            '/api/v1/posts/', data={'text': 'С картинкой', 'image': upload},
+            format='multipart'
+        )
+        assert response.status_code == 201, response.content
+        return Post.objects.get(id=response.json()['id'])
+
+    def test_variants_created(self, user_client, media_root):
+        post = self.create_post(user_client)
+        assert set(post.image_variants) == {'source', 'small', 'medium',
+                                            'webp'}
+        with Image.open(media_root / post.image_variants['small']) as image:
+            assert image.format == 'WEBP'
+            assert max(image.size) == 320
+
+    def test_variants_in_response(self, user_client):
+        post = self.create_post(user_client)
+        data = user_client.get(f'/api/v1/posts/{post.id}/').json()
+        assert data['image_variants']['small'].startswith('http'), (
+            'Проверьте, что ответ содержит ссылки на варианты изображения.'
+        )
+        listed = user_client.get('/api/v1/posts/').json()[0]
+        assert listed['image_variants'] == data['image_variants']
+
+    def test_variants_removed_with_post(self, user_client, media_root):
+        post = self.create_post(user_client)
+        small = media_root / post.image_variants['small']
+        post.delete()
+        assert not small.exists()
+
+    def test_variants_kept_on_rollback(self, user_client, media_root):
+        from django.db import transaction
+
+        post = self.create_post(user_client)
+        small = media_root / post.image_variants['small']
+        with pytest.raises(RuntimeError), transaction.atomic():
+            Post.objects.get(pk=post.pk).delete()
+            raise RuntimeError
+        assert small.exists(), (
+            'Проверьте, что варианты изображения удаляются только после '
+            'фиксации удаления поста.'
+        )
+
+    def test_text_edit_keeps_variants(self, user_client):
+        post = self.create_post(user_client)
+        variants = post.image_variants
+        user_client.patch(f'/api/v1/posts/{post.id}/',
+                          data={'text': 'Новый текст'})
+        post.refresh_from_db()
+        assert post.image_variants == variants
+
+    def test_processing_skips_post_save(self, user_client):
+        from django.db.models.signals import post_save
+
+        from posts.images import process_post_image
+
+        post = self.create_post(user_client)
+        url = f'/api/v1/posts/{post.id}/'
+        etag = user_client.get(url)['ETag']
+        saved = []
+
+        def receiver(sender, **kwargs):
+            saved.append(sender)
+
+        post_save.connect(receiver, sender=Post)
+        try:
+            process_post_image(post.pk, post.image.name)
+        finally:
+            post_save.disconnect(receiver, sender=Post)
+        assert not saved, (
+            'Проверьте, что варианты изображения записываются без сигналов '
+            'post_save поста.'
+        )
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что после обработки изображения меняется версия '
+            'ответа с постом.'
+        )
@@ -0,0 +1,64 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture
+def metrics():
+    from api.instrumentation import registry
+    registry.clear()
+    yield registry
+    registry.clear()
+
+
+@pytest.mark.django_db
+class TestInstrumentation:
+
+    def test_server_timing_header(self, user_client, post, metrics,
+                                  settings):
+        settings.API_RESPONSE_CACHE = {'ENABLED': False}
+        response = user_client.get('/api/v1/posts/')
+        timing = response['Server-Timing']
+        assert 'db;dur=' in timing and 'total;dur=' in timing, (
+            'Проверьте, что ответ содержит заголовок `Server-Timing`.'
+        )
+        stats = metrics.snapshot()['posts-list']
+        assert stats['count'] == 1
+        assert stats['db_queries'] >= 1
+        assert stats['response_bytes'] == len(response.content)
+
+    def test_streaming_response_size(self, user_client, post, metrics):
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get('/api/v1/posts/?stream=true')
+            body = b''.join(response.streaming_content)
+        stats = metrics.snapshot()['posts-list']
+        assert stats['response_bytes'] == len(body)
+        assert stats['db_queries'] == len(context.captured_queries), (
+            'Проверьте, что учитываются запросы к БД, выполненные во время '
+            'отдачи потокового ответа.'
+        )
+
+    def test_metrics_endpoint(self, admin_user, user_client, post,
+                              metrics):
+        from rest_framework.authtoken.models import Token
+        from rest_framework.test import APIClient
+        user_client.get(f'/api/v1/posts/{post.id}/comments/')
+        assert user_client.get('/api/v1/metrics/').status_code == 403
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token {}'.format(
+            Token.objects.create(user=admin_user).key
+        ))
+        response = client.get('/api/v1/metrics/')
+        assert response.status_code == 200
+        text = response.content.decode()
+        assert 'yatube_requests_total{view="comments-list"} 1' in text
+        assert 'yatube_request_duration_seconds_bucket' in text
+
+    def test_disabled(self, user_client, post, metrics, settings):
+        settings.API_PERFORMANCE = {'ENABLED': False}
+        from rest_framework.test import APIClient
+        client = APIClient()
+        client.credentials(**user_client._credentials)
+        response = client.get('/api/v1/posts/')
+        assert 'Server-Timing' not in response
+        assert metrics.snapshot() == {}
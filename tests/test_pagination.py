@@ -0,0 +1,67 @@
+import pytest
+
+from posts.models import Comment, Post
+
+
+@pytest.mark.django_db
+class TestPagination:
+
+    @pytest.fixture
+    def posts(self, user):
+        return [Post.objects.create(text=f'Пост {index}', author=user)
+                for index in range(5)]
+
+    def test_posts_without_params_not_paginated(self, user_client, posts):
+        response = user_client.get('/api/v1/posts/')
+        assert isinstance(response.json(), list), (
+            'Проверьте, что без параметров пагинации `/api/v1/posts/` '
+            'возвращает список.'
+        )
+
+    def test_posts_limit_offset(self, user_client, posts):
+        response = user_client.get('/api/v1/posts/?limit=2&offset=1')
+        data = response.json()
+        assert data['count'] == len(posts)
+        assert [post['id'] for post in data['results']] == [
+            posts[3].id, posts[2].id
+        ]
+
+    def test_posts_cursor_walks_all_pages(self, user_client, posts):
+        url = '/api/v1/posts/?page_size=2'
+        seen = []
+        pages = 0
+        while url:
+            data = user_client.get(url).json()
+            seen.extend(post['id'] for post in data['results'])
+            url = data['next']
+            pages += 1
+        assert pages == 3
+        assert seen == [post.id for post in reversed(posts)], (
+            'Проверьте, что курсорная пагинация `/api/v1/posts/` обходит '
+            'все посты от новых к старым без пропусков и повторов.'
+        )
+
+    def test_posts_cursor_previous(self, user_client, posts):
+        first = user_client.get('/api/v1/posts/?page_size=2').json()
+        second = user_client.get(first['next']).json()
+        back = user_client.get(second['previous']).json()
+        assert back['results'] == first['results']
+
+    def test_invalid_cursor(self, user_client, posts):
+        response = user_client.get('/api/v1/posts/?cursor=broken')
+        assert response.status_code == 404
+
+    def test_comments_cursor(self, user_client, post, user):
+        comments = [
+            Comment.objects.create(text=f'Коммент {index}', author=user,
+                                   post=post)
+            for index in range(3)
+        ]
+        url = f'/api/v1/posts/{post.id}/comments/?page_size=2'
+        first = user_client.get(url).json()
+        second = user_client.get(first['next']).json()
+        assert [comment['id'] for comment in
+                first['results'] + second['results']] == [
+            comment.id for comment in comments
+        ]
+        assert second['next'] is None
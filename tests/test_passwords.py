@@ -0,0 +1,152 @@
+import asyncio
+import time
+from threading import Barrier, Event, Thread
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+
+from api import passwords
+from api.instrumentation import password_metrics
+from api.passwords import verifier
+
+URL = '/api/v1/api-token-auth/'
+
+
+@pytest.mark.django_db
+class TestTokenAuth:
+
+    @pytest.fixture(autouse=True)
+    def metrics(self):
+        password_metrics.clear()
+        yield password_metrics
+        password_metrics.clear()
+
+    def login(self, client, username, password):
+        return client.post(URL, {'username': username, 'password': password})
+
+    def test_invalid_credentials(self, client, user, password):
+        assert self.login(client, user.username, 'wrong').status_code == 400
+        assert self.login(client, 'nobody', password).status_code == 400
+        user.is_active = False
+        user.save()
+        assert self.login(client, user.username, password).status_code == 400
+
+    def test_success_cached(self, client, user, password, metrics):
+        for _ in range(2):
+            assert self.login(client, user.username, password).status_code == (
+                200
+            )
+        snapshot = metrics.snapshot()
+        assert snapshot['cache_hits'] == 1, (
+            'Проверьте, что успешная проверка пароля кешируется.'
+        )
+        assert snapshot['hashes']['pbkdf2_sha256']['count'] == 1
+        assert 'yatube_password_hash_duration_seconds_count' in (
+            metrics.render_prometheus()
+        )
+
+    def test_password_change_invalidates_cache(self, client, user, password):
+        assert self.login(client, user.username, password).status_code == 200
+        user.set_password('новый пароль')
+        user.save()
+        assert self.login(client, user.username, password).status_code == 400
+
+    def test_rehash_with_preferred_hasher(self, client, user, password,
+                                          settings):
+        settings.PASSWORD_HASHERS = [
+            'django.contrib.auth.hashers.MD5PasswordHasher',
+            'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        ]
+        assert self.login(client, user.username, password).status_code == 200
+        user.refresh_from_db()
+        assert user.password.startswith('md5$'), (
+            'Проверьте, что пароль перехешируется основным хешером.'
+        )
+
+    def test_overloaded(self, client, user, password, settings):
+        settings.API_LOGIN = {'WORKERS': 0, 'MAX_PENDING': 0}
+        response = self.login(client, user.username, password)
+        assert response.status_code == 503
+
+    def test_process_pool(self, client, user, password, settings):
+        settings.API_LOGIN = {'WORKERS': 1}
+        try:
+            assert self.login(client, user.username, password).status_code == (
+                200
+            )
+            assert self.login(client, user.username, 'wrong').status_code == (
+                400
+            )
+        finally:
+            verifier.pool.shutdown()
+            verifier.pool = verifier.pool_key = None
+
+
+class TestPasswordVerifier:
+
+    def test_concurrent_checks_deduplicated(self, monkeypatch):
+        password_metrics.clear()
+        started, release = Event(), Event()
+        calls = []
+
+        def slow_verify(password, encoded):
+            calls.append(password)
+            started.set()
+            release.wait(5)
+            return False, 0.0
+
+        monkeypatch.setattr(passwords, 'verify_password', slow_verify)
+        results = []
+        threads = [
+            Thread(target=lambda: results.append(
+                verifier.verify('secret', 'md5$salt$hash')
+            )) for _ in range(3)
+        ]
+        threads[0].start()
+        assert started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        for _ in range(500):
+            if password_metrics.snapshot()['deduplicated'] == 2:
+                break
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        assert calls == ['secret'], (
+            'Проверьте, что одновременные проверки одного пароля '
+            'выполняются один раз.'
+        )
+        assert results == [False] * 3
+        password_metrics.clear()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsgiLogin:
+
+    def test_concurrent_logins(self, settings, user, another_user,
+                               monkeypatch):
+        settings.ROOT_URLCONF = 'yatube_api.urls_asgi'
+        barrier = Barrier(2, timeout=5)
+
+        def concurrent_verify(password, encoded):
+            barrier.wait()
+            return False, 0.0
+
+        monkeypatch.setattr(passwords, 'verify_password', concurrent_verify)
+        client = AsyncClient()
+
+        async def logins():
+            return await asyncio.gather(*(
+                client.post(URL, {'username': name, 'password': 'wrong'},
+                            content_type='application/json')
+                for name in (user.username, another_user.username)
+            ))
+
+        responses = async_to_sync(logins)()
+        assert [response.status_code for response in responses] == [400, 400]
+        assert not barrier.broken, (
+            'Проверьте, что под ASGI пароли проверяются параллельно, '
+            'а не по очереди в общем потоке.'
+        )
@@ -0,0 +1,89 @@
+import pytest
+
+from posts.models import Comment, Group, Post
+from tests.utils import assert_constant_queries, count_queries
+
+
+@pytest.mark.django_db
+class TestQueryCount:
+
+    def test_posts_list_queries_constant(self, user_client, user,
+                                         another_user, group_1):
+        def add_posts(size):
+            for index in range(size):
+                Post.objects.create(
+                    text=f'Пост {index}',
+                    author=another_user if index % 2 else user,
+                    group=group_1,
+                )
+
+        assert_constant_queries(user_client, '/api/v1/posts/', add_posts)
+
+    def test_comments_list_queries_constant(self, user_client, post,
+                                            user, another_user):
+        def add_comments(size):
+            for index in range(size):
+                Comment.objects.create(
+                    text=f'Коммент {index}',
+                    author=another_user if index % 2 else user,
+                    post=post,
+                )
+
+        assert_constant_queries(
+            user_client, f'/api/v1/posts/{post.id}/comments/', add_comments
+        )
+
+    def test_groups_list_queries_constant(self, user_client):
+        def add_groups(size):
+            start = Group.objects.count()
+            for index in range(start, start + size):
+                Group.objects.create(title=f'Группа {index}',
+                                     slug=f'group-{index}')
+
+        assert_constant_queries(user_client, '/api/v1/groups/', add_groups)
+
+
+@pytest.mark.django_db
+class TestCommentQueries:
+
+    @pytest.fixture(autouse=True)
+    def disable_response_cache(self, settings):
+        settings.API_RESPONSE_CACHE = {'ENABLED': False}
+
+    def test_comments_list_single_query(self, user_client, post,
+                                        comment_1_post):
+        url = f'/api/v1/posts/{post.id}/comments/'
+        user_client.get(url)
+        response, num_queries = count_queries(user_client, url)
+        assert response.status_code == 200
+        assert num_queries == 1, (
+            f'Проверьте, что `{url}` не запрашивает пост отдельно от '
+            'комментариев.'
+        )
+
+    def test_comment_detail_single_query(self, user_client, post,
+                                         comment_1_post):
+        url = f'/api/v1/posts/{post.id}/comments/{comment_1_post.id}/'
+        user_client.get(url)
+        response, num_queries = count_queries(user_client, url)
+        assert response.status_code == 200
+        assert num_queries == 1
+
+    def test_empty_comments_of_existing_post(self, user_client, post):
+        response = user_client.get(f'/api/v1/posts/{post.id}/comments/')
+        assert response.status_code == 200
+        assert response.json() == []
+
+    @pytest.mark.parametrize('suffix', ('', '?stream=true', '?page_size=2'))
+    def test_comments_of_missing_post(self, user_client, post, suffix):
+        response = user_client.get(
+            f'/api/v1/posts/{post.id + 100}/comments/{suffix}'
+        )
+        assert response.status_code == 404
+
+    def test_comment_of_other_post(self, user_client, post, another_post,
+                                   comment_1_another_post):
+        response = user_client.get(
+            f'/api/v1/posts/{post.id}/comments/{comment_1_another_post.id}/'
+        )
+        assert response.status_code == 404
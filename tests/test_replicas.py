@@ -0,0 +1,99 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Post
+from yatube_api.db.routers import STICKY_KEY
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+class TestReplicaRouting:
+
+    @pytest.fixture
+    def replica(self, tmp_path, settings, monkeypatch):
+        settings.DATABASE_REPLICAS = {'ALIASES': ['replica'],
+                                      'STICKY_TIMEOUT': 60}
+        settings.API_RESPONSE_CACHE = {'ENABLED': False}
+        connection = connections['replica']
+        connection.close()
+        monkeypatch.setitem(connection.settings_dict, 'NAME',
+                            str(tmp_path / 'replica.sqlite3'))
+        yield connection
+        connection.close()
+
+    @staticmethod
+    def texts(response):
+        assert response.status_code == 200, response.content
+        return sorted(post['text'] for post in response.json())
+
+    def test_get_reads_from_replica(self, replica, user_client, user):
+        Post.objects.create(text='Старый', author=user)
+        call_command('sync_replicas', verbosity=0)
+        Post.objects.create(text='Новый', author=user)
+        with CaptureQueriesContext(replica) as context:
+            response = user_client.get('/api/v1/posts/')
+        assert self.texts(response) == ['Старый'], (
+            'Проверьте, что GET-запросы к API читают из реплики.'
+        )
+        assert context.captured_queries
+        assert Post.objects.count() == 2, (
+            'Проверьте, что вне запросов к API чтение идёт из основной базы.'
+        )
+
+    def test_stream_reads_from_replica(self, replica, user_client, user):
+        Post.objects.create(text='Старый', author=user)
+        call_command('sync_replicas', verbosity=0)
+        Post.objects.create(text='Новый', author=user)
+        response = user_client.get('/api/v1/posts/?stream=true')
+        posts = json.loads(b''.join(response.streaming_content))
+        assert [post['text'] for post in posts] == ['Старый'], (
+            'Проверьте, что потоковый ответ читается из реплики.'
+        )
+
+    def test_write_goes_to_primary_and_pins_user(self, replica, user,
+                                                 user_client, another_user):
+        from rest_framework.test import APIClient
+
+        call_command('sync_replicas', verbosity=0)
+        response = user_client.post('/api/v1/posts/', {'text': 'Мой пост'})
+        assert response.status_code == 201
+        assert not Post.objects.using('replica').exists()
+        assert self.texts(user_client.get('/api/v1/posts/')) == [
+            'Мой пост'
+        ], 'Проверьте, что после записи автор читает из основной базы.'
+
+        other_client = APIClient()
+        other_client.force_authenticate(another_user)
+        assert self.texts(other_client.get('/api/v1/posts/')) == []
+
+        from django.core.cache import cache
+        cache.delete(STICKY_KEY.format(user.pk))
+        assert self.texts(user_client.get('/api/v1/posts/')) == []
+
+    def test_object_from_replica_saved_to_primary(self, replica, user):
+        post = Post.objects.create(text='Текст', author=user)
+        call_command('sync_replicas', verbosity=0)
+        copy = Post.objects.using('replica').get(pk=post.pk)
+        copy.text = 'Изменён'
+        copy.save()
+        assert Post.objects.get(pk=post.pk).text == 'Изменён'
+        assert Post.objects.using('replica').get(pk=post.pk).text == 'Текст'
+
+    def test_recent_changes_cached_from_primary(self, replica, settings,
+                                                user, user_client):
+        settings.API_RESPONSE_CACHE = {'ENABLED': True}
+        call_command('sync_replicas', verbosity=0)
+        Post.objects.create(text='Свежий', author=user)
+        assert self.texts(user_client.get('/api/v1/posts/')) == ['Свежий'], (
+            'Проверьте, что ответ по недавно изменённым данным, который '
+            'попадёт в кеш, читается из основной базы.'
+        )
+
+    def test_no_replicas_reads_primary(self, user_client, user):
+        Post.objects.create(text='Пост', author=user)
+        with CaptureQueriesContext(connections['replica']) as context:
+            assert self.texts(user_client.get('/api/v1/posts/')) == ['Пост']
+        assert not context.captured_queries
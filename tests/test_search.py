@@ -0,0 +1,93 @@
+import pytest
+from django.core.management import call_command
+
+from posts.models import Post
+from posts.search import (ContainsSearchBackend, SQLiteFTS5Backend,
+                          get_search_backend, search_posts)
+from tests.utils import query_plan
+
+
+@pytest.mark.django_db
+class TestPostSearch:
+
+    @pytest.fixture
+    def posts(self, user):
+        return [
+            Post.objects.create(text='Кот спит на диване', author=user),
+            Post.objects.create(text='Собака и кот, кот и собака',
+                                author=user),
+            Post.objects.create(text='Про погоду', author=user),
+        ]
+
+    def test_backend_uses_fts5(self):
+        assert isinstance(get_search_backend(), SQLiteFTS5Backend), (
+            'Проверьте, что на SQLite поиск идёт через индекс FTS5.'
+        )
+
+    def test_search_finds_and_ranks(self, user_client, posts):
+        response = user_client.get('/api/v1/posts/?search=кот')
+        assert response.status_code == 200
+        assert [post['id'] for post in response.json()] == [
+            posts[1].id, posts[0].id
+        ], (
+            'Проверьте, что `/api/v1/posts/?search=` возвращает найденные '
+            'посты по убыванию релевантности.'
+        )
+
+    def test_search_all_terms_and_prefix(self, user_client, posts):
+        data = user_client.get('/api/v1/posts/?search=собака+ко').json()
+        assert [post['id'] for post in data] == [posts[1].id]
+
+    def test_search_ignores_query_syntax(self, user_client, posts):
+        response = user_client.get('/api/v1/posts/?search="кот*(:')
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+        assert user_client.get('/api/v1/posts/?search=!!').json() == []
+
+    def test_search_paginated(self, user_client, posts):
+        data = user_client.get(
+            '/api/v1/posts/?search=кот&limit=1&offset=1'
+        ).json()
+        assert data['count'] == 2
+        assert data['results'][0]['id'] == posts[0].id
+        data = user_client.get('/api/v1/posts/?search=кот&page_size=1').json()
+        assert data['results'][0]['id'] == posts[1].id
+
+    def test_index_follows_changes(self, user, posts):
+        posts[2].text = 'Кот пришёл'
+        posts[2].save()
+        Post.objects.filter(pk=posts[0].pk).update(text='Диван')
+        Post.objects.bulk_create([Post(text='Новый кот', author=user)])
+        posts[1].delete()
+        found = search_posts(Post.objects.all(), 'кот')
+        assert sorted(post.text for post in found) == [
+            'Кот пришёл', 'Новый кот'
+        ], 'Проверьте, что триггеры поддерживают индекс в актуальном виде.'
+
+    def test_search_uses_index(self, posts):
+        queryset = search_posts(Post.objects.all(), 'кот')
+        plan = ' '.join(query_plan(*queryset.query.sql_with_params()))
+        assert 'SCAN posts_post_fts VIRTUAL TABLE' in plan, (
+            'Проверьте, что поиск идёт по индексу FTS5.'
+        )
+        assert 'SCAN posts_post ' not in plan
+
+    def test_rebuild_restores_index(self, posts):
+        backend = get_search_backend()
+        backend.uninstall()
+        call_command('rebuild_post_search', verbosity=0)
+        assert backend.is_installed()
+        assert search_posts(Post.objects.all(), 'погоду').get() == posts[2]
+
+    def test_contains_backend(self, settings, user_client, posts):
+        settings.POST_SEARCH = {
+            'BACKEND': 'posts.search.ContainsSearchBackend'
+        }
+        assert isinstance(get_search_backend(), ContainsSearchBackend)
+        data = user_client.get('/api/v1/posts/?search=погод').json()
+        assert [post['id'] for post in data] == [posts[2].id]
+
+    def test_admin_search(self, admin_client, posts):
+        response = admin_client.get('/admin/posts/post/?q=диване')
+        assert response.status_code == 200
+        assert list(response.context['cl'].result_list) == [posts[0]]
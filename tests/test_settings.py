@@ -39,11 +39,16 @@ class TestSettings:
             'Проверьте, что добавили ключ `DEFAULT_AUTHENTICATION_CLASSES` в '
             '`REST_FRAMEWORK` файла `settings.py`'
         )
-        assert (
-            'rest_framework.authentication.TokenAuthentication' in
-            settings.REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES']
+        from django.utils.module_loading import import_string
+        from rest_framework.authentication import TokenAuthentication
+        assert any(
+            issubclass(import_string(path), TokenAuthentication)
+            for path in settings.REST_FRAMEWORK[
+                'DEFAULT_AUTHENTICATION_CLASSES'
+            ]
         ), (
             'Проверьте, что в списке `DEFAULT_AUTHENTICATION_CLASSES` в '
             '`REST_FRAMEWORK` содержится '
-            '`rest_framework.authentication.TokenAuthentication`.'
+            '`rest_framework.authentication.TokenAuthentication` или его '
+            'наследник.'
         )
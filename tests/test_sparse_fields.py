@@ -0,0 +1,105 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Comment, Post
+from tests.utils import assert_constant_queries
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+
+    @pytest.fixture(autouse=True)
+    def disable_response_cache(self, settings):
+        settings.API_RESPONSE_CACHE = {'ENABLED': False}
+
+    def test_fields_limit_response_and_select(self, user_client, post):
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get('/api/v1/posts/?fields=text')
+        assert response.status_code == 200, response.content
+        assert response.json() == [{'id': post.id, 'text': post.text}], (
+            'Проверьте, что `?fields=` оставляет в ответе только '
+            'перечисленные поля и первичный ключ.'
+        )
+        sql = context.captured_queries[-1]['sql']
+        assert '"posts_post"."text"' in sql
+        assert '"posts_post"."image_variants"' not in sql, (
+            'Проверьте, что `?fields=` ограничивает колонки в SELECT.'
+        )
+
+    def test_fields_on_retrieve_and_comments(self, user_client, post,
+                                             comment_1_post):
+        response = user_client.get(
+            f'/api/v1/posts/{post.id}/?fields=author,group'
+        )
+        assert response.json() == {
+            'id': post.id, 'author': post.author.username, 'group': None
+        }
+        response = user_client.get(
+            f'/api/v1/posts/{post.id}/comments/?fields=text'
+        )
+        assert response.json() == [
+            {'id': comment_1_post.id, 'text': comment_1_post.text}
+        ]
+
+    def test_unknown_names_rejected(self, user_client, post):
+        response = user_client.get('/api/v1/posts/?fields=text,secret')
+        assert response.status_code == 400
+        assert 'fields' in response.json()
+        response = user_client.get('/api/v1/posts/?expand=author')
+        assert response.status_code == 400
+        assert 'expand' in response.json()
+
+    def test_fields_ignored_on_write(self, user_client):
+        response = user_client.post('/api/v1/posts/?fields=id',
+                                    {'text': 'Новый пост'})
+        assert response.status_code == 201
+        assert response.json()['text'] == 'Новый пост'
+
+    def test_expand_group_and_comments(self, user_client, post_2, group_1,
+                                       user, another_user):
+        comment = Comment.objects.create(text='Коммент', post=post_2,
+                                         author=another_user)
+        response = user_client.get(
+            f'/api/v1/posts/{post_2.id}/?expand=group,comments'
+            '&fields=text'
+        )
+        assert response.status_code == 200, response.content
+        assert response.json() == {
+            'id': post_2.id,
+            'text': post_2.text,
+            'group': {'id': group_1.id, 'title': group_1.title,
+                      'slug': group_1.slug,
+                      'description': group_1.description},
+            'comments': [{'id': comment.id, 'author': another_user.username,
+                          'post': post_2.id, 'text': comment.text,
+                          'created': comment.created.isoformat().replace(
+                              '+00:00', 'Z')}],
+        }
+
+    @pytest.mark.parametrize('suffix', ('', '&stream=true'))
+    def test_expand_queries_constant(self, user_client, user, another_user,
+                                     group_1, suffix):
+        def add_posts(size):
+            for index in range(size):
+                post = Post.objects.create(text=f'Пост {index}', author=user,
+                                           group=group_1)
+                Comment.objects.create(text='Коммент', post=post,
+                                       author=another_user)
+
+        assert_constant_queries(
+            user_client, f'/api/v1/posts/?expand=group,comments{suffix}',
+            add_posts
+        )
+
+    def test_expand_in_group_timeline(self, user_client, post_2, group_1):
+        response = user_client.get(
+            f'/api/v1/groups/{group_1.slug}/posts/?fields=text&expand=group'
+        )
+        assert response.status_code == 200, response.content
+        results = response.json()['results']
+        assert results == [{'id': post_2.id, 'text': post_2.text,
+                            'group': {'id': group_1.id,
+                                      'title': group_1.title,
+                                      'slug': group_1.slug,
+                                      'description': group_1.description}}]
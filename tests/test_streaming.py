@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+from posts.models import Post
+
+
+@pytest.mark.django_db
+class TestStreamingList:
+
+    def test_posts_stream_matches_list(self, user_client, post, post_2,
+                                       another_post):
+        expected = user_client.get('/api/v1/posts/').json()
+        response = user_client.get('/api/v1/posts/?stream=true')
+        assert response.streaming, (
+            'Проверьте, что `/api/v1/posts/?stream=true` отдаёт ответ потоком.'
+        )
+        data = json.loads(b''.join(response.streaming_content))
+        assert data == expected
+
+    def test_stream_chunks(self, user_client, user, monkeypatch):
+        from api.views import PostViewSet
+        monkeypatch.setattr(PostViewSet, 'stream_chunk_size', 2)
+        for index in range(5):
+            Post.objects.create(text=f'Пост {index}', author=user)
+        response = user_client.get('/api/v1/posts/?stream=1')
+        data = json.loads(b''.join(response.streaming_content))
+        assert len(data) == 5
+
+    def test_comments_stream_empty(self, user_client, post):
+        response = user_client.get(
+            f'/api/v1/posts/{post.id}/comments/?stream=true'
+        )
+        assert json.loads(b''.join(response.streaming_content)) == []
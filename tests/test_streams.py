@@ -0,0 +1,256 @@
+import asyncio
+import json
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+
+from api.events import LocalBroker, get_broker
+from api.streams import comments_channel
+from posts.models import Comment, Post
+
+TIMEOUT = 5
+
+
+class StreamClient:
+    """Открывает поток через обработчик ASGI и читает его события."""
+
+    def __init__(self, path, headers=()):
+        from yatube_api.asgi import YatubeASGIHandler
+
+        self.messages = asyncio.Queue()
+        self.disconnected = asyncio.Event()
+        self.requested = False
+        path, _, query = path.partition('?')
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'},
+            'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(),
+            'query_string': query.encode(), 'root_path': '',
+            'headers': [(b'host', b'testserver'), *headers],
+            'server': ('testserver', 80), 'client': ('127.0.0.1', 0),
+        }
+        self.task = asyncio.ensure_future(
+            YatubeASGIHandler()(scope, self.receive, self.send)
+        )
+
+    async def send(self, message):
+        await self.messages.put(message)
+
+    async def receive(self):
+        if not self.requested:
+            self.requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def start(self):
+        message = await self.message()
+        assert message['type'] == 'http.response.start'
+        return message['status'], dict(message['headers'])
+
+    async def message(self):
+        return await asyncio.wait_for(self.messages.get(), TIMEOUT)
+
+    async def chunk(self):
+        return (await self.message()).get('body', b'')
+
+    async def body(self):
+        chunks = []
+        while True:
+            message = await self.message()
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                return b''.join(chunks)
+
+    async def event(self):
+        while True:
+            chunk = await self.chunk()
+            if chunk.startswith(b'id: '):
+                lines = dict(line.split(': ', 1)
+                             for line in chunk.decode().strip().split('\n'))
+                return lines['event'], json.loads(lines['data'])
+
+    async def close(self):
+        self.disconnected.set()
+        await asyncio.wait_for(self.task, TIMEOUT)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCommentStream:
+
+    @pytest.fixture
+    def auth(self, token):
+        return (b'authorization', f'Token {token}'.encode())
+
+    @staticmethod
+    def run(scenario):
+        async_to_sync(scenario)()
+
+    def test_new_comments_streamed(self, auth, post, user):
+        create = sync_to_async(Comment.objects.create)
+
+        async def scenario():
+            stream = StreamClient(
+                f'/api/v1/posts/{post.id}/comments/stream/', [auth]
+            )
+            status, headers = await stream.start()
+            assert status == 200
+            assert headers[b'Content-Type'] == b'text/event-stream'
+            assert (await stream.chunk()).startswith(b'retry: ')
+            channel = comments_channel(post.id)
+            assert get_broker().subscribers(channel) == 1
+            comment = await create(text='Новый', post=post, author=user)
+            event, data = await stream.event()
+            assert event == 'comment'
+            assert data['id'] == comment.id
+            assert data['text'] == 'Новый'
+            assert data['author'] == user.username
+            await stream.close()
+            assert get_broker().subscribers(channel) == 0, (
+                'Проверьте, что после отключения клиента подписка '
+                'освобождается.'
+            )
+
+        self.run(scenario)
+
+    def test_reconnect_replays_missed(self, auth, post, user):
+        first = Comment.objects.create(text='Первый', post=post, author=user)
+        missed = Comment.objects.create(text='Пропущен', post=post,
+                                        author=user)
+
+        async def scenario():
+            stream = StreamClient(
+                f'/api/v1/posts/{post.id}/comments/stream/',
+                [auth, (b'last-event-id', str(first.id).encode())]
+            )
+            assert (await stream.start())[0] == 200
+            event, data = await stream.event()
+            assert data['id'] == missed.id, (
+                'Проверьте, что поток с Last-Event-ID начинается с '
+                'пропущенных комментариев.'
+            )
+            await stream.close()
+
+        self.run(scenario)
+
+    def test_heartbeat(self, auth, post, settings):
+        settings.API_EVENTS = {'HEARTBEAT': 0.05}
+
+        async def scenario():
+            stream = StreamClient(
+                f'/api/v1/posts/{post.id}/comments/stream/', [auth]
+            )
+            await stream.start()
+            await stream.chunk()
+            assert await stream.chunk() == b': ping\n\n'
+            await stream.close()
+
+        self.run(scenario)
+
+    def test_errors(self, auth):
+        async def scenario():
+            stream = StreamClient('/api/v1/posts/999/comments/stream/',
+                                  [auth])
+            assert (await stream.start())[0] == 404
+            await stream.body()
+            stream = StreamClient('/api/v1/posts/999/comments/stream/')
+            assert (await stream.start())[0] == 401
+            await stream.body()
+
+        self.run(scenario)
+
+    def test_invalid_last_event_id(self, auth, post):
+        async def scenario():
+            stream = StreamClient(
+                f'/api/v1/posts/{post.id}/comments/stream/'
+                '?last_event_id=x', [auth]
+            )
+            assert (await stream.start())[0] == 400
+            assert 'last_event_id' in json.loads(await stream.body())
+
+        self.run(scenario)
+
+
+class SlowStreamClient(StreamClient):
+    """Клиент, который медленно принимает части ответа."""
+
+    def __init__(self, path, headers, log):
+        self.log = log
+        super().__init__(path, headers)
+
+    async def send(self, message):
+        if message['type'] == 'http.response.body':
+            self.log.append('sent')
+            await asyncio.sleep(0.01)
+        await super().send(message)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPooledStream:
+
+    def test_stream_not_buffered(self, token, user, settings, monkeypatch):
+        from api.views import PostViewSet
+
+        settings.API_ASYNC = {'STREAM_BUFFER': 1}
+        monkeypatch.setattr(PostViewSet, 'stream_chunk_size', 1)
+        Post.objects.bulk_create(
+            Post(text=f'Пост {index}', author=user) for index in range(10)
+        )
+        log = []
+        represent = PostViewSet.represent_queryset
+
+        def record(self, queryset):
+            for data in represent(self, queryset):
+                log.append('read')
+                yield data
+
+        monkeypatch.setattr(PostViewSet, 'represent_queryset', record)
+        auth = (b'authorization', f'Token {token}'.encode())
+
+        async def scenario():
+            stream = SlowStreamClient('/api/v1/posts/?stream=true', [auth],
+                                      log)
+            status, _ = await stream.start()
+            body = await stream.body()
+            await stream.close()
+            return status, body
+
+        status, body = async_to_sync(scenario)()
+        assert status == 200
+        assert len(json.loads(body)) == 10
+        assert log.index('sent') < len(log) - 1 - log[::-1].index('read'), (
+            'Проверьте, что под ASGI потоковый ответ отдаётся по частям, '
+            'а не читается целиком до отправки.'
+        )
+
+
+class TestLocalBroker:
+
+    def test_publish_to_subscribers(self):
+        broker = LocalBroker(queue_size=10)
+
+        async def scenario():
+            with broker.subscribe('a') as first, broker.subscribe('b'):
+                broker.publish('a', {'id': 1})
+                assert await asyncio.wait_for(first.get(), TIMEOUT) == {
+                    'id': 1
+                }
+                assert broker.subscribers('b') == 1
+            assert broker.subscribers('a') == 0
+
+        async_to_sync(scenario)()
+
+    def test_overflow_closes_subscription(self):
+        broker = LocalBroker(queue_size=2)
+
+        async def scenario():
+            with broker.subscribe('a') as subscription:
+                for index in range(3):
+                    broker.publish('a', {'id': index})
+                await asyncio.sleep(0)
+                assert await subscription.get() is None, (
+                    'Проверьте, что отставшая подписка закрывается.'
+                )
+                assert broker.subscribers('a') == 0
+
+        async_to_sync(scenario)()
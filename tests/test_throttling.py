@@ -0,0 +1,197 @@
+import pytest
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+
+from api.middleware import LoadSheddingMiddleware
+from api.throttling import (BucketStore, LatencyMonitor, TokenBucket,
+                            buckets)
+
+
+class TestTokenBucket:
+
+    def test_refill(self):
+        bucket = TokenBucket(2, 60, now=0)
+        assert bucket.consume(0) and bucket.consume(0)
+        assert not bucket.consume(0)
+        assert bucket.wait() == pytest.approx(30)
+        assert bucket.consume(30), (
+            'Проверьте, что корзина пополняется со временем.'
+        )
+        assert not bucket.consume(30)
+
+    def test_sync_with_shared_counter(self):
+        first = TokenBucket(5, 60, now=0)
+        second = TokenBucket(5, 60, now=0)
+        for _ in range(3):
+            first.consume(0)
+        first.sync(cache, 'key', now=0, wall_time=0)
+        second.consume(0)
+        second.sync(cache, 'key', now=0, wall_time=0)
+        assert second.tokens == 1, (
+            'Проверьте, что после согласования в корзине остаётся только '
+            'неизрасходованная всеми процессами часть лимита.'
+        )
+
+    def test_store_evicts_least_recent_buckets(self):
+        store = BucketStore()
+        store.get('a', 1, 60, now=0, max_size=2).consume(0)
+        store.get('b', 1, 60, now=0, max_size=2).consume(0)
+        store.get('a', 1, 60, now=1, max_size=2)
+        store.get('c', 1, 60, now=2, max_size=2)
+        assert list(store.buckets) == ['a', 'c'], (
+            'Проверьте, что при переполнении удаляются только корзины, '
+            'к которым дольше всего не обращались.'
+        )
+        assert not store.get('a', 1, 60, now=2, max_size=2).consume(2)
+
+
+@pytest.mark.django_db
+class TestRouteThrottle:
+
+    def test_posts_list_limited_per_user(self, settings, user_client,
+                                         another_user):
+        settings.API_THROTTLING = {'RATES': {'posts-list': '2/min'}}
+        assert user_client.get('/api/v1/posts/').status_code == 200
+        assert user_client.get('/api/v1/posts/').status_code == 200
+        response = user_client.get('/api/v1/posts/')
+        assert response.status_code == 429, (
+            'Проверьте, что запросы сверх лимита получают ответ 429.'
+        )
+        assert int(response['Retry-After']) > 0
+        assert user_client.get('/api/v1/groups/').status_code == 200, (
+            'Проверьте, что маршруты без лимита не ограничиваются.'
+        )
+        client = APIClient()
+        client.force_authenticate(another_user)
+        assert client.get('/api/v1/posts/').status_code == 200, (
+            'Проверьте, что лимит считается для каждого пользователя.'
+        )
+
+    def test_token_auth_limited(self, settings, client, user, password):
+        settings.API_THROTTLING = {'RATES': {'api-token-auth': '1/min'}}
+        data = {'username': user.username, 'password': password}
+        response = client.post('/api/v1/api-token-auth/', data)
+        assert response.status_code == 200
+        response = client.post('/api/v1/api-token-auth/', data)
+        assert response.status_code == 429, (
+            'Проверьте, что попытки получить токен ограничены.'
+        )
+
+    def test_forwarded_for_needs_proxies(self, settings, client, user):
+        settings.API_THROTTLING = {'RATES': {'api-token-auth': '1/min'}}
+        data = {'username': user.username, 'password': 'wrong'}
+        for address in ('10.0.0.1', '10.0.0.2'):
+            response = client.post('/api/v1/api-token-auth/', data,
+                                   HTTP_X_FORWARDED_FOR=address)
+        assert response.status_code == 429, (
+            'Проверьте, что без NUM_PROXIES анонимный клиент определяется '
+            'по REMOTE_ADDR, а не по X-Forwarded-For.'
+        )
+        settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK,
+                                   'NUM_PROXIES': 1}
+        response = client.post('/api/v1/api-token-auth/', data,
+                               HTTP_X_FORWARDED_FOR='10.0.0.3')
+        assert response.status_code == 400, (
+            'Проверьте, что с NUM_PROXIES учитывается X-Forwarded-For.'
+        )
+
+    def test_disabled(self, settings, user_client):
+        settings.API_THROTTLING = {'ENABLED': False,
+                                   'RATES': {'posts-list': '1/min'}}
+        for _ in range(3):
+            assert user_client.get('/api/v1/posts/').status_code == 200
+        assert not buckets.buckets
+
+
+class TestLoadShedding:
+
+    @pytest.fixture
+    def request_factory(self):
+        return RequestFactory()
+
+    def test_in_flight_limit(self, settings, request_factory):
+        settings.API_LOAD_SHEDDING = {'ENABLED': True, 'MAX_IN_FLIGHT': 1}
+        nested = {}
+
+        def get_response(request):
+            if not nested:
+                for path in ('/api/v1/posts/', '/admin/'):
+                    nested[path] = middleware(request_factory.get(path))
+            return HttpResponse()
+
+        middleware = LoadSheddingMiddleware(get_response)
+        response = middleware(request_factory.get('/api/v1/posts/'))
+        assert response.status_code == 200
+        response = nested['/api/v1/posts/']
+        assert response.status_code == 503, (
+            'Проверьте, что запросы сверх MAX_IN_FLIGHT получают ответ 503.'
+        )
+        assert response['Retry-After'] == '1'
+        assert nested['/admin/'].status_code == 200, (
+            'Проверьте, что запросы к EXEMPT_PATHS не сбрасываются.'
+        )
+        assert middleware(
+            request_factory.get('/api/v1/posts/')
+        ).status_code == 200
+
+    @pytest.mark.django_db
+    def test_db_latency(self, settings, user_client):
+        settings.API_LOAD_SHEDDING = {'ENABLED': True, 'MAX_DB_LATENCY': 0,
+                                      'MIN_SAMPLES': 2, 'PROBE_INTERVAL': 60}
+        settings.API_RESPONSE_CACHE = {'ENABLED': False}
+        assert user_client.get('/api/v1/posts/').status_code == 200
+        assert user_client.get('/api/v1/posts/').status_code == 200, (
+            'Проверьте, что до MIN_SAMPLES замеров запросы не сбрасываются.'
+        )
+        assert user_client.get('/api/v1/posts/').status_code == 503, (
+            'Проверьте, что при медленной БД запросы сбрасываются.'
+        )
+        assert user_client.get('/api/v1/metrics/').status_code != 503
+
+    @pytest.mark.parametrize('performance, middleware', [
+        ({'ENABLED': False}, None),
+        ({}, ['api.middleware.PerformanceMiddleware',
+              'api.middleware.LoadSheddingMiddleware']),
+    ])
+    def test_requires_performance_stats(self, settings, performance,
+                                        middleware):
+        settings.API_LOAD_SHEDDING = {'ENABLED': True}
+        settings.API_PERFORMANCE = performance
+        if middleware is not None:
+            settings.MIDDLEWARE = middleware
+        with pytest.raises(ImproperlyConfigured):
+            LoadSheddingMiddleware(HttpResponse)
+
+    def test_single_slow_request_not_shed(self):
+        monitor = LatencyMonitor(0.1, probe_interval=60, window=10,
+                                 min_samples=3)
+        monitor.observe(1, 5.0, now=0)
+        assert not monitor.overloaded(0)
+        for _ in range(3):
+            monitor.observe(2, 0.01, now=1)
+        assert not monitor.overloaded(1), (
+            'Проверьте, что один медленный запрос не включает сброс нагрузки.'
+        )
+        for _ in range(5):
+            monitor.observe(1, 0.5, now=2)
+        assert monitor.overloaded(2)
+        assert not monitor.overloaded(62)
+        monitor.observe(1, 0.01, now=62)
+        assert not monitor.overloaded(62), (
+            'Проверьте, что после PROBE_INTERVAL старые замеры отбрасываются.'
+        )
+
+    @pytest.mark.django_db
+    def test_stream_latency_observed_after_stream(self, settings,
+                                                  user_client, post):
+        settings.API_LOAD_SHEDDING = {'ENABLED': True, 'MAX_DB_LATENCY': 0,
+                                      'MIN_SAMPLES': 1, 'PROBE_INTERVAL': 60}
+        response = user_client.get('/api/v1/posts/?stream=true')
+        assert user_client.get('/api/v1/groups/').status_code == 200, (
+            'Проверьте, что потоковый ответ учитывается, когда он отдан.'
+        )
+        b''.join(response.streaming_content)
+        assert user_client.get('/api/v1/groups/').status_code == 503
@@ -0,0 +1,99 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import generics
+
+from api.mixins import TimelineListMixin
+from posts.models import Group, Post
+
+
+@pytest.mark.django_db(transaction=True)
+class TestGroupTimeline:
+
+    url = '/api/v1/groups/group_1/posts/'
+
+    @pytest.fixture
+    def posts(self, user, group_1):
+        return [Post.objects.create(text=f'Пост {index}', author=user,
+                                    group=group_1)
+                for index in range(5)]
+
+    def walk(self, client, url):
+        seen = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200, response.content
+            data = response.json()
+            seen.extend(post['id'] for post in data['results'])
+            url = data['next']
+        return seen
+
+    def test_feed_newest_first(self, user_client, posts, post):
+        response = user_client.get(self.url)
+        assert response.status_code == 200
+        assert [item['id'] for item in response.json()['results']] == [
+            item.id for item in reversed(posts)
+        ], (
+            'Проверьте, что `/api/v1/groups/{slug}/posts/` возвращает посты '
+            'группы, начиная с новых.'
+        )
+
+    def test_unknown_group(self, user_client):
+        assert user_client.get('/api/v1/groups/nope/posts/').status_code == (
+            404
+        )
+
+    @pytest.mark.parametrize('size', [1000, 2])
+    def test_cursor_walks_all_pages(self, settings, user_client, posts,
+                                    size):
+        settings.API_TIMELINES = {'SIZE': size}
+        assert self.walk(user_client, f'{self.url}?page_size=2') == [
+            item.id for item in reversed(posts)
+        ]
+
+    def test_read_does_not_order_posts(self, settings, user_client, posts):
+        settings.API_RESPONSE_CACHE = {'ENABLED': False}
+        user_client.get(self.url)
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get(f'{self.url}?page_size=2')
+        assert response.status_code == 200
+        post_queries = [query['sql'] for query in context.captured_queries
+                        if 'FROM "posts_post"' in query['sql']]
+        assert len(post_queries) == 1
+        assert 'ORDER BY' not in post_queries[0], (
+            'Проверьте, что лента группы читается из кеша, а из таблицы '
+            'постов выбираются только посты страницы.'
+        )
+
+    def test_timeline_follows_changes(self, user_client, user, posts,
+                                      group_1):
+        user_client.get(self.url)
+        new = Post.objects.create(text='Новый', author=user, group=group_1)
+        posts[0].delete()
+        other = Group.objects.create(title='Другая', slug='other')
+        moved = Post.objects.get(pk=posts[1].pk)
+        moved.group = other
+        moved.save()
+        assert self.walk(user_client, self.url) == [
+            new.id, posts[4].id, posts[3].id, posts[2].id
+        ]
+        assert self.walk(user_client, '/api/v1/groups/other/posts/') == [
+            moved.id
+        ]
+
+    def test_group_delete_clears_timeline(self, user_client, user, posts,
+                                          group_1):
+        user_client.get(self.url)
+        group_1.delete()
+        Group.objects.create(title='Группа 1', slug='group_1')
+        assert self.walk(user_client, self.url) == []
+
+    def test_invalid_cursor(self, user_client, posts):
+        response = user_client.get(f'{self.url}?cursor=bad')
+        assert response.status_code == 404
+
+    def test_timeline_required(self):
+        with pytest.raises(ImproperlyConfigured, match='get_timeline'):
+            class NoTimelineView(TimelineListMixin, generics.ListAPIView):
+                pass
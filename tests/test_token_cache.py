@@ -0,0 +1,56 @@
+import pytest
+
+from tests.utils import count_queries
+
+
+@pytest.mark.django_db
+class TestCachedTokenAuthentication:
+
+    def test_cache_hit_skips_auth_query(self, user_client, group_1,
+                                        settings):
+        settings.API_RESPONSE_CACHE = {'ENABLED': False}
+        _, cold = count_queries(user_client, '/api/v1/groups/')
+        response, warm = count_queries(user_client, '/api/v1/groups/')
+        assert response.status_code == 200
+        assert warm == cold - 1, (
+            'Проверьте, что повторный запрос с тем же токеном не обращается '
+            'к БД для аутентификации.'
+        )
+
+    def test_token_deletion_invalidates_cache(self, user_client, user):
+        from rest_framework.authtoken.models import Token
+        assert user_client.get('/api/v1/groups/').status_code == 200
+        Token.objects.filter(user=user).delete()
+        assert user_client.get('/api/v1/groups/').status_code == 401
+
+    def test_user_deactivation_invalidates_cache(self, user_client, user):
+        assert user_client.get('/api/v1/groups/').status_code == 200
+        user.is_active = False
+        user.save()
+        assert user_client.get('/api/v1/groups/').status_code == 401
+
+    def test_local_entries_expire_and_are_copies(self, settings, user):
+        from api.authentication import TokenCache
+        settings.TOKEN_AUTH_CACHE = {'LOCAL_TIMEOUT': 60}
+        cache = TokenCache()
+        cache.set('key', (user, None))
+        first, second = cache.get('key'), cache.get('key')
+        assert first[0] == user and first[0] is not second[0], (
+            'Проверьте, что потоки не получают один объект пользователя.'
+        )
+        settings.TOKEN_AUTH_CACHE = {'LOCAL_TIMEOUT': 0}
+        cache = TokenCache()
+        cache.set('key', (user, None))
+        assert cache.get('key') is None, (
+            'Проверьте, что записи в процессе живут LOCAL_TIMEOUT секунд.'
+        )
+
+    def test_lru_is_bounded(self):
+        from api.cache import LRUCache
+        cache = LRUCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        assert cache.get('b') is None
+        assert cache.get('a') == 1 and cache.get('c') == 3
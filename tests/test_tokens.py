@@ -0,0 +1,107 @@
+import pytest
+from django.core import signing
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api import tokens
+from api.models import RevokedToken
+from api.tokens import revocations
+
+URL = '/api/v1/tokens/'
+
+
+@pytest.mark.django_db
+class TestSignedTokens:
+
+    @pytest.fixture
+    def issued(self, client, user, password):
+        response = client.post(URL, {'username': user.username,
+                                     'password': password})
+        assert response.status_code == 200, response.content
+        return response.json()
+
+    @staticmethod
+    def bearer(value):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {value}')
+        return client
+
+    def test_issue_and_authenticate(self, issued, user):
+        assert 'expires' in issued
+        client = self.bearer(issued['token'])
+        assert client.get('/api/v1/posts/').status_code == 200, (
+            'Проверьте, что подписанный токен принимается API.'
+        )
+        response = client.post('/api/v1/posts/', {'text': 'Пост'})
+        assert response.status_code == 201
+        assert response.json()['author'] == user.username
+
+    def test_verified_without_queries(self, issued):
+        client = self.bearer(issued['token'])
+        client.get('/api/v1/groups/')
+        with CaptureQueriesContext(connection) as context:
+            assert client.get('/api/v1/groups/').status_code == 200
+        assert not [query for query in context.captured_queries
+                    if 'auth_user' in query['sql']
+                    or 'revokedtoken' in query['sql']], (
+            'Проверьте, что проверка подписанного токена не обращается к БД.'
+        )
+
+    def test_invalid_credentials(self, client, user):
+        response = client.post(URL, {'username': user.username,
+                                     'password': 'wrong'})
+        assert response.status_code == 400
+
+    def test_tampered_and_expired(self, issued, user, settings):
+        response = self.bearer(issued['token'] + 'x').get('/api/v1/posts/')
+        assert response.status_code == 401
+        assert response['WWW-Authenticate'] == 'Token'
+        settings.API_SIGNED_TOKENS = {'LIFETIME': -1}
+        expired = tokens.issue(user)['token']
+        assert self.bearer(expired).get('/api/v1/posts/').status_code == 401, (
+            'Проверьте, что просроченный токен не принимается.'
+        )
+        with pytest.raises(signing.SignatureExpired):
+            tokens.parse(expired)
+
+    def test_refresh_rotates(self, issued):
+        client = self.bearer(issued['token'])
+        response = client.post(f'{URL}refresh/')
+        assert response.status_code == 200
+        assert response.json()['token'] != issued['token']
+        assert client.get('/api/v1/posts/').status_code == 401, (
+            'Проверьте, что после обновления прежний токен отозван.'
+        )
+        client = self.bearer(response.json()['token'])
+        assert client.get('/api/v1/posts/').status_code == 200
+
+    def test_revoke(self, issued):
+        client = self.bearer(issued['token'])
+        assert client.post(f'{URL}revoke/').status_code == 204
+        assert client.get('/api/v1/posts/').status_code == 401
+        revocations.clear()
+        assert client.get('/api/v1/posts/').status_code == 401, (
+            'Проверьте, что список отозванных токенов загружается из БД.'
+        )
+
+    def test_revocation_list_refreshed(self, issued, settings):
+        settings.API_SIGNED_TOKENS = {'REFRESH_INTERVAL': 3600}
+        client = self.bearer(issued['token'])
+        assert client.get('/api/v1/posts/').status_code == 200
+        token = tokens.parse(issued['token'])
+        RevokedToken.objects.create(jti=token.jti, expires=token.expires)
+        assert client.get('/api/v1/posts/').status_code == 200
+        settings.API_SIGNED_TOKENS = {'REFRESH_INTERVAL': 0}
+        assert client.get('/api/v1/posts/').status_code == 401, (
+            'Проверьте, что отзыв в другом процессе виден после обновления '
+            'списка.'
+        )
+
+    def test_password_change_revokes(self, issued, user):
+        user.set_password('новый пароль')
+        user.save()
+        response = self.bearer(issued['token']).get('/api/v1/posts/')
+        assert response.status_code == 401, (
+            'Проверьте, что смена пароля отзывает подписанные токены.'
+        )
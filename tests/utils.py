@@ -0,0 +1,43 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def count_queries(client, url, **extra):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, **extra)
+        if response.streaming:
+            response.streaming_content = [
+                b''.join(response.streaming_content)
+            ]
+    return response, len(context.captured_queries)
+
+
+def assert_constant_queries(client, url, add_objects, batches=(1, 10)):
+    client.get(url)
+    counts = []
+    for size in batches:
+        add_objects(size)
+        response, num_queries = count_queries(client, url)
+        assert response.status_code == 200, response.content
+        counts.append(num_queries)
+    assert len(set(counts)) == 1, (
+        f'Количество запросов к `{url}` зависит от числа объектов: '
+        f'{dict(zip(batches, counts))}.'
+    )
+    return counts[0]
+
+
+def query_plan(sql, params=()):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [str(row[-1]) for row in cursor.fetchall()]
+
+
+def captured_query_plans(client, url, table):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    plans = [
+        query_plan(query['sql']) for query in context.captured_queries
+        if f'FROM "{table}"' in query['sql']
+    ]
+    return response, plans
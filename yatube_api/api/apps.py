@@ -7,3 +7,7 @@ class ApiConfig(AppConfig):
 
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        """Подключает обработчики сигналов."""
+        from api import signals  # noqa: F401
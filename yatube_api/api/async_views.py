@@ -0,0 +1,167 @@
+"""Асинхронный путь чтения API для ASGI.
+
+Django 3.2 под ASGI выполняет синхронные представления в одном общем
+потоке, поэтому медленные запросы обслуживаются по очереди, а ORM не
+умеет работать в цикле событий. Здесь представления DRF оборачиваются
+в асинхронные: безопасные запросы выполняются в ограниченном пуле
+потоков, а остальные — как обычно, в общем потоке Django, кроме
+представлений с атрибутом `async_read_pool = True`, которые подолгу
+ждут не БД, а другой ресурс (например, проверку пароля в пуле
+процессов) и не должны занимать общий поток. Соединения с БД потоков
+пула освобождаются после каждого запроса, как по сигналу
+request_finished. Потоковые ответы перебираются тоже в пуле и отдаются
+обработчиком из yatube_api.asgi по частям, не собираясь в памяти.
+"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from threading import Event, Lock, Semaphore
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.urls import URLPattern, URLResolver
+from rest_framework.permissions import SAFE_METHODS
+
+ASYNC_DEFAULTS = {
+    'WORKERS': 16,
+    'STREAM_BUFFER': 4,
+}
+
+_executor = None
+_executor_lock = Lock()
+
+
+def get_async_settings():
+    """Возвращает настройки асинхронного пути чтения."""
+    return {**ASYNC_DEFAULTS, **getattr(settings, 'API_ASYNC', {})}
+
+
+def get_executor():
+    """Возвращает пул потоков чтения, создавая его при первом запросе."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=get_async_settings()['WORKERS'],
+                thread_name_prefix='api-read',
+            )
+        return _executor
+
+
+def call_view(view, request, args, kwargs):
+    """Вызывает представление и готовит ответ к отдаче из цикла событий.
+
+    Запросы к БД учитываются в метриках запроса, а ответ рендерится.
+    Потоковый ответ здесь не читается: его перебирает iterate_in_pool().
+    """
+    stats = getattr(request, 'performance_stats', None)
+    with ExitStack() as stack:
+        if stats is not None:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(stats.execute_wrapper)
+                )
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response = response.render()
+    return response
+
+
+def call_and_release(func, *args):
+    """Вызывает func и освобождает соединения потока с БД."""
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+async def run_in_pool(func, *args):
+    """Выполняет func в пуле потоков чтения с текущим контекстом."""
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        get_executor(),
+        functools.partial(context.run, call_and_release, func, *args)
+    )
+
+
+async def iterate_in_pool(response):
+    """Асинхронно перебирает синхронный потоковый ответ.
+
+    Django 3.2 перебирает потоковый ответ прямо в цикле событий, где
+    обращаться к БД нельзя. Здесь ответ целиком перебирается в одном
+    потоке пула: курсор queryset.iterator() принадлежит соединению этого
+    потока. Поток опережает клиента не больше чем на STREAM_BUFFER
+    частей, поэтому ответ не собирается в памяти, а при отключении
+    клиента перебор останавливается.
+    """
+    loop = asyncio.get_running_loop()
+    parts = asyncio.Queue()
+    slots = Semaphore(get_async_settings()['STREAM_BUFFER'])
+    stopped = Event()
+
+    def produce():
+        try:
+            for part in response:
+                slots.acquire()
+                if stopped.is_set():
+                    return
+                loop.call_soon_threadsafe(parts.put_nowait, part)
+        finally:
+            if not stopped.is_set():
+                loop.call_soon_threadsafe(parts.put_nowait, None)
+
+    producer = asyncio.ensure_future(run_in_pool(produce))
+    try:
+        while True:
+            part = await parts.get()
+            if part is None:
+                break
+            slots.release()
+            yield part
+        await producer
+    finally:
+        stopped.set()
+        slots.release()
+        await asyncio.gather(producer, return_exceptions=True)
+
+
+def async_view(view):
+    """Оборачивает синхронное представление в асинхронное."""
+    pooled = getattr(getattr(view, 'cls', None), 'async_read_pool', False)
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS and not pooled:
+            return await sync_to_async(call_view, thread_sensitive=True)(
+                view, request, args, kwargs
+            )
+        return await run_in_pool(call_view, view, request, args, kwargs)
+
+    return wrapper
+
+
+def async_patterns(patterns):
+    """Возвращает копию URL-шаблонов с асинхронными представлениями DRF.
+
+    Представления DRF отличаются по атрибуту `cls`, который задаёт
+    as_view(); остальные, например админка, остаются синхронными.
+    Вложенные include() обходятся рекурсивно.
+    """
+    result = []
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            result.append(URLResolver(
+                pattern.pattern, async_patterns(pattern.url_patterns),
+                pattern.default_kwargs, pattern.app_name, pattern.namespace,
+            ))
+        elif hasattr(pattern.callback, 'cls'):
+            result.append(URLPattern(
+                pattern.pattern, async_view(pattern.callback),
+                pattern.default_args, pattern.name,
+            ))
+        else:
+            result.append(pattern)
+    return result
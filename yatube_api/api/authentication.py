@@ -0,0 +1,174 @@
+"""Модуль классов аутентификации для API."""
+import copy
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import caches
+from rest_framework import exceptions
+from rest_framework.authentication import (BaseAuthentication,
+                                           TokenAuthentication,
+                                           get_authorization_header)
+
+from api import tokens
+from api.cache import LRUCache
+
+TOKEN_CACHE_DEFAULTS = {
+    'MAX_SIZE': 10000,
+    'TIMEOUT': 300,
+    'LOCAL_TIMEOUT': 5,
+    'CACHE_ALIAS': None,
+}
+TOKEN_CACHE_KEY = 'api:auth-token:{}'
+
+
+def get_token_cache_settings():
+    """Возвращает настройки кеша токенов с учётом значений по умолчанию."""
+    return {**TOKEN_CACHE_DEFAULTS,
+            **getattr(settings, 'TOKEN_AUTH_CACHE', {})}
+
+
+class TokenCache:
+    """Двухуровневый кеш токенов: LRU в процессе и кеш Django.
+
+    Второй уровень используется, только если в настройках задан
+    `TOKEN_AUTH_CACHE['CACHE_ALIAS']`. Сигналы очищают локальный
+    уровень только в своём процессе, поэтому его записи живут
+    LOCAL_TIMEOUT секунд: удалённый токен или отключённый пользователь
+    в других процессах перестают проходить аутентификацию не позже
+    этого срока. Записи локального уровня отдаются копиями, чтобы
+    потоки не делили один объект пользователя.
+    """
+
+    def __init__(self):
+        options = get_token_cache_settings()
+        self.timeout = options['TIMEOUT']
+        self.local = LRUCache(options['MAX_SIZE'], options['LOCAL_TIMEOUT'])
+        self.alias = options['CACHE_ALIAS']
+
+    @property
+    def shared(self):
+        """Возвращает общий кеш Django или None."""
+        return caches[self.alias] if self.alias else None
+
+    def get(self, key):
+        """Возвращает пару (user, token) из кеша или None."""
+        entry = self.local.get(key)
+        if entry is not None:
+            return tuple(copy.copy(item) for item in entry)
+        if self.shared is not None:
+            entry = self.shared.get(TOKEN_CACHE_KEY.format(key))
+            if entry is not None:
+                self.local.set(key, entry)
+        return entry
+
+    def set(self, key, entry):
+        """Сохраняет пару (user, token) в кеш."""
+        self.local.set(key, entry)
+        if self.shared is not None:
+            self.shared.set(TOKEN_CACHE_KEY.format(key), entry, self.timeout)
+
+    def delete(self, *keys):
+        """Удаляет токены из кеша."""
+        for key in keys:
+            self.local.delete(key)
+        if keys and self.shared is not None:
+            self.shared.delete_many(
+                [TOKEN_CACHE_KEY.format(key) for key in keys]
+            )
+
+    def delete_user(self, user_id):
+        """Удаляет из кеша все токены пользователя."""
+        self.local.delete_where(lambda entry: entry[0].pk == user_id)
+        if self.shared is not None:
+            from rest_framework.authtoken.models import Token
+            self.delete(*Token.objects.filter(
+                user_id=user_id).values_list('key', flat=True))
+
+    def clear(self):
+        """Очищает локальный уровень кеша."""
+        self.local.clear()
+
+
+token_cache = TokenCache()
+user_cache = LRUCache(get_token_cache_settings()['MAX_SIZE'],
+                      get_token_cache_settings()['LOCAL_TIMEOUT'])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Аутентификация по токену с кешированием пользователя.
+
+    При попадании в кеш запрос проходит аутентификацию без обращения
+    к БД. Записи удаляются сигналами при удалении или замене токена и
+    при изменении пользователя, а также устаревают по таймауту.
+    """
+
+    def authenticate_credentials(self, key):
+        """Возвращает пару (user, token) из кеша или из БД."""
+        entry = token_cache.get(key)
+        if entry is None:
+            entry = super().authenticate_credentials(key)
+            token_cache.set(key, entry)
+        return entry
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """Аутентификация по подписанному токену из api.tokens.
+
+    Заголовок: `Authorization: Bearer <токен>`. Подпись, срок действия
+    и отзыв токена проверяются без обращения к БД, а пользователь
+    берётся из кеша процесса, который сбрасывается сигналами при
+    изменении пользователя.
+    """
+
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        """Возвращает пару (user, SignedToken) или None без заголовка."""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(
+                'Некорректный заголовок Authorization.'
+            )
+        try:
+            value = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(
+                'Некорректный заголовок Authorization.'
+            )
+        return self.authenticate_credentials(value)
+
+    def authenticate_credentials(self, value):
+        """Проверяет токен и находит его пользователя."""
+        try:
+            token = tokens.parse(value)
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed(
+                'Срок действия токена истёк.'
+            )
+        except signing.BadSignature:
+            raise exceptions.AuthenticationFailed('Недействительный токен.')
+        if token.jti in tokens.revocations:
+            raise exceptions.AuthenticationFailed('Токен отозван.')
+        user = self.get_user(token.user_id)
+        if (user is None or not user.is_active
+                or tokens.password_fingerprint(user) != token.fingerprint):
+            raise exceptions.AuthenticationFailed('Недействительный токен.')
+        return user, token
+
+    @staticmethod
+    def get_user(user_id):
+        """Возвращает пользователя из кеша процесса или из БД."""
+        user = user_cache.get(user_id)
+        if user is not None:
+            return copy.copy(user)
+        user = get_user_model()._default_manager.filter(pk=user_id).first()
+        if user is not None:
+            user_cache.set(user_id, user)
+        return user
+
+    def authenticate_header(self, request):
+        """Возвращает значение заголовка WWW-Authenticate."""
+        return self.keyword
@@ -0,0 +1,57 @@
+"""Модуль простых кешей в памяти процесса."""
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class LRUCache:
+    """Потокобезопасный LRU-кеш с ограничением размера и временем жизни."""
+
+    def __init__(self, max_size=1024, timeout=None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        """Возвращает значение по ключу и отмечает его как свежее."""
+        with self._lock:
+            try:
+                value, expires = self._data[key]
+            except KeyError:
+                return default
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Сохраняет значение, вытесняя самые давние записи."""
+        expires = (None if self.timeout is None
+                   else time.monotonic() + self.timeout)
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Удаляет значение по ключу, если оно есть."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate):
+        """Удаляет все значения, для которых predicate(value) истинно."""
+        with self._lock:
+            for key in [key for key, (value, _) in self._data.items()
+                        if predicate(value)]:
+                del self._data[key]
+
+    def clear(self):
+        """Очищает кеш."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,97 @@
+"""Модуль версий данных и кеша ответов API.
+
+Каждая область данных (список постов, пост, комментарии к посту,
+группы) имеет версию — время последнего изменения. Версии увеличиваются
+сигналами при сохранении и удалении объектов, а из версий строятся ETag
+и ключи кеша ответов. Поэтому устаревшие записи кеша не нужно удалять:
+после изменения данных их ключи просто больше не используются.
+Last-Modified не отдаётся: у HTTP-даты точность в секунду, и два
+изменения в пределах секунды дали бы одну дату.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+RESPONSE_CACHE_DEFAULTS = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+VERSION_KEY = 'api:version:{}'
+RESPONSE_KEY = 'api:response:{}'
+POSTS_SCOPE = 'posts'
+GROUPS_SCOPE = 'groups'
+GLOBAL_SCOPE = 'global'
+
+
+def post_scope(post_id):
+    """Возвращает область данных одного поста."""
+    return f'post:{post_id}'
+
+
+def comments_scope(post_id):
+    """Возвращает область данных комментариев к посту."""
+    return f'comments:{post_id}'
+
+
+def get_response_cache_settings():
+    """Возвращает настройки кеша ответов с учётом значений по умолчанию."""
+    return {**RESPONSE_CACHE_DEFAULTS,
+            **getattr(settings, 'API_RESPONSE_CACHE', {})}
+
+
+def get_cache():
+    """Возвращает кеш Django, в котором хранятся версии и ответы."""
+    return caches[get_response_cache_settings()['CACHE_ALIAS']]
+
+
+def bump_versions(*scopes):
+    """Отмечает области данных как изменённые.
+
+    Версии обновляются сразу и ещё раз после фиксации транзакции: иначе
+    ответ, построенный по данным до фиксации, мог бы попасть в кеш под
+    уже новой версией.
+    """
+    def bump():
+        now = time.time()
+        get_cache().set_many(
+            {VERSION_KEY.format(scope): now for scope in scopes},
+            timeout=None
+        )
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def get_versions(scopes):
+    """Возвращает версии областей, создавая отсутствующие."""
+    cache = get_cache()
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = {key: time.time() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def make_etag(versions, *parts):
+    """Строит ETag из версий областей и параметров запроса."""
+    source = ':'.join([*(repr(version) for version in versions), *parts])
+    return '"{}"'.format(hashlib.md5(source.encode()).hexdigest())
+
+
+def get_cached_data(etag):
+    """Возвращает закешированные данные ответа для ETag."""
+    return get_cache().get(RESPONSE_KEY.format(etag))
+
+
+def set_cached_data(etag, data):
+    """Сохраняет данные ответа для ETag."""
+    get_cache().set(
+        RESPONSE_KEY.format(etag), data,
+        get_response_cache_settings()['TIMEOUT']
+    )
@@ -0,0 +1,133 @@
+"""Модуль журнала изменений для инкрементальной синхронизации клиентов.
+
+Сигналы добавляют в журнал (модель Change) запись о каждом создании,
+изменении и удалении поста, комментария и группы. В одной транзакции
+с изменением запись оказывается, только если изменение выполняется в
+транзакции: так работают представления API (AtomicWriteMixin и
+массовые операции), админка и удаление объектов. При сохранении вне
+транзакции, в режиме autocommit, запись фиксируется отдельно сразу
+после изменения. Клиент запоминает курсор — номер последней
+прочитанной записи — и получает изменения после него пачками: по
+несколько записей об одном объекте остаётся одна, а изменённые объекты
+читаются по первичному ключу одним запросом на тип. Поэтому стоимость
+синхронизации зависит от числа изменений, а не от объёма данных.
+
+Курсор монотонен, пока записи фиксируются в порядке их номеров. SQLite
+допускает одну пишущую транзакцию за раз, поэтому это так; для БД с
+параллельной записью курсор может пропустить запись, зафиксированную
+позже записи с большим номером.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+
+from api.fast_serializers import get_reader
+from api.models import Change
+from api.querysets import optimize_queryset
+from api.serializers import (CommentSerializer, GroupSerializer,
+                             PostSerializer)
+from posts.deletion import finish_post_deletion, get_post_deletion
+from posts.models import Comment, Group, Post
+
+CHANGES_DEFAULTS = {
+    'BATCH_SIZE': 500,
+}
+INVALID_CURSOR_MESSAGE = 'Курсор должен быть неотрицательным целым числом.'
+# Тип записи -> ключ ответа, модель и сериализатор объектов.
+SECTIONS = {
+    Change.Kind.POST: ('posts', Post, PostSerializer),
+    Change.Kind.COMMENT: ('comments', Comment, CommentSerializer),
+    Change.Kind.GROUP: ('groups', Group, GroupSerializer),
+}
+KINDS = {model: kind for kind, (_, model, _) in SECTIONS.items()}
+
+
+def get_changes_settings():
+    """Возвращает настройки журнала изменений."""
+    return {**CHANGES_DEFAULTS, **getattr(settings, 'API_CHANGES', {})}
+
+
+def change(model, object_id, deleted=False):
+    """Возвращает запись журнала об объекте модели."""
+    return Change(kind=KINDS[model], object_id=object_id, deleted=deleted)
+
+
+def record(*entries):
+    """Добавляет записи в журнал одним запросом."""
+    Change.objects.bulk_create(entries)
+
+
+def defer_comment_deletion(post_id, comment_id, using):
+    """Откладывает запись об удалении комментария, если пост удаляется.
+
+    Комментарии удаляются каскадом до поста, и записи о них добавляются
+    в журнал одним запросом вместе с записью о посте.
+    """
+    deletion = get_post_deletion(post_id, using)
+    if deletion is None:
+        return False
+    deletion.comments.append(comment_id)
+    return True
+
+
+def record_post_deletion(post_id, using):
+    """Записывает удаление поста и отложенные удаления его комментариев."""
+    deletion = finish_post_deletion(post_id, using)
+    comments = deletion.comments if deletion is not None else []
+    record(*(change(Comment, pk, deleted=True) for pk in comments),
+           change(Post, post_id, deleted=True))
+
+
+def parse_cursor(value, name='since'):
+    """Разбирает курсор из параметра запроса."""
+    if not (value.isascii() and value.isdigit()):
+        raise ValidationError({name: [INVALID_CURSOR_MESSAGE]})
+    return int(value)
+
+
+def latest_cursor():
+    """Возвращает курсор последней записи журнала."""
+    last = Change.objects.order_by('-id').values_list('id', flat=True)
+    return last.first() or 0
+
+
+def serialize(serializer_class, queryset, context):
+    """Сериализует объекты queryset быстрым или обычным путём."""
+    queryset = optimize_queryset(queryset, serializer_class).order_by('pk')
+    reader = get_reader(serializer_class)
+    if reader is not None:
+        return reader.read(queryset, context)
+    return serializer_class(queryset, many=True, context=context).data
+
+
+def read_changes(since, limit, context=None):
+    """Возвращает изменения после курсора since.
+
+    Объекты, удалённые после записи в пачке, попадают в `deleted`
+    сразу, не дожидаясь своей записи об удалении.
+    """
+    rows = list(
+        Change.objects.filter(id__gt=since).order_by('id')
+        .values_list('id', 'kind', 'object_id', 'deleted')[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    latest = {}
+    for _, kind, object_id, deleted in rows:
+        latest[kind, object_id] = deleted
+    data = {'cursor': str(rows[-1][0] if rows else since),
+            'has_more': has_more}
+    removed = {}
+    for kind, (key, model, serializer_class) in SECTIONS.items():
+        changed = sorted(object_id for (row_kind, object_id), deleted
+                         in latest.items() if row_kind == kind and not deleted)
+        objects = serialize(
+            serializer_class, model.objects.filter(pk__in=changed), context
+        ) if changed else []
+        found = {item['id'] for item in objects}
+        data[key] = objects
+        removed[key] = sorted(
+            object_id for (row_kind, object_id), deleted in latest.items()
+            if row_kind == kind and (deleted or object_id not in found)
+        )
+    data['deleted'] = removed
+    return data
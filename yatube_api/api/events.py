@@ -0,0 +1,237 @@
+"""Модуль публикации событий и потоков server-sent events.
+
+Код, который меняет данные, публикует сообщения в каналы брокера из
+любого потока, а потоки SSE под ASGI подписываются на каналы в цикле
+событий. Брокер выбирается настройкой API_EVENTS['BROKER']: локальный
+LocalBroker доставляет сообщения только внутри процесса, поэтому при
+нескольких процессах нужен брокер поверх общего сервиса (например,
+Redis pub/sub) с тем же интерфейсом.
+"""
+import asyncio
+import json
+from threading import Lock
+
+from django.conf import settings
+from django.http.response import HttpResponseBase
+from django.utils.module_loading import import_string
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+EVENTS_DEFAULTS = {
+    'BROKER': 'api.events.LocalBroker',
+    'QUEUE_SIZE': 100,
+    'HEARTBEAT': 15,
+    'RETRY': 3000,
+}
+HEARTBEAT_EVENT = b': ping\n\n'
+
+_brokers = {}
+_brokers_lock = Lock()
+
+
+def get_events_settings():
+    """Возвращает настройки событий."""
+    return {**EVENTS_DEFAULTS, **getattr(settings, 'API_EVENTS', {})}
+
+
+def get_broker():
+    """Возвращает брокер из настроек, создавая его при первом обращении."""
+    options = get_events_settings()
+    key = (options['BROKER'], options['QUEUE_SIZE'])
+    with _brokers_lock:
+        if key not in _brokers:
+            _brokers[key] = import_string(options['BROKER'])(
+                queue_size=options['QUEUE_SIZE']
+            )
+        return _brokers[key]
+
+
+class BaseBroker:
+    """Интерфейс брокера сообщений.
+
+    publish() вызывается из синхронного кода в любом потоке. subscribe()
+    вызывается в цикле событий и возвращает подписку — контекстный
+    менеджер с корутиной get(), которая отдаёт сообщения канала,
+    опубликованные после подписки, или None, если подписка отстала и
+    закрыта брокером.
+    """
+
+    def __init__(self, queue_size):
+        self.queue_size = queue_size
+
+    def publish(self, channel, message):
+        """Отправляет сообщение подписчикам канала."""
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        """Возвращает подписку на канал."""
+        raise NotImplementedError
+
+
+class LocalSubscription:
+    """Подписка на канал LocalBroker в цикле событий.
+
+    Сообщения складываются в очередь из QUEUE_SIZE элементов. Если
+    подписчик не успевает их забирать, подписка закрывается, а не
+    задерживает публикацию и не растёт без ограничений.
+    """
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=broker.queue_size)
+        self.overflowed = False
+
+    def deliver(self, message):
+        """Передаёт сообщение в цикл событий подписчика."""
+        try:
+            self.loop.call_soon_threadsafe(self.put, message)
+        except RuntimeError:
+            # Цикл событий подписчика уже закрыт.
+            self.close()
+
+    def put(self, message):
+        """Кладёт сообщение в очередь или закрывает отставшую подписку."""
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self.close()
+
+    async def get(self):
+        """Возвращает следующее сообщение или None после переполнения."""
+        if self.overflowed:
+            return None
+        return await self.queue.get()
+
+    def close(self):
+        """Отписывается от канала."""
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class LocalBroker(BaseBroker):
+    """Брокер в памяти процесса."""
+
+    def __init__(self, queue_size):
+        super().__init__(queue_size)
+        self.lock = Lock()
+        self.channels = {}
+
+    def publish(self, channel, message):
+        """Отправляет сообщение подписчикам канала."""
+        with self.lock:
+            subscriptions = list(self.channels.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.deliver(message)
+
+    def subscribe(self, channel):
+        """Возвращает подписку на канал."""
+        subscription = LocalSubscription(self, channel)
+        with self.lock:
+            self.channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Удаляет подписку из канала."""
+        with self.lock:
+            subscriptions = self.channels.get(subscription.channel, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.channels.pop(subscription.channel, None)
+
+    def subscribers(self, channel):
+        """Возвращает число подписчиков канала."""
+        with self.lock:
+            return len(self.channels.get(channel, ()))
+
+
+def format_event(data, event=None, event_id=None):
+    """Кодирует событие в формат text/event-stream."""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event is not None:
+        lines.append(f'event: {event}')
+    lines.extend(f'data: {line}' for line in data.split('\n'))
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Рендерер text/event-stream для согласования формата в DRF.
+
+    Сами события отдаёт EventStreamResponse; через рендерер проходят
+    только данные обычных ответов, например ошибок, — одним событием
+    `error`.
+    """
+
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Кодирует данные ответа в событие `error`."""
+        if data is None:
+            return b''
+        return format_event(
+            json.dumps(data, cls=JSONEncoder, ensure_ascii=False), 'error'
+        )
+
+
+class EventStreamResponse(HttpResponseBase):
+    """Ответ text/event-stream с асинхронным итератором событий.
+
+    Django 3.2 перебирает потоковые ответы синхронно, поэтому такой
+    ответ отдаёт обработчик из yatube_api.asgi через send_event_stream().
+    """
+
+    streaming = True
+    is_async = True
+
+    def __init__(self, events, *args, **kwargs):
+        kwargs.setdefault('content_type', 'text/event-stream')
+        super().__init__(*args, **kwargs)
+        self.events = events
+        self['Cache-Control'] = 'no-cache'
+        self['X-Accel-Buffering'] = 'no'
+
+    def __iter__(self):
+        raise TypeError('Поток событий отдаётся только под ASGI.')
+
+
+async def wait_disconnect(receive):
+    """Ждёт, пока клиент закроет соединение."""
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def send_event_stream(response, send, receive):
+    """Отправляет события ответа, пока поток не кончится или клиент не уйдёт.
+
+    При отключении клиента генератор событий отменяется, и его блоки
+    finally освобождают подписки.
+    """
+
+    async def pump():
+        async for chunk in response.events:
+            await send({'type': 'http.response.body', 'body': chunk,
+                        'more_body': True})
+        await send({'type': 'http.response.body'})
+
+    tasks = {asyncio.ensure_future(pump()),
+             asyncio.ensure_future(wait_disconnect(receive))}
+    try:
+        done, _ = await asyncio.wait(
+            tasks, return_when=asyncio.FIRST_COMPLETED
+        )
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    for task in done:
+        task.result()
@@ -0,0 +1,140 @@
+"""Модуль быстрой сериализации для чтения списков.
+
+Строки читаются через values_list() и сразу собираются в словари той же
+формы, что отдают обычные сериализаторы, без создания экземпляров
+моделей и без обхода полей DRF для каждого объекта.
+"""
+from functools import lru_cache
+
+from rest_framework import serializers
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from api.serializers import ImageVariantsField
+
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+)
+UNSUPPORTED_FIELDS = (
+    serializers.BaseSerializer,
+    serializers.ManyRelatedField,
+    serializers.SerializerMethodField,
+)
+
+
+class UnsupportedField(Exception):
+    """Поле сериализатора нельзя вычислить по значению из values_list()."""
+
+
+class ValuesReader:
+    """Читает строки queryset в словари формы заданного сериализатора."""
+
+    def __init__(self, serializer_class):
+        serializer = serializer_class()
+        self.model = serializer.Meta.model
+        self.keys = []
+        self.lookups = []
+        self.converters = []
+        for index, (name, field) in enumerate(
+            (name, field) for name, field in serializer.fields.items()
+            if not field.write_only
+        ):
+            lookup, converter = self.compile_field(field)
+            self.keys.append(name)
+            self.lookups.append(lookup)
+            if converter is not None:
+                self.converters.append((index, converter))
+
+    def compile_field(self, field):
+        """Возвращает путь поля для values_list() и функцию преобразования."""
+        if (field.source == '*' or '.' in field.source
+                or isinstance(field, UNSUPPORTED_FIELDS)):
+            raise UnsupportedField(field.field_name)
+        if isinstance(field, serializers.SlugRelatedField):
+            return f'{field.source}__{field.slug_field}', None
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            if field.pk_field is not None:
+                raise UnsupportedField(field.field_name)
+            return field.source, None
+        if isinstance(field, serializers.RelatedField):
+            raise UnsupportedField(field.field_name)
+        if isinstance(field, ImageVariantsField):
+            return field.source, field.represent
+        if isinstance(field, serializers.FileField):
+            return field.source, self.file_converter(field)
+        if isinstance(field, IDENTITY_FIELDS):
+            return field.source, None
+        return field.source, self.field_converter(field)
+
+    @staticmethod
+    def field_converter(field):
+        """Преобразует значение методом to_representation поля DRF."""
+        def convert(value, request):
+            return None if value is None else field.to_representation(value)
+        return convert
+
+    def file_converter(self, field):
+        """Преобразует имя файла в URL так же, как FileField из DRF."""
+        storage = self.model._meta.get_field(field.source).storage
+        use_url = getattr(field, 'use_url', True)
+
+        def convert(value, request):
+            if not value:
+                return None
+            if not use_url:
+                return value
+            url = storage.url(value)
+            if request is not None:
+                return request.build_absolute_uri(url)
+            return url
+        return convert
+
+    def iter_rows(self, queryset, context=None, chunk_size=None):
+        """Генерирует словари для строк queryset."""
+        request = (context or {}).get('request')
+        rows = queryset.values_list(*self.lookups)
+        if chunk_size:
+            rows = rows.iterator(chunk_size=chunk_size)
+        keys = self.keys
+        converters = self.converters
+        for row in rows:
+            if converters:
+                row = list(row)
+                for index, convert in converters:
+                    row[index] = convert(row[index], request)
+            yield dict(zip(keys, row))
+
+    def read(self, queryset, context=None):
+        """Возвращает список словарей для всех строк queryset."""
+        return list(self.iter_rows(queryset, context))
+
+
+@lru_cache(maxsize=None)
+def get_reader(serializer_class):
+    """Возвращает ValuesReader для сериализатора или None.
+
+    None означает, что у сериализатора есть поля, которые нельзя
+    вычислить без экземпляра модели, и нужен обычный путь.
+    """
+    try:
+        return ValuesReader(serializer_class)
+    except UnsupportedField:
+        return None
+
+
+class FastListSerializer:
+    """Замена ListSerializer для чтения queryset через ValuesReader."""
+
+    def __init__(self, reader, queryset, context=None):
+        self.reader = reader
+        self.queryset = queryset
+        self.context = context or {}
+
+    @property
+    def data(self):
+        """Возвращает данные в том же виде, что и ListSerializer."""
+        return ReturnList(
+            self.reader.read(self.queryset, self.context), serializer=self
+        )
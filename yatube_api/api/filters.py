@@ -0,0 +1,116 @@
+"""Модуль фильтров списков API."""
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+from posts.search import search_posts
+
+INVALID_DATE_MESSAGE = (
+    'Неверный формат даты. Используйте YYYY-MM-DD или ISO 8601.'
+)
+
+
+class PostSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск постов по параметру `?search=`.
+
+    Без пагинации и с `?limit=`/`?offset=` результаты отсортированы по
+    релевантности, если не задан `?ordering=`; курсорная пагинация
+    сохраняет свой порядок по ключу.
+    """
+
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        """Оставляет посты, найденные по поисковой строке."""
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return search_posts(queryset, query)
+
+
+class PostFilter(BaseFilterBackend):
+    """Фильтрация постов по группе, автору и дате публикации.
+
+    `?group=<slug>`, `?author=<username>`, `?since=` и `?until=` задают
+    полуинтервал дат [since, until). Каждое условие обслуживается
+    индексом: по группе и автору — составными индексами
+    (group_id, pub_date) и (author_id, pub_date), по дате — индексом
+    (pub_date, id).
+    """
+
+    lookups = {
+        'group': 'group__slug',
+        'author': 'author__username',
+    }
+    date_lookups = {
+        'since': 'pub_date__gte',
+        'until': 'pub_date__lt',
+    }
+
+    @staticmethod
+    def parse_date(name, value):
+        """Разбирает дату или дату со временем в текущем часовом поясе.
+
+        Дата без времени означает начало суток, поэтому `?until=` с
+        датой исключает сами эти сутки, а `?since=` — включает.
+        """
+        try:
+            parsed = parse_datetime(value)
+            if parsed is None:
+                day = parse_date(value)
+                if day is not None:
+                    parsed = datetime.combine(day, time.min)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError({name: [INVALID_DATE_MESSAGE]})
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    def filter_queryset(self, request, queryset, view):
+        """Применяет условия из параметров запроса."""
+        params = request.query_params
+        conditions = {
+            lookup: params[name]
+            for name, lookup in self.lookups.items() if params.get(name)
+        }
+        conditions.update({
+            lookup: self.parse_date(name, params[name])
+            for name, lookup in self.date_lookups.items() if params.get(name)
+        })
+        if not conditions:
+            return queryset
+        return queryset.filter(**conditions)
+
+
+class KeysetOrderingFilter(OrderingFilter):
+    """Сортировка `?ordering=` с уникальным ключом в конце.
+
+    К порядку добавляется `id` в направлении последнего поля, чтобы
+    порядок был однозначным и годился для курсорной пагинации.
+    Поля, по которым разрешена сортировка, задаются в `ordering_fields`
+    вьюсета и должны быть покрыты индексами.
+    """
+
+    unique_field = 'id'
+
+    def get_ordering(self, request, queryset, view):
+        """Возвращает порядок из запроса, дополненный полем id."""
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        terms, seen = [], set()
+        for term in ordering:
+            name = term.lstrip('-')
+            if name in seen:
+                continue
+            seen.add(name)
+            terms.append(term)
+            if name == self.unique_field:
+                return tuple(terms)
+        prefix = '-' if terms[-1].startswith('-') else ''
+        return (*terms, f'{prefix}{self.unique_field}')
@@ -0,0 +1,241 @@
+"""Модуль сбора метрик производительности запросов.
+
+Метрики собираются middleware по каждому запросу и агрегируются в памяти
+процесса по имени представления (`posts-list`, `comments-detail` и т.д.).
+"""
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass, field
+from threading import Lock
+
+from django.conf import settings
+
+PERFORMANCE_DEFAULTS = {
+    'ENABLED': False,
+    'SERVER_TIMING': True,
+}
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+UNRESOLVED_VIEW = '<unresolved>'
+
+
+def get_performance_settings():
+    """Возвращает настройки сбора метрик."""
+    return {**PERFORMANCE_DEFAULTS,
+            **getattr(settings, 'API_PERFORMANCE', {})}
+
+
+@dataclass
+class RequestStats:
+    """Метрики одного запроса."""
+
+    started: float = field(default_factory=time.perf_counter)
+    view_started: float = None
+    view_finished: float = None
+    finished: float = None
+    db_queries: int = 0
+    db_time: float = 0.0
+    view_db_time: float = 0.0
+    render_time: float = 0.0
+    response_size: int = 0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """Обёртка connection.execute_wrapper, считающая запросы к БД."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_time += time.perf_counter() - start
+
+    @property
+    def total_time(self):
+        """Полное время обработки запроса."""
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def serialize_time(self):
+        """Время представления без запросов к БД плюс рендеринг ответа.
+
+        На эндпоинтах чтения это в основном сериализация объектов.
+        """
+        if self.view_started is None or self.view_finished is None:
+            return self.render_time
+        view_time = self.view_finished - self.view_started
+        return max(view_time - self.view_db_time, 0.0) + self.render_time
+
+    def server_timing(self):
+        """Возвращает значение заголовка Server-Timing."""
+        return ', '.join((
+            f'db;dur={self.db_time * 1000:.2f};'
+            f'desc="{self.db_queries} queries"',
+            f'serialize;dur={self.serialize_time * 1000:.2f}',
+            f'total;dur={self.total_time * 1000:.2f}',
+        ))
+
+
+class ViewMetrics:
+    """Агрегированные метрики одного представления."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.response_bytes = 0
+        self.buckets = [0] * (len(DURATION_BUCKETS) + 1)
+
+    def add(self, stats):
+        """Добавляет метрики запроса."""
+        total = stats.total_time
+        self.count += 1
+        self.duration += total
+        self.db_queries += stats.db_queries
+        self.db_time += stats.db_time
+        self.serialize_time += stats.serialize_time
+        self.response_bytes += stats.response_size
+        self.buckets[bisect_left(DURATION_BUCKETS, total)] += 1
+
+
+class MetricsRegistry:
+    """Потокобезопасный реестр метрик по представлениям."""
+
+    def __init__(self):
+        self._views = defaultdict(ViewMetrics)
+        self._lock = Lock()
+
+    def record(self, view_name, stats):
+        """Учитывает метрики завершённого запроса."""
+        with self._lock:
+            self._views[view_name].add(stats)
+
+    def snapshot(self):
+        """Возвращает копию накопленных метрик."""
+        with self._lock:
+            return {name: vars(metrics).copy()
+                    for name, metrics in self._views.items()}
+
+    def clear(self):
+        """Сбрасывает накопленные метрики."""
+        with self._lock:
+            self._views.clear()
+
+    def render_prometheus(self):
+        """Возвращает метрики в текстовом формате Prometheus."""
+        snapshot = self.snapshot()
+        lines = []
+
+        def family(name, kind, help_text, value_of):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for view, metrics in sorted(snapshot.items()):
+                lines.append(f'{name}{{view="{view}"}} {value_of(metrics)}')
+
+        family('yatube_requests_total', 'counter',
+               'Количество запросов.', lambda m: m['count'])
+        lines.append('# HELP yatube_request_duration_seconds '
+                     'Время обработки запроса.')
+        lines.append('# TYPE yatube_request_duration_seconds histogram')
+        for view, metrics in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, hits in zip(
+                (*DURATION_BUCKETS, '+Inf'), metrics['buckets']
+            ):
+                cumulative += hits
+                lines.append('yatube_request_duration_seconds_bucket'
+                             f'{{view="{view}",le="{bound}"}} {cumulative}')
+            lines.append('yatube_request_duration_seconds_sum'
+                         f'{{view="{view}"}} {metrics["duration"]}')
+            lines.append('yatube_request_duration_seconds_count'
+                         f'{{view="{view}"}} {metrics["count"]}')
+        family('yatube_db_queries_total', 'counter',
+               'Количество запросов к БД.', lambda m: m['db_queries'])
+        family('yatube_db_duration_seconds_total', 'counter',
+               'Время запросов к БД.', lambda m: m['db_time'])
+        family('yatube_serialize_duration_seconds_total', 'counter',
+               'Время сериализации и рендеринга ответа.',
+               lambda m: m['serialize_time'])
+        family('yatube_response_bytes_total', 'counter',
+               'Размер ответов в байтах.', lambda m: m['response_bytes'])
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class PasswordMetrics:
+    """Метрики проверки паролей при выдаче токенов.
+
+    Время проверки учитывается по алгоритму хешера; счётчики — входы,
+    подтверждённые кешем, присоединённые к уже идущей проверке того же
+    пароля и отклонённые из-за переполнения очереди.
+    """
+
+    COUNTERS = ('cache_hits', 'deduplicated', 'rejected')
+
+    def __init__(self):
+        self._hashes = defaultdict(
+            lambda: {'count': 0, 'duration': 0.0,
+                     'buckets': [0] * (len(DURATION_BUCKETS) + 1)}
+        )
+        self._counters = dict.fromkeys(self.COUNTERS, 0)
+        self._lock = Lock()
+
+    def record(self, algorithm, duration):
+        """Учитывает время одной проверки пароля."""
+        with self._lock:
+            metrics = self._hashes[algorithm]
+            metrics['count'] += 1
+            metrics['duration'] += duration
+            metrics['buckets'][bisect_left(DURATION_BUCKETS, duration)] += 1
+
+    def increment(self, counter):
+        """Увеличивает счётчик на единицу."""
+        with self._lock:
+            self._counters[counter] += 1
+
+    def snapshot(self):
+        """Возвращает копию накопленных метрик."""
+        with self._lock:
+            return {
+                'hashes': {
+                    algorithm: {**metrics, 'buckets': metrics['buckets'][:]}
+                    for algorithm, metrics in self._hashes.items()
+                },
+                **self._counters,
+            }
+
+    def clear(self):
+        """Сбрасывает накопленные метрики."""
+        with self._lock:
+            self._hashes.clear()
+            self._counters = dict.fromkeys(self.COUNTERS, 0)
+
+    def render_prometheus(self):
+        """Возвращает метрики в текстовом формате Prometheus."""
+        snapshot = self.snapshot()
+        lines = ['# HELP yatube_password_hash_duration_seconds '
+                 'Время проверки пароля.',
+                 '# TYPE yatube_password_hash_duration_seconds histogram']
+        for algorithm, metrics in sorted(snapshot['hashes'].items()):
+            label = f'algorithm="{algorithm}"'
+            cumulative = 0
+            for bound, hits in zip(
+                (*DURATION_BUCKETS, '+Inf'), metrics['buckets']
+            ):
+                cumulative += hits
+                lines.append('yatube_password_hash_duration_seconds_bucket'
+                             f'{{{label},le="{bound}"}} {cumulative}')
+            lines.append('yatube_password_hash_duration_seconds_sum'
+                         f'{{{label}}} {metrics["duration"]}')
+            lines.append('yatube_password_hash_duration_seconds_count'
+                         f'{{{label}}} {metrics["count"]}')
+        for counter in self.COUNTERS:
+            name = f'yatube_login_{counter}_total'
+            lines.append(f'# TYPE {name} counter')
+            lines.append(f'{name} {snapshot[counter]}')
+        return '\n'.join(lines) + '\n'
+
+
+password_metrics = PasswordMetrics()
@@ -0,0 +1,248 @@
+"""Модуль middleware приложения API."""
+import asyncio
+import time
+from contextlib import ExitStack
+from threading import BoundedSemaphore
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.db import connections
+from django.http import JsonResponse
+
+from api.instrumentation import (UNRESOLVED_VIEW, RequestStats,
+                                 get_performance_settings, registry)
+from api.throttling import LatencyMonitor, get_shedding_settings
+
+OVERLOADED_MESSAGE = 'Сервер перегружен, повторите запрос позже.'
+PERFORMANCE_MIDDLEWARE = 'api.middleware.PerformanceMiddleware'
+SHEDDING_MIDDLEWARE = 'api.middleware.LoadSheddingMiddleware'
+
+
+class PerformanceMiddleware:
+    """Собирает метрики времени, запросов к БД и размера ответа.
+
+    Метрики добавляются в заголовок Server-Timing и агрегируются по имени
+    представления для эндпоинта метрик. Если сбор выключен в настройках,
+    middleware не подключается вовсе и не влияет на обработку запросов.
+
+    Под ASGI запросы к БД выполняются в других потоках, поэтому их
+    учитывают асинхронные представления из api.async_views по
+    `request.performance_stats`.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        options = get_performance_settings()
+        if not options['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.server_timing = options['SERVER_TIMING']
+        if asyncio.iscoroutinefunction(get_response):
+            # Так Django отличает асинхронные middleware-классы.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        stats = RequestStats()
+        request.performance_stats = stats
+        with self.count_queries(stats):
+            response = self.get_response(request)
+        return self.process_stats(request, stats, response)
+
+    @staticmethod
+    def count_queries(stats):
+        """Возвращает блок, запросы к БД в котором учитываются в stats."""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(
+                connection.execute_wrapper(stats.execute_wrapper)
+            )
+        return stack
+
+    async def __acall__(self, request):
+        """Обрабатывает запрос в асинхронном режиме."""
+        stats = RequestStats()
+        request.performance_stats = stats
+        response = await self.get_response(request)
+        return self.process_stats(request, stats, response)
+
+    def process_stats(self, request, stats, response):
+        """Добавляет метрики в ответ и учитывает запрос."""
+        match = request.resolver_match
+        view_name = (match and (match.url_name or match.view_name)
+                     or UNRESOLVED_VIEW)
+        if self.server_timing:
+            response['Server-Timing'] = stats.server_timing()
+        if getattr(response, 'is_async', False):
+            # Асинхронный поток событий не ограничен по времени, поэтому
+            # учитывается только время до начала потока.
+            self.finish(stats, view_name)
+        elif response.streaming:
+            response.streaming_content = self.count_stream(
+                response.streaming_content, stats, view_name
+            )
+        else:
+            stats.response_size = len(response.content)
+            self.finish(stats, view_name)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Отмечает начало работы представления."""
+        stats = request.performance_stats
+        stats.view_started = time.perf_counter()
+        stats.view_db_time = stats.db_time
+
+    def process_template_response(self, request, response):
+        """Отмечает конец работы представления и замеряет рендеринг."""
+        stats = request.performance_stats
+        stats.view_finished = time.perf_counter()
+        stats.view_db_time = stats.db_time - stats.view_db_time
+        render_started = stats.view_finished
+
+        def measure_render(rendered):
+            stats.render_time = time.perf_counter() - render_started
+
+        response.add_post_render_callback(measure_render)
+        return response
+
+    @staticmethod
+    def finish(stats, view_name):
+        """Завершает замер и учитывает запрос в агрегированных метриках."""
+        stats.finished = time.perf_counter()
+        registry.record(view_name, stats)
+
+    def count_stream(self, content, stats, view_name):
+        """Считает размер потокового ответа и учитывает его по окончании.
+
+        Потоковый ответ читает БД уже после возврата из представления,
+        поэтому запросы учитываются и при получении каждой части.
+        """
+        content = iter(content)
+        try:
+            while True:
+                with self.count_queries(stats):
+                    chunk = next(content, None)
+                if chunk is None:
+                    break
+                stats.response_size += len(chunk)
+                yield chunk
+        finally:
+            self.finish(stats, view_name)
+
+
+class LoadSheddingMiddleware:
+    """Отвечает 503 до обработки запроса, если сервер перегружен.
+
+    Перегрузка — это MAX_IN_FLIGHT запросов в обработке одновременно
+    или медиана времени запроса к БД за последние LATENCY_WINDOW
+    запросов выше MAX_DB_LATENCY секунд. Время
+    запросов к БД берётся из метрик PerformanceMiddleware, поэтому
+    этот middleware подключается перед ним, а без него не запускается.
+    Запросы к EXEMPT_PATHS не сбрасываются.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        options = get_shedding_settings()
+        if not options['ENABLED']:
+            raise MiddlewareNotUsed
+        self.check_performance_stats()
+        self.get_response = get_response
+        self.slots = BoundedSemaphore(options['MAX_IN_FLIGHT'])
+        self.latency = LatencyMonitor(
+            options['MAX_DB_LATENCY'], options['PROBE_INTERVAL'],
+            options['LATENCY_WINDOW'], options['MIN_SAMPLES'],
+        )
+        self.retry_after = options['RETRY_AFTER']
+        self.exempt_paths = tuple(options['EXEMPT_PATHS'])
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if request.path.startswith(self.exempt_paths):
+            return self.get_response(request)
+        if not self.admit():
+            return self.overloaded()
+        try:
+            response = self.get_response(request)
+        finally:
+            self.slots.release()
+        return self.observe(request, response)
+
+    async def __acall__(self, request):
+        """Обрабатывает запрос в асинхронном режиме."""
+        if request.path.startswith(self.exempt_paths):
+            return await self.get_response(request)
+        if not self.admit():
+            return self.overloaded()
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.slots.release()
+        return self.observe(request, response)
+
+    @staticmethod
+    def check_performance_stats():
+        """Проверяет, что метрики PerformanceMiddleware собираются.
+
+        Без них задержка БД не измеряется, и сбрасывались бы только
+        запросы сверх MAX_IN_FLIGHT.
+        """
+        following = list(settings.MIDDLEWARE)
+        if SHEDDING_MIDDLEWARE in following:
+            following = following[following.index(SHEDDING_MIDDLEWARE):]
+        if (not get_performance_settings()['ENABLED']
+                or PERFORMANCE_MIDDLEWARE not in following):
+            raise ImproperlyConfigured(
+                'Сброс нагрузки требует сбора метрик: включите '
+                f'API_PERFORMANCE и подключите {PERFORMANCE_MIDDLEWARE} '
+                f'после {SHEDDING_MIDDLEWARE}.'
+            )
+
+    def admit(self):
+        """Занимает место для запроса, если сервер не перегружен."""
+        if self.latency.overloaded(time.monotonic()):
+            return False
+        return self.slots.acquire(blocking=False)
+
+    def observe(self, request, response):
+        """Учитывает время запросов к БД обработанного запроса.
+
+        Потоковый ответ учитывается, когда он отдан целиком: до этого
+        не все его запросы к БД выполнены.
+        """
+        stats = getattr(request, 'performance_stats', None)
+        if stats is None:
+            return response
+        if response.streaming and not getattr(response, 'is_async', False):
+            response.streaming_content = self.observe_stream(
+                response.streaming_content, stats
+            )
+        else:
+            self.observe_stats(stats)
+        return response
+
+    def observe_stream(self, content, stats):
+        """Отдаёт потоковый ответ и учитывает его запросы по окончании."""
+        try:
+            yield from content
+        finally:
+            self.observe_stats(stats)
+
+    def observe_stats(self, stats):
+        """Учитывает запросы к БД в задержке БД."""
+        self.latency.observe(stats.db_queries, stats.db_time,
+                             time.monotonic())
+
+    def overloaded(self):
+        """Возвращает ответ 503 с заголовком Retry-After."""
+        response = JsonResponse({'detail': OVERLOADED_MESSAGE}, status=503)
+        response['Retry-After'] = str(self.retry_after)
+        return response
@@ -0,0 +1,21 @@
+# Generated by Django 3.2 on 2026-10-18 19:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(max_length=32, unique=True, verbose_name='Идентификатор токена')),
+                ('expires', models.DateTimeField(db_index=True, verbose_name='Срок действия')),
+            ],
+        ),
+    ]
@@ -0,0 +1,463 @@
+"""Модуль миксинов для вьюсетов API."""
+from contextlib import ExitStack
+from itertools import islice
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.db.models import QuerySet, prefetch_related_objects
+from django.db.models.signals import post_save
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from api import caching
+from api.fast_serializers import FastListSerializer, get_reader
+from api.querysets import optimize_queryset
+from yatube_api.db import routers
+
+BULK_MAX_SIZE = 1000
+FIELDS_QUERY_PARAM = 'fields'
+EXPAND_QUERY_PARAM = 'expand'
+STREAM_QUERY_PARAM = 'stream'
+STREAM_CHUNK_SIZE = 2000
+TRUE_VALUES = ('1', 'true', 'yes')
+
+
+class ReplicaReadMixin:
+    """Читает из реплик в GET- и HEAD-запросах.
+
+    Аутентификация и проверка прав выполняются по основной базе, а
+    обработчик запроса — по реплике, если пользователь не закреплён за
+    основной базой. Успешный запрос на запись закрепляет пользователя,
+    чтобы он сразу видел свои изменения.
+    """
+
+    replica_methods = ('GET', 'HEAD')
+
+    def dispatch(self, request, *args, **kwargs):
+        """Обрабатывает запрос и закрепляет автора записи."""
+        self.replica_reads = ExitStack()
+        self.reading_replicas = False
+        with self.replica_reads:
+            response = super().dispatch(request, *args, **kwargs)
+        if self.reading_replicas and response.streaming:
+            response.streaming_content = self.stream_from_replicas(
+                response.streaming_content
+            )
+        if (self.request.method not in SAFE_METHODS
+                and response.status_code < 400
+                and self.request.user.is_authenticated):
+            routers.pin_to_primary(self.request.user.pk)
+        return response
+
+    def initial(self, request, *args, **kwargs):
+        """Переключает чтение на реплики после проверки прав."""
+        super().initial(request, *args, **kwargs)
+        if (request.method in self.replica_methods
+                and routers.can_read_from_replicas(request.user.pk)):
+            self.replica_reads.enter_context(routers.replica_reads())
+            self.reading_replicas = True
+
+    @staticmethod
+    def stream_from_replicas(content):
+        """Отдаёт потоковый ответ, читая каждую его часть из реплик."""
+        content = iter(content)
+        while True:
+            with routers.replica_reads():
+                chunk = next(content, None)
+            if chunk is None:
+                return
+            yield chunk
+
+
+class OptimizedQuerySetMixin:
+    """Выбирает из БД только то, что нужно сериализатору.
+
+    Связанные объекты подтягиваются одним запросом, поэтому число
+    запросов на список не зависит от количества объектов.
+    """
+
+    def get_queryset(self):
+        """Возвращает queryset с применённым планом выборки."""
+        return optimize_queryset(
+            super().get_queryset(), self.get_serializer_class()
+        )
+
+
+class SparseFieldsMixin:
+    """Проекция ответа по параметрам `?fields=` и `?expand=`.
+
+    `?fields=id,text` оставляет в ответе только перечисленные поля, и
+    OptimizedQuerySetMixin выбирает из БД только их колонки.
+    `?expand=group,comments` встраивает связанные объекты; они читаются
+    через select_related и prefetch_related, так что число запросов не
+    зависит от числа объектов. Параметры действуют только на чтение.
+    """
+
+    fields_query_param = FIELDS_QUERY_PARAM
+    expand_query_param = EXPAND_QUERY_PARAM
+
+    def get_query_names(self, param):
+        """Возвращает имена из параметра через запятую или None."""
+        value = self.request.query_params.get(param)
+        if value is None:
+            return None
+        return [name for name in map(str.strip, value.split(',')) if name]
+
+    def get_serializer_class(self):
+        """Возвращает проекцию сериализатора, если её запросили."""
+        serializer_class = super().get_serializer_class()
+        if (getattr(self, 'request', None) is None
+                or self.request.method not in SAFE_METHODS
+                or not hasattr(serializer_class, 'project')):
+            return serializer_class
+        fields = self.get_query_names(self.fields_query_param)
+        expand = self.get_query_names(self.expand_query_param)
+        if fields is None and not expand:
+            return serializer_class
+        return serializer_class.project(fields, expand or ())
+
+
+class StreamingListMixin:
+    """Отдаёт список потоком JSON по параметру `?stream=true`.
+
+    Объекты читаются из БД порциями через iterator() и сразу
+    сериализуются, так что в памяти не собирается ни полный список
+    объектов, ни весь ответ целиком. iterator() не выполняет
+    prefetch_related, поэтому связанные объекты загружаются для каждой
+    порции отдельно.
+    """
+
+    stream_chunk_size = STREAM_CHUNK_SIZE
+
+    def is_stream_requested(self):
+        """Проверяет, запросил ли клиент потоковую выдачу."""
+        value = self.request.query_params.get(STREAM_QUERY_PARAM, '')
+        return value.lower() in TRUE_VALUES
+
+    def list(self, request, *args, **kwargs):
+        """Возвращает список потоком или обычным ответом."""
+        if not self.is_stream_requested():
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(
+            self.stream_json(queryset), content_type='application/json'
+        )
+
+    def represent_queryset(self, queryset):
+        """Генерирует представления объектов, читая их порциями."""
+        serializer = self.get_serializer()
+        lookups = queryset._prefetch_related_lookups
+        instances = queryset.iterator(chunk_size=self.stream_chunk_size)
+        while True:
+            chunk = list(islice(instances, self.stream_chunk_size))
+            if not chunk:
+                return
+            prefetch_related_objects(chunk, *lookups)
+            for instance in chunk:
+                yield serializer.to_representation(instance)
+
+    def stream_json(self, queryset):
+        """Генерирует JSON-массив по частям."""
+        encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+        yield '['
+        chunk = []
+        separator = ''
+        for data in self.represent_queryset(queryset):
+            chunk.append(encoder.encode(data))
+            if len(chunk) == self.stream_chunk_size:
+                yield separator + ','.join(chunk)
+                separator, chunk = ',', []
+        if chunk:
+            yield separator + ','.join(chunk)
+        yield ']'
+
+
+class FastReadMixin:
+    """Читает списки через values_list() в обход полей сериализатора.
+
+    Включается атрибутом `fast_read`. Используется для непостраничного
+    списка и потоковой выдачи; если сериализатор содержит поля, которые
+    нельзя получить из values_list(), работает обычный путь.
+    """
+
+    fast_read = True
+
+    def get_fast_reader(self):
+        """Возвращает ValuesReader для сериализатора вьюсета или None."""
+        if not self.fast_read:
+            return None
+        return get_reader(self.get_serializer_class())
+
+    def get_serializer(self, *args, **kwargs):
+        """Подменяет сериализатор списка queryset на быстрый."""
+        reader = self.get_fast_reader()
+        if (reader is not None and kwargs.get('many')
+                and args and isinstance(args[0], QuerySet)):
+            return FastListSerializer(
+                reader, args[0], self.get_serializer_context()
+            )
+        return super().get_serializer(*args, **kwargs)
+
+    def represent_queryset(self, queryset):
+        """Генерирует представления объектов через ValuesReader."""
+        reader = self.get_fast_reader()
+        if reader is None:
+            return super().represent_queryset(queryset)
+        return reader.iter_rows(
+            queryset, self.get_serializer_context(),
+            chunk_size=self.stream_chunk_size
+        )
+
+
+class TimelineListMixin:
+    """Список постов по предвычисленной ленте.
+
+    Вьюсет возвращает ленту в get_timeline(); класс без этого метода
+    не создаётся. Порядок постов страницы берётся из ленты, а сами посты
+    выбираются по первичному ключу.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not callable(getattr(cls, 'get_timeline', None)):
+            raise ImproperlyConfigured(
+                f'{cls.__name__} должен определить метод get_timeline().'
+            )
+
+    def list(self, request, *args, **kwargs):
+        """Возвращает страницу ленты."""
+        ids = self.paginator.paginate_timeline(self.get_timeline(), request)
+        serializer = self.get_serializer(
+            self.get_queryset().filter(pk__in=ids), many=True
+        )
+        posts = {post['id']: post for post in serializer.data}
+        return self.paginator.get_paginated_response(
+            [posts[pk] for pk in ids if pk in posts]
+        )
+
+
+class ConditionalResponseMixin:
+    """Поддержка ETag и кеша ответов для чтения.
+
+    Вьюсет описывает в get_cache_scopes(), от каких областей данных
+    зависит ответ; без него ответ зависит только от общей области. Если
+    клиент прислал актуальный ETag, ответ 304 отдаётся без запросов к БД
+    и сериализации; иначе данные берутся из кеша ответов или вычисляются
+    и кешируются.
+    Проверка прав на объект для 304 не выполняется, поэтому миксин
+    подходит только для вьюсетов, где чтение разрешено всем
+    аутентифицированным пользователям.
+    """
+
+    def get_cache_scopes(self):
+        """Возвращает области данных, от которых зависит ответ.
+
+        Версия общей области меняется при массовых изменениях и смене
+        имени пользователя. Вьюсеты с данными других областей
+        переопределяют метод.
+        """
+        return [caching.GLOBAL_SCOPE]
+
+    def list(self, request, *args, **kwargs):
+        """Возвращает список с поддержкой условных запросов."""
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """Возвращает объект с поддержкой условных запросов."""
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        """Отдаёт 304, ответ из кеша или результат handler."""
+        if not caching.get_response_cache_settings()['ENABLED']:
+            return handler(request, *args, **kwargs)
+        versions = caching.get_versions(list(dict.fromkeys(
+            [*self.get_cache_scopes(), caching.GLOBAL_SCOPE]
+        )))
+        # Данные ответа содержат абсолютные URL изображений, поэтому
+        # ключ зависит от схемы и хоста запроса.
+        etag = caching.make_etag(
+            versions, request.scheme, request.get_host(),
+            request.get_full_path(), request.accepted_media_type or ''
+        )
+        not_modified = get_conditional_response(request._request, etag=etag)
+        if not_modified is not None:
+            return self.set_validators(not_modified, etag)
+
+        data = caching.get_cached_data(etag)
+        if data is not None:
+            response = Response(data)
+        else:
+            with ExitStack() as stack:
+                if routers.may_lag(max(versions)):
+                    # Реплика могла не получить последние изменения, а
+                    # ответ попадёт в кеш под новой версией.
+                    stack.enter_context(routers.primary_reads())
+                response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            if isinstance(response, Response):
+                caching.set_cached_data(etag, response.data)
+        return self.set_validators(response, etag)
+
+    @staticmethod
+    def set_validators(response, etag):
+        """Добавляет к ответу заголовок ETag."""
+        response['ETag'] = etag
+        return response
+
+
+class AtomicWriteMixin:
+    """Создаёт и изменяет объект в одной транзакции с обработчиками.
+
+    Django отправляет post_save после сохранения объекта, вне его
+    запроса, поэтому записи обработчиков (журнал изменений, счётчики
+    комментариев) в режиме autocommit фиксировались бы отдельно. В
+    транзакции они фиксируются вместе с объектом или откатываются
+    вместе с ним. Удаление Django и так выполняет в транзакции вместе
+    с сигналами.
+    """
+
+    def create(self, request, *args, **kwargs):
+        """Создаёт объект в транзакции."""
+        with transaction.atomic():
+            return super().create(request, *args, **kwargs)
+
+    def update(self, request, *args, **kwargs):
+        """Изменяет объект в транзакции."""
+        with transaction.atomic():
+            return super().update(request, *args, **kwargs)
+
+
+class BulkModelMixin:
+    """Массовое создание, изменение и удаление объектов.
+
+    Эндпоинт `bulk/` принимает JSON-массив: объектов для POST, объектов
+    с `id` для PATCH и идентификаторов для DELETE. Весь пакет
+    обрабатывается в одной транзакции; права проверяются для каждого
+    объекта после выборки всего пакета одним запросом, и при отказе хотя
+    бы по одному объекту пакет целиком отклоняется.
+    Сигналы post_save отправляются для каждого объекта, как и при
+    обычном сохранении.
+    """
+
+    bulk_max_size = BULK_MAX_SIZE
+
+    def get_bulk_data(self, child):
+        """Проверяет, что тело запроса — непустой массив нужного размера."""
+        field = serializers.ListField(
+            child=child, allow_empty=False, max_length=self.bulk_max_size
+        )
+        return field.run_validation(self.request.data)
+
+    def get_bulk_instances(self, ids):
+        """Возвращает объекты пакета и проверяет права на каждый."""
+        if len(set(ids)) != len(ids):
+            raise ValidationError('Идентификаторы не должны повторяться.')
+        instances = self.get_queryset().in_bulk(ids)
+        missing = [pk for pk in ids if pk not in instances]
+        if missing:
+            raise NotFound(f'Объекты не найдены: {missing}.')
+        instances = [instances[pk] for pk in ids]
+        for instance in instances:
+            self.check_object_permissions(self.request, instance)
+        return instances
+
+    @staticmethod
+    def send_post_save(instances, created=False, update_fields=None):
+        """Отправляет post_save для объектов, сохранённых в обход save()."""
+        for instance in instances:
+            post_save.send(
+                sender=type(instance), instance=instance, created=created,
+                update_fields=update_fields, raw=False, using=connection.alias
+            )
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request, *args, **kwargs):
+        """Создаёт объекты из массива."""
+        data = self.get_bulk_data(serializers.DictField())
+        serializer = self.get_serializer(data=data, many=True)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            self.perform_bulk_create(serializer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def perform_bulk_create(self, serializer):
+        """Сохраняет пакет одним запросом.
+
+        SQLite не возвращает id созданных строк, и они читаются заново:
+        до конца транзакции в базу SQLite пишет только это соединение,
+        поэтому последние id таблицы принадлежат пакету. В других БД без
+        возврата id объекты сохраняются по одному через perform_create,
+        но по-прежнему в одной транзакции.
+        """
+        returns_rows = connection.features.can_return_rows_from_bulk_insert
+        if not returns_rows and connection.vendor != 'sqlite':
+            self.perform_create(serializer)
+            return
+        model = serializer.child.Meta.model
+        extra = self.get_bulk_save_kwargs()
+        instances = model.objects.bulk_create(
+            model(**item, **extra) for item in serializer.validated_data
+        )
+        if not returns_rows:
+            ids = list(model.objects.order_by('-pk').values_list(
+                'pk', flat=True
+            )[:len(instances)])
+            for instance, pk in zip(instances, reversed(ids)):
+                instance.pk = pk
+        self.send_post_save(instances, created=True)
+        serializer.instance = instances
+
+    def get_bulk_save_kwargs(self):
+        """Возвращает поля, которые задаёт сервер, а не клиент."""
+        return {}
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request, *args, **kwargs):
+        """Частично изменяет объекты из массива с полем `id`."""
+        data = self.get_bulk_data(serializers.DictField())
+        ids = [
+            serializers.IntegerField(min_value=1).run_validation(
+                item.get('id')
+            )
+            for item in data
+        ]
+        instances = self.get_bulk_instances(ids)
+        items = [
+            self.get_serializer(instance, data=item, partial=True)
+            for instance, item in zip(instances, data)
+        ]
+        errors = [{} if item.is_valid() else item.errors for item in items]
+        if any(errors):
+            raise ValidationError(errors)
+        fields = set()
+        for item in items:
+            for name, value in item.validated_data.items():
+                setattr(item.instance, name, value)
+                fields.add(name)
+        with transaction.atomic():
+            if fields:
+                type(instances[0]).objects.bulk_update(instances, fields)
+            self.send_post_save(instances, update_fields=frozenset(fields))
+        return Response(self.get_serializer(instances, many=True).data)
+
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request, *args, **kwargs):
+        """Удаляет объекты по массиву идентификаторов."""
+        ids = self.get_bulk_data(serializers.IntegerField(min_value=1))
+        instances = self.get_bulk_instances(ids)
+        with transaction.atomic():
+            self.get_queryset().filter(
+                pk__in=[instance.pk for instance in instances]
+            ).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
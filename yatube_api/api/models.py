@@ -0,0 +1,61 @@
+"""Модуль моделей приложения API."""
+from django.db import models
+
+
+class Change(models.Model):
+    """Запись журнала изменений постов, комментариев и групп.
+
+    Журнал только дополняется: каждое создание, изменение и удаление
+    объекта добавляет запись, а первичный ключ записи служит курсором
+    инкрементальной синхронизации клиентов.
+    """
+
+    class Kind(models.TextChoices):
+        """Типы объектов журнала."""
+
+        POST = 'post', 'Пост'
+        COMMENT = 'comment', 'Комментарий'
+        GROUP = 'group', 'Группа'
+
+    kind = models.CharField(
+        max_length=16,
+        choices=Kind.choices,
+        verbose_name='Тип объекта'
+    )
+    object_id = models.PositiveBigIntegerField(
+        verbose_name='Идентификатор объекта'
+    )
+    deleted = models.BooleanField(
+        default=False,
+        verbose_name='Объект удалён'
+    )
+    created = models.DateTimeField(
+        'Дата изменения', auto_now_add=True
+    )
+
+    def __str__(self):
+        """Возвращает тип, идентификатор объекта и действие."""
+        action = 'удалён' if self.deleted else 'изменён'
+        return f'{self.kind} {self.object_id} {action}'
+
+
+class RevokedToken(models.Model):
+    """Подписанный токен, отозванный до истечения срока действия.
+
+    Запись нужна только до истечения срока токена: после него токен
+    не проходит проверку и без списка отозванных.
+    """
+
+    jti = models.CharField(
+        max_length=32,
+        unique=True,
+        verbose_name='Идентификатор токена'
+    )
+    expires = models.DateTimeField(
+        db_index=True,
+        verbose_name='Срок действия'
+    )
+
+    def __str__(self):
+        """Возвращает идентификатор токена."""
+        return self.jti
@@ -0,0 +1,268 @@
+"""Модуль пагинации для API.
+
+Пагинация включается только по параметрам запроса, поэтому запрос без
+них по-прежнему возвращает полный список.
+"""
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import (BasePagination,
+                                       LimitOffsetPagination,
+                                       _positive_int)
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class KeysetPagination(BasePagination):
+    """Курсорная пагинация по составному ключу.
+
+    Курсор хранит значения полей `ordering` последнего объекта страницы,
+    а следующая страница выбирается условием по ключу, а не OFFSET,
+    поэтому стоимость запроса не зависит от глубины страницы.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = DEFAULT_PAGE_SIZE
+    max_page_size = MAX_PAGE_SIZE
+    ordering = ('-id',)
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def is_requested(self, request):
+        """Проверяет, запросил ли клиент курсорную пагинацию."""
+        return (self.cursor_query_param in request.query_params
+                or self.page_size_query_param in request.query_params)
+
+    def get_page_size(self, request):
+        """Возвращает размер страницы из запроса или значение по умолчанию."""
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Возвращает страницу объектов после позиции из курсора."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        ordering = self.get_ordering(reverse)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        self.page = results[:page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_ordering(self, reverse=False):
+        """Возвращает порядок сортировки с учётом направления обхода."""
+        if not reverse:
+            return self.ordering
+        return tuple(
+            name[1:] if name.startswith('-') else f'-{name}'
+            for name in self.ordering
+        )
+
+    @staticmethod
+    def after(ordering, position):
+        """Строит условие «строго после позиции» для составного ключа."""
+        condition = None
+        equal = {}
+        for name, value in zip(ordering, position):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            step = Q(**equal, **{f'{field}__{lookup}': value})
+            condition = step if condition is None else condition | step
+            equal[field] = value
+        return condition
+
+    def get_position(self, instance):
+        """Возвращает значения ключа сортировки для объекта."""
+        return [
+            self.model._meta.get_field(name.lstrip('-')).value_to_string(
+                instance
+            )
+            for name in self.ordering
+        ]
+
+    def decode_cursor(self, request):
+        """Разбирает курсор из запроса в позицию и направление обхода."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(b64decode(encoded.encode('ascii')))
+            reverse = bool(data['r'])
+            position = [
+                self.model._meta.get_field(name.lstrip('-')).to_python(value)
+                for name, value in zip(self.ordering, data['p'])
+            ]
+        except (BinasciiError, UnicodeError, ValueError, TypeError,
+                KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, instance, reverse):
+        """Возвращает ссылку на страницу, соседнюю с объектом."""
+        data = json.dumps(
+            {'p': self.get_position(instance), 'r': int(reverse)}
+        )
+        encoded = b64encode(data.encode('ascii')).decode('ascii')
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+    def get_next_link(self):
+        """Возвращает ссылку на следующую страницу."""
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        """Возвращает ссылку на предыдущую страницу."""
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        """Оборачивает страницу в ответ со ссылками на соседние страницы."""
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class OptionalPagination(BasePagination):
+    """Пагинация по запросу клиента.
+
+    `?cursor=`/`?page_size=` включают курсорную пагинацию,
+    `?limit=`/`?offset=` — постраничную по смещению с сохранением явного
+    порядка queryset, например по релевантности поиска. Без этих
+    параметров возвращается полный список, как и раньше.
+    """
+
+    ordering = ('-id',)
+
+    def __init__(self):
+        self.keyset = KeysetPagination()
+        self.keyset.ordering = self.ordering
+        self.limit_offset = LimitOffsetPagination()
+        self.limit_offset.default_limit = DEFAULT_PAGE_SIZE
+        self.limit_offset.max_limit = MAX_PAGE_SIZE
+        self.paginator = None
+
+    def get_ordering(self, request, queryset, view):
+        """Возвращает порядок из фильтра сортировки вьюсета.
+
+        Как и в CursorPagination из DRF, порядок берётся у первого
+        OrderingFilter в filter_backends, а без него используется
+        `ordering` пагинатора.
+        """
+        for backend in getattr(view, 'filter_backends', ()):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                if ordering:
+                    return tuple(ordering)
+        return self.ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Выбирает режим пагинации по параметрам запроса."""
+        if self.keyset.is_requested(request):
+            self.paginator = self.keyset
+            self.keyset.ordering = self.get_ordering(request, queryset, view)
+        elif (self.limit_offset.limit_query_param in request.query_params
+              or self.limit_offset.offset_query_param
+              in request.query_params):
+            self.paginator = self.limit_offset
+            if not queryset.query.order_by:
+                queryset = queryset.order_by(*self.ordering)
+        else:
+            return None
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        """Возвращает ответ выбранного режима пагинации."""
+        return self.paginator.get_paginated_response(data)
+
+
+class PostPagination(OptionalPagination):
+    """Пагинация постов: сначала новые."""
+
+    ordering = ('-pub_date', '-id')
+
+
+class CommentPagination(OptionalPagination):
+    """Пагинация комментариев: в порядке добавления."""
+
+    ordering = ('created', 'id')
+
+
+class TimelinePagination(KeysetPagination):
+    """Курсорная пагинация предвычисленной ленты постов.
+
+    Курсор — запись ленты, на которой закончилась страница. Лента
+    читается только вперёд, поэтому ссылки на предыдущую страницу нет.
+    """
+
+    def paginate_timeline(self, timeline, request):
+        """Возвращает id постов страницы ленты."""
+        self.base_url = request.build_absolute_uri()
+        entries, self.has_next = timeline.page(
+            self.decode_cursor(request), self.get_page_size(request)
+        )
+        self.last_entry = entries[-1] if entries else None
+        return [-entry[1] for entry in entries]
+
+    def decode_cursor(self, request):
+        """Разбирает курсор из запроса в запись ленты."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            entry = tuple(json.loads(b64decode(encoded.encode('ascii'))))
+        except (BinasciiError, UnicodeError, ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if (len(entry) != 2
+                or not all(isinstance(value, int) for value in entry)):
+            raise NotFound(self.invalid_cursor_message)
+        return entry
+
+    def get_next_link(self):
+        """Возвращает ссылку на следующую страницу ленты."""
+        if not self.has_next:
+            return None
+        encoded = b64encode(json.dumps(self.last_entry).encode('ascii'))
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded.decode('ascii')
+        )
+
+    def get_previous_link(self):
+        """Лента не поддерживает переход на предыдущую страницу."""
+        return None
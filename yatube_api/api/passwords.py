@@ -0,0 +1,198 @@
+"""Модуль проверки паролей при выдаче токенов.
+
+Медленные хешеры (PBKDF2, Argon2, bcrypt) занимают процессор на время
+проверки и при всплеске входов держат GIL в потоках запросов. Поэтому
+проверка выполняется в пуле из WORKERS процессов: поток запроса только
+ждёт результата. Одновременные попытки входа с тем же паролем ждут одну
+проверку, а успешная проверка запоминается на CACHE_TIMEOUT секунд по
+HMAC пароля и его хеша, так что смена пароля сбрасывает запись. Если
+проверок в очереди больше MAX_PENDING, вход отклоняется с ответом 503.
+"""
+import hmac
+import multiprocessing
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from hashlib import sha256
+from threading import Lock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import (check_password, get_hasher,
+                                         identify_hasher, make_password)
+from django.utils.crypto import get_random_string
+from rest_framework.exceptions import APIException
+
+from api.cache import LRUCache
+from api.instrumentation import password_metrics
+
+LOGIN_DEFAULTS = {
+    'WORKERS': 2,
+    'MAX_PENDING': 64,
+    'CACHE_SIZE': 10000,
+    'CACHE_TIMEOUT': 60,
+}
+UNKNOWN_ALGORITHM = 'unknown'
+
+
+def get_login_settings():
+    """Возвращает настройки проверки паролей."""
+    return {**LOGIN_DEFAULTS, **getattr(settings, 'API_LOGIN', {})}
+
+
+class LoginOverloaded(APIException):
+    """Очередь проверки паролей переполнена."""
+
+    status_code = 503
+    default_detail = 'Слишком много одновременных входов, повторите позже.'
+    default_code = 'login_overloaded'
+
+
+def init_worker(hashers):
+    """Настраивает хешеры в процессе пула, запущенном через spawn."""
+    if not settings.configured:
+        settings.configure(PASSWORD_HASHERS=hashers)
+
+
+def verify_password(password, encoded):
+    """Проверяет пароль по хешу и возвращает (результат, время)."""
+    start = time.perf_counter()
+    valid = check_password(password, encoded)
+    return valid, time.perf_counter() - start
+
+
+def algorithm_of(encoded):
+    """Возвращает алгоритм хешера или UNKNOWN_ALGORITHM."""
+    try:
+        return identify_hasher(encoded).algorithm
+    except ValueError:
+        return UNKNOWN_ALGORITHM
+
+
+def must_update(encoded):
+    """Проверяет, нужно ли перехешировать пароль основным хешером."""
+    preferred = get_hasher()
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False
+    return (hasher.algorithm != preferred.algorithm
+            or preferred.must_update(encoded))
+
+
+@lru_cache(maxsize=None)
+def dummy_hash(algorithm):
+    """Возвращает хеш случайного пароля для несуществующих логинов."""
+    return make_password(get_random_string(32))
+
+
+class PasswordVerifier:
+    """Проверка паролей в пуле процессов с объединением и кешем."""
+
+    def __init__(self):
+        options = get_login_settings()
+        self.verified = LRUCache(options['CACHE_SIZE'],
+                                 options['CACHE_TIMEOUT'])
+        self.pending = {}
+        self.lock = Lock()
+        self.pool = None
+        self.pool_key = None
+
+    @staticmethod
+    def cache_key(password, encoded):
+        """Возвращает ключ проверки, не раскрывающий пароль."""
+        return hmac.new(settings.SECRET_KEY.encode(),
+                        f'{encoded}\0{password}'.encode(), sha256).digest()
+
+    def get_pool(self, workers):
+        """Возвращает пул процессов, пересоздавая его при смене настроек."""
+        key = (workers, tuple(settings.PASSWORD_HASHERS))
+        with self.lock:
+            if self.pool_key != key:
+                if self.pool is not None:
+                    self.pool.shutdown(wait=False)
+                # spawn: fork процесса с потоками сервера небезопасен.
+                self.pool = ProcessPoolExecutor(
+                    workers, mp_context=multiprocessing.get_context('spawn'),
+                    initializer=init_worker, initargs=(key[1],)
+                )
+                self.pool_key = key
+            return self.pool
+
+    def run(self, password, encoded, workers):
+        """Проверяет пароль в пуле или, без пула, в текущем потоке."""
+        if not workers:
+            return verify_password(password, encoded)
+        try:
+            future = self.get_pool(workers).submit(
+                verify_password, password, encoded
+            )
+        except BrokenProcessPool:
+            self.pool_key = None
+            future = self.get_pool(workers).submit(
+                verify_password, password, encoded
+            )
+        return future.result()
+
+    def verify(self, password, encoded):
+        """Проверяет пароль по хешу."""
+        key = self.cache_key(password, encoded)
+        if self.verified.get(key):
+            password_metrics.increment('cache_hits')
+            return True
+        options = get_login_settings()
+        with self.lock:
+            future = self.pending.get(key)
+            owner = future is None
+            if owner:
+                if len(self.pending) >= options['MAX_PENDING']:
+                    password_metrics.increment('rejected')
+                    raise LoginOverloaded
+                future = self.pending[key] = Future()
+        if not owner:
+            password_metrics.increment('deduplicated')
+            return future.result()[0]
+        try:
+            valid, duration = self.run(password, encoded, options['WORKERS'])
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result((valid, duration))
+        finally:
+            with self.lock:
+                self.pending.pop(key, None)
+        password_metrics.record(algorithm_of(encoded), duration)
+        if valid:
+            self.verified.set(key, True)
+        return valid
+
+    def clear(self):
+        """Очищает кеш успешных проверок."""
+        self.verified.clear()
+
+
+verifier = PasswordVerifier()
+
+
+def authenticate(username, password):
+    """Возвращает активного пользователя по логину и паролю или None.
+
+    Повторяет проверки ModelBackend: для несуществующего логина пароль
+    сверяется со случайным хешем, чтобы время ответа не выдавало, есть
+    ли такой пользователь, а хеш устаревшего алгоритма заменяется
+    основным после успешного входа.
+    """
+    user_model = get_user_model()
+    try:
+        user = user_model._default_manager.get_by_natural_key(username)
+    except user_model.DoesNotExist:
+        verifier.verify(password, dummy_hash(get_hasher().algorithm))
+        return None
+    if not verifier.verify(password, user.password) or not user.is_active:
+        return None
+    if must_update(user.password):
+        user.set_password(password)
+        user.save(update_fields=['password'])
+    return user
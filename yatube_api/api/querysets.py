@@ -0,0 +1,148 @@
+"""Модуль оптимизации запросов к БД по полям сериализатора."""
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import ForeignObjectRel, Prefetch
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, RelatedField
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """План выборки: связанные объекты и колонки, нужные сериализатору."""
+
+    select_related: tuple = ()
+    prefetch_related: tuple = ()
+    only: tuple = ()
+
+    def apply(self, queryset):
+        """Применяет план к queryset."""
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if self.only:
+            queryset = queryset.only(*self.only)
+        return queryset
+
+
+def _model_field(model, name):
+    """Возвращает поле модели или None, если такого поля нет."""
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def _prefetch(model_field, serializer):
+    """Возвращает Prefetch для вложенного списка с планом его элементов.
+
+    Для обратной связи внешний ключ на родителя добавляется в only():
+    по нему prefetch_related раскладывает объекты по родителям.
+    """
+    model = serializer.Meta.model
+    plan = _plan_fields(model, serializer.fields)
+    if plan.only and isinstance(model_field, ForeignObjectRel):
+        plan = QueryPlan(
+            select_related=plan.select_related,
+            prefetch_related=plan.prefetch_related,
+            only=tuple(sorted({*plan.only, model_field.field.name})),
+        )
+    return Prefetch(model_field.name,
+                    queryset=plan.apply(model._default_manager.all()))
+
+
+def _prefetch_lookup(model_field, field):
+    """Возвращает lookup для prefetch_related поля-списка."""
+    if isinstance(field, serializers.ListSerializer) and isinstance(
+        field.child, serializers.ModelSerializer
+    ):
+        return _prefetch(model_field, field.child)
+    return field.source
+
+
+def _nested_plan(field):
+    """Возвращает план вложенного сериализатора с путями от родителя.
+
+    Пустой only в результате означает, что колонки ограничить нельзя.
+    """
+    nested = _plan_fields(field.Meta.model, field.fields)
+    prefix = f'{field.source}__'
+    return QueryPlan(
+        select_related=(field.source, *(
+            prefix + name for name in nested.select_related
+        )),
+        prefetch_related=tuple(
+            prefix + getattr(lookup, 'prefetch_through', lookup)
+            for lookup in nested.prefetch_related
+        ),
+        only=tuple(prefix + name for name in nested.only),
+    )
+
+
+def _plan_fields(model, fields):
+    """Собирает план выборки для словаря полей сериализатора.
+
+    Вложенный сериализатор выбирается через select_related со своим
+    планом, вложенный список — отдельным запросом через Prefetch. Если
+    хотя бы одно поле нельзя однозначно отобразить на колонку модели,
+    ограничение колонок через only() не применяется.
+    """
+    select_related = set()
+    prefetch_related = set()
+    only = {model._meta.pk.name}
+    restrict_columns = True
+    for field in fields.values():
+        if field.source == '*' or '.' in field.source:
+            restrict_columns = False
+            continue
+        model_field = _model_field(model, field.source)
+        if model_field is None:
+            restrict_columns = False
+            continue
+        if isinstance(field, (ManyRelatedField, serializers.ListSerializer)):
+            prefetch_related.add(_prefetch_lookup(model_field, field))
+            continue
+        only.add(field.source)
+        if isinstance(field, serializers.SlugRelatedField):
+            select_related.add(field.source)
+            only.add(f'{field.source}__{field.slug_field}')
+        elif isinstance(field, serializers.ModelSerializer):
+            nested = _nested_plan(field)
+            select_related.update(nested.select_related)
+            prefetch_related.update(nested.prefetch_related)
+            only.update(nested.only)
+            restrict_columns = restrict_columns and bool(nested.only)
+        elif isinstance(field, serializers.BaseSerializer):
+            select_related.add(field.source)
+            restrict_columns = False
+        elif isinstance(field, RelatedField) and not isinstance(
+            field, serializers.PrimaryKeyRelatedField
+        ):
+            select_related.add(field.source)
+            restrict_columns = False
+    return QueryPlan(
+        select_related=tuple(sorted(select_related)),
+        prefetch_related=tuple(sorted(
+            prefetch_related,
+            key=lambda lookup: getattr(lookup, 'prefetch_to', lookup)
+        )),
+        only=tuple(sorted(only)) if restrict_columns else (),
+    )
+
+
+@lru_cache(maxsize=None)
+def build_query_plan(serializer_class):
+    """Возвращает план выборки для класса сериализатора.
+
+    План вычисляется один раз на класс и переиспользуется между
+    запросами.
+    """
+    serializer = serializer_class()
+    return _plan_fields(serializer.Meta.model, serializer.fields)
+
+
+def optimize_queryset(queryset, serializer_class):
+    """Применяет к queryset план выборки сериализатора."""
+    return build_query_plan(serializer_class).apply(queryset)
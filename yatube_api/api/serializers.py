@@ -1,16 +1,125 @@
 """Модуль сериализаторов для приложения API."""
+from functools import lru_cache
+
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
+from rest_framework.authtoken.serializers import AuthTokenSerializer
+from rest_framework.validators import UniqueTogetherValidator
+
+from api.passwords import authenticate
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """Поле со ссылками на уменьшенные копии изображения поста."""
+
+    def __init__(self, **kwargs):
+        self.storage = Post._meta.get_field('image').storage
+        super().__init__(**kwargs)
+
+    def represent(self, variants, request):
+        """Преобразует имена файлов вариантов в абсолютные URL."""
+        urls = {}
+        for variant, name in (variants or {}).items():
+            if variant == 'source':
+                continue
+            url = self.storage.url(name)
+            urls[variant] = (request.build_absolute_uri(url)
+                             if request is not None else url)
+        return urls
+
+    def to_representation(self, value):
+        """Возвращает словарь URL вариантов изображения."""
+        return self.represent(value, self.context.get('request'))
+
+
+class ProjectionMixin:
+    """Проекции сериализатора: подмножество полей и встроенные связи.
+
+    Проекция — подкласс сериализатора из project(), у которого остаются
+    только поля sparse_fields (и всегда первичный ключ), а поля
+    expanded_fields заменены вложенными сериализаторами из
+    get_expansions(). Подклассы кешируются, поэтому планы выборки и
+    быстрые читатели, которые кешируются по классу, строятся для каждой
+    проекции один раз.
+    """
+
+    sparse_fields = None
+    expanded_fields = ()
+
+    @classmethod
+    def get_expansions(cls):
+        """Возвращает встраиваемые связи: имя -> (сериализатор, kwargs)."""
+        return {}
+
+    def get_fields(self):
+        """Возвращает поля с учётом проекции."""
+        fields = super().get_fields()
+        expansions = self.get_expansions()
+        for name in self.expanded_fields:
+            serializer_class, kwargs = expansions[name]
+            fields[name] = serializer_class(read_only=True, **kwargs)
+        if self.sparse_fields is None:
+            return fields
+        keep = {self.Meta.model._meta.pk.name, *self.sparse_fields,
+                *self.expanded_fields}
+        return {name: field for name, field in fields.items()
+                if name in keep}
+
+    @classmethod
+    def project(cls, fields=None, expand=()):
+        """Возвращает проекцию сериализатора.
+
+        Неизвестные имена полей и связей дают ValidationError.
+        """
+        unknown = set(expand) - set(cls.get_expansions())
+        if unknown:
+            raise serializers.ValidationError(
+                {'expand': [f'Нельзя встроить: {", ".join(sorted(unknown))}.']}
+            )
+        if fields is not None:
+            unknown = set(fields) - _field_names(cls) - set(expand)
+            if unknown:
+                raise serializers.ValidationError(
+                    {'fields': [
+                        f'Неизвестные поля: {", ".join(sorted(unknown))}.'
+                    ]}
+                )
+            fields = frozenset(fields)
+        return _projection(cls, fields, tuple(sorted(set(expand))))
+
+
+@lru_cache(maxsize=None)
+def _field_names(serializer_class):
+    """Возвращает имена полей сериализатора."""
+    return frozenset(serializer_class().fields)
 
-from posts.models import Comment, Group, Post
 
+@lru_cache(maxsize=None)
+def _projection(serializer_class, fields, expand):
+    """Создаёт подкласс сериализатора для проекции.
 
-class PostSerializer(serializers.ModelSerializer):
+    Имена полей проверены в project(), поэтому число проекций
+    ограничено числом сочетаний полей сериализатора.
+    """
+    return type(serializer_class.__name__, (serializer_class,), {
+        '__module__': serializer_class.__module__,
+        'sparse_fields': fields,
+        'expanded_fields': expand,
+    })
+
+
+class PostSerializer(ProjectionMixin, serializers.ModelSerializer):
     """Сериализатор для модели Post."""
 
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True
     )
+    image_variants = ImageVariantsField()
 
     class Meta:
         """Настройки сериализатора для модели Post."""
@@ -18,8 +127,16 @@ class PostSerializer(serializers.ModelSerializer):
         model = Post
         fields = '__all__'
 
+    @classmethod
+    def get_expansions(cls):
+        """Встраивает группу и комментарии поста."""
+        return {
+            'group': (GroupSerializer, {}),
+            'comments': (CommentSerializer, {'many': True}),
+        }
+
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(ProjectionMixin, serializers.ModelSerializer):
     """Сериализатор для модели Comment."""
 
     author = serializers.SlugRelatedField(
@@ -35,7 +152,7 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ['post']
 
 
-class GroupSerializer(serializers.ModelSerializer):
+class GroupSerializer(ProjectionMixin, serializers.ModelSerializer):
     """Сериализатор для модели Group."""
 
     class Meta:
@@ -43,3 +160,53 @@ class GroupSerializer(serializers.ModelSerializer):
 
         model = Group
         fields = ['id', 'title', 'slug', 'description']
+
+
+class FollowSerializer(serializers.ModelSerializer):
+    """Сериализатор для модели Follow."""
+
+    user = serializers.SlugRelatedField(
+        slug_field='username',
+        read_only=True,
+        default=serializers.CurrentUserDefault()
+    )
+    following = serializers.SlugRelatedField(
+        slug_field='username',
+        queryset=User.objects.all()
+    )
+
+    class Meta:
+        """Настройки сериализатора для модели Follow."""
+
+        model = Follow
+        fields = ['user', 'following']
+        validators = [
+            UniqueTogetherValidator(
+                queryset=Follow.objects.all(),
+                fields=['user', 'following'],
+                message='Вы уже подписаны на этого автора.'
+            )
+        ]
+
+    def validate_following(self, value):
+        """Запрещает подписку на самого себя."""
+        if value == self.context['request'].user:
+            raise serializers.ValidationError(
+                'Нельзя подписаться на самого себя.'
+            )
+        return value
+
+
+class TokenAuthSerializer(AuthTokenSerializer):
+    """Проверка логина и пароля для выдачи токена через api.passwords."""
+
+    def validate(self, attrs):
+        """Находит пользователя по логину и паролю."""
+        user = authenticate(attrs['username'], attrs['password'])
+        if user is None:
+            raise serializers.ValidationError(
+                _('Unable to log in with provided credentials.'),
+                code='authorization'
+            )
+        attrs['user'] = user
+        return attrs
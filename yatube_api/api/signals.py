@@ -0,0 +1,268 @@
+"""Модуль обработчиков сигналов приложения API."""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api import caching, changes, streams, timelines
+from api.authentication import token_cache, user_cache
+from posts.models import Comment, Follow, Group, Post
+from posts.signals import post_image_processed, posts_bulk_updated
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    """Удаляет из кеша изменённый или удалённый токен."""
+    token_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_tokens(sender, instance, **kwargs):
+    """Удаляет из кеша токены изменённого или удалённого пользователя."""
+    token_cache.delete_user(instance.pk)
+    user_cache.delete(instance.pk)
+
+
+@receiver(post_init, sender=User)
+def remember_username(sender, instance, **kwargs):
+    """Запоминает загруженное имя пользователя."""
+    instance._loaded_username = instance.__dict__.get('username')
+
+
+@receiver(post_save, sender=User)
+def bump_renamed_user_versions(sender, instance, created=False,
+                               update_fields=None, **kwargs):
+    """Обновляет версию всех ответов после смены имени пользователя.
+
+    Из полей пользователя в ответах есть только имя. Сохранение других
+    полей, например last_login при входе или хеша пароля после
+    перехеширования, кешированные ответы не меняет.
+    """
+    if created:
+        return
+    if update_fields is not None:
+        renamed = 'username' in update_fields
+    else:
+        renamed = instance.username != instance._loaded_username
+    instance._loaded_username = instance.username
+    if renamed:
+        caching.bump_versions(caching.GLOBAL_SCOPE)
+
+
+@receiver(post_delete, sender=User)
+def bump_deleted_user_versions(sender, instance, **kwargs):
+    """Обновляет версию всех ответов после удаления пользователя."""
+    caching.bump_versions(caching.GLOBAL_SCOPE)
+
+
+@receiver(posts_bulk_updated)
+def bump_all_versions(sender, **kwargs):
+    """Обновляет версию всех ответов после массового изменения постов."""
+    caching.bump_versions(caching.GLOBAL_SCOPE)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def bump_post_versions(sender, instance, **kwargs):
+    """Обновляет версии списка постов, поста и его комментариев."""
+    caching.bump_versions(
+        caching.POSTS_SCOPE,
+        caching.post_scope(instance.pk),
+        caching.comments_scope(instance.pk),
+    )
+
+
+@receiver(post_image_processed)
+def record_post_image_processed(sender, post_id, **kwargs):
+    """Обновляет версии поста и журнал после обработки изображения.
+
+    Варианты изображения есть в ответах с постом, а записываются они
+    запросом UPDATE без сигналов post_save.
+    """
+    caching.bump_versions(caching.POSTS_SCOPE, caching.post_scope(post_id))
+    changes.record(changes.change(Post, post_id))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_comment_versions(sender, instance, **kwargs):
+    """Обновляет версии комментариев к посту и самого поста.
+
+    Пост содержит счётчик комментариев, поэтому меняются и ответы
+    со списком постов.
+    """
+    caching.bump_versions(
+        caching.comments_scope(instance.post_id),
+        caching.post_scope(instance.post_id),
+        caching.POSTS_SCOPE,
+    )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def bump_group_versions(sender, instance, **kwargs):
+    """Обновляет версию групп.
+
+    Удаление группы обнуляет поле group у постов без сигналов post_save,
+    поэтому от версии групп зависят и ответы с постами.
+    """
+    caching.bump_versions(caching.GROUPS_SCOPE)
+
+
+@receiver(post_init, sender=Post)
+def remember_post_group(sender, instance, **kwargs):
+    """Запоминает загруженную группу поста для обновления лент."""
+    instance._loaded_group_id = instance.__dict__.get('group_id')
+
+
+@receiver(post_save, sender=Post)
+def update_group_timelines(sender, instance, created=False, **kwargs):
+    """Добавляет пост в ленту группы и убирает из ленты прежней группы.
+
+    Ленты меняются после фиксации транзакции, чтобы в них не попали
+    посты из откаченных транзакций.
+    """
+    previous = (None if created
+                else getattr(instance, '_loaded_group_id', None))
+    current = instance.group_id
+    instance._loaded_group_id = current
+    if not created and previous == current:
+        return
+    pub_date, post_id = instance.pub_date, instance.pk
+
+    def update():
+        if previous is not None:
+            timelines.group_timeline(previous).remove(post_id)
+        if current is not None:
+            timelines.group_timeline(current).add(pub_date, post_id)
+
+    transaction.on_commit(update)
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_group_timeline(sender, instance, **kwargs):
+    """Убирает удалённый пост из ленты группы."""
+    group_id, post_id = instance.group_id, instance.pk
+    if group_id is not None:
+        transaction.on_commit(
+            lambda: timelines.group_timeline(group_id).remove(post_id)
+        )
+
+
+@receiver(post_delete, sender=Group)
+def clear_group_timeline(sender, instance, **kwargs):
+    """Удаляет ленту удалённой группы.
+
+    Посты группы при этом получают group=NULL запросом UPDATE без
+    сигналов, поэтому лента удаляется целиком.
+    """
+    group_id = instance.pk
+    transaction.on_commit(
+        lambda: timelines.group_timeline(group_id).clear()
+    )
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created=False, **kwargs):
+    """Рассылает новый пост в ленты подписчиков автора."""
+    if not created:
+        return
+    author_id, pub_date, post_id = (instance.author_id, instance.pub_date,
+                                    instance.pk)
+    transaction.on_commit(
+        lambda: timelines.fan_out_post(author_id, pub_date, post_id)
+    )
+
+
+@receiver(post_delete, sender=Post)
+def fan_out_post_removal(sender, instance, **kwargs):
+    """Удаляет пост из лент подписчиков автора."""
+    author_id, post_id = instance.author_id, instance.pk
+    transaction.on_commit(
+        lambda: timelines.fan_out_removal(author_id, post_id)
+    )
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def update_follower_timeline(sender, instance, **kwargs):
+    """Обновляет ленту подписчика после подписки или отписки."""
+    user_id, author_id = instance.user_id, instance.following_id
+    transaction.on_commit(
+        lambda: timelines.follows_changed(user_id, author_id)
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Group)
+def record_saved(sender, instance, raw=False, **kwargs):
+    """Записывает в журнал созданный или изменённый объект."""
+    if not raw:
+        changes.record(changes.change(sender, instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+def record_comment_saved(sender, instance, created=False, raw=False,
+                         **kwargs):
+    """Записывает в журнал комментарий, а для нового — и его пост.
+
+    Счётчик комментариев поста обновляется запросом UPDATE без сигналов
+    post_save поста.
+    """
+    if raw:
+        return
+    entries = [changes.change(Comment, instance.pk)]
+    if created:
+        entries.append(changes.change(Post, instance.post_id))
+    changes.record(*entries)
+
+
+@receiver(post_delete, sender=Comment)
+def record_comment_deleted(sender, instance, using, **kwargs):
+    """Записывает в журнал удаление комментария и изменение его поста.
+
+    Если пост удаляется вместе с комментарием, запись откладывается до
+    удаления поста.
+    """
+    if changes.defer_comment_deletion(instance.post_id, instance.pk, using):
+        return
+    changes.record(changes.change(Comment, instance.pk, deleted=True),
+                   changes.change(Post, instance.post_id))
+
+
+@receiver(post_delete, sender=Post)
+def record_post_deleted(sender, instance, using, **kwargs):
+    """Записывает в журнал удаление поста и его комментариев."""
+    changes.record_post_deletion(instance.pk, using)
+
+
+@receiver(pre_delete, sender=Group)
+def record_group_posts(sender, instance, **kwargs):
+    """Записывает в журнал посты удаляемой группы.
+
+    Поле group у них обнуляется запросом UPDATE без сигналов post_save.
+    """
+    changes.record(*(
+        changes.change(Post, pk)
+        for pk in instance.posts.values_list('pk', flat=True)
+    ))
+
+
+@receiver(post_delete, sender=Group)
+def record_group_deleted(sender, instance, **kwargs):
+    """Записывает в журнал удаление группы."""
+    changes.record(changes.change(Group, instance.pk, deleted=True))
+
+
+@receiver(post_save, sender=Comment)
+def publish_new_comment(sender, instance, created=False, raw=False,
+                        **kwargs):
+    """Публикует новый комментарий подписчикам потока SSE поста."""
+    if created and not raw:
+        transaction.on_commit(lambda: streams.publish_comment(instance))
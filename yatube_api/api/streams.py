@@ -0,0 +1,85 @@
+"""Модуль потоков новых комментариев для server-sent events.
+
+Новый комментарий после фиксации транзакции публикуется в канал поста.
+Клиент, переподключившийся с Last-Event-ID, сначала получает
+пропущенные комментарии из БД, а затем — опубликованные в канал;
+подписка создаётся до чтения БД, поэтому между ними ничего не теряется,
+а повторы отсеиваются по идентификатору.
+"""
+import asyncio
+import json
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from api.async_views import run_in_pool
+from api.events import (HEARTBEAT_EVENT, format_event, get_broker,
+                        get_events_settings)
+from api.fast_serializers import get_reader
+from api.querysets import optimize_queryset
+from api.serializers import CommentSerializer
+from posts.models import Comment
+
+COMMENT_EVENT = 'comment'
+REPLAY_CHUNK_SIZE = 500
+
+
+def comments_channel(post_id):
+    """Возвращает канал новых комментариев к посту."""
+    return f'comments:{post_id}'
+
+
+def publish_comment(comment):
+    """Публикует новый комментарий в канал его поста."""
+    get_broker().publish(
+        comments_channel(comment.post_id),
+        dict(CommentSerializer(comment).data)
+    )
+
+
+def read_comments(post_id, after_id, limit=REPLAY_CHUNK_SIZE):
+    """Возвращает комментарии к посту с id больше after_id."""
+    queryset = optimize_queryset(
+        Comment.objects.filter(post_id=post_id, id__gt=after_id),
+        CommentSerializer
+    ).order_by('id')[:limit]
+    return get_reader(CommentSerializer).read(queryset)
+
+
+def comment_event(data):
+    """Кодирует комментарий в событие SSE."""
+    return format_event(
+        json.dumps(data, cls=JSONEncoder, ensure_ascii=False),
+        COMMENT_EVENT, data['id']
+    )
+
+
+async def comment_events(post_id, last_event_id=None):
+    """Генерирует события новых комментариев к посту.
+
+    Раз в HEARTBEAT секунд без событий отправляется комментарий SSE,
+    чтобы прокси не закрывали простаивающее соединение. Если подписка
+    отстала и закрыта брокером, поток завершается: клиент
+    переподключится с Last-Event-ID и дочитает пропущенное из БД.
+    """
+    options = get_events_settings()
+    with get_broker().subscribe(comments_channel(post_id)) as subscription:
+        yield f'retry: {options["RETRY"]}\n\n'.encode()
+        while last_event_id is not None:
+            missed = await run_in_pool(read_comments, post_id, last_event_id)
+            for data in missed:
+                yield comment_event(data)
+                last_event_id = data['id']
+            if len(missed) < REPLAY_CHUNK_SIZE:
+                break
+        while True:
+            try:
+                data = await asyncio.wait_for(
+                    subscription.get(), options['HEARTBEAT']
+                )
+            except asyncio.TimeoutError:
+                yield HEARTBEAT_EVENT
+                continue
+            if data is None:
+                return
+            if last_event_id is None or data['id'] > last_event_id:
+                yield comment_event(data)
@@ -0,0 +1,242 @@
+"""Модуль ограничения частоты запросов и сброса нагрузки.
+
+Частота запросов ограничивается корзинами токенов в памяти процесса:
+корзина на пару «маршрут — пользователь» (для анонимных запросов —
+адрес клиента) пополняется с постоянной скоростью, и каждый запрос
+забирает из неё токен. Проверка не обращается к кешу и не берёт
+блокировок: при одновременных запросах одного клиента в разных потоках
+возможен лишний пропущенный запрос, что для защиты от перегрузки
+неважно.
+
+При нескольких процессах корзины можно согласовывать через общий кеш
+(CACHE_ALIAS): раз в SYNC_INTERVAL секунд процесс добавляет потраченные
+токены к общему счётчику окна и уменьшает свою корзину до остатка
+лимита, так что обращение к кешу приходится не на каждый запрос.
+"""
+import statistics
+import time
+from collections import OrderedDict, deque
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+THROTTLE_DEFAULTS = {
+    'ENABLED': True,
+    'RATES': {},
+    'CACHE_ALIAS': None,
+    'SYNC_INTERVAL': 1.0,
+    'MAX_BUCKETS': 100000,
+}
+SHEDDING_DEFAULTS = {
+    'ENABLED': False,
+    'MAX_IN_FLIGHT': 64,
+    'MAX_DB_LATENCY': 0.1,
+    'LATENCY_WINDOW': 100,
+    'MIN_SAMPLES': 20,
+    'PROBE_INTERVAL': 1.0,
+    'RETRY_AFTER': 1,
+    'EXEMPT_PATHS': ['/admin/', '/api/v1/metrics/'],
+}
+SHARED_KEY = 'api:throttle:{}:{}'
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def get_throttle_settings():
+    """Возвращает настройки ограничения частоты запросов."""
+    return {**THROTTLE_DEFAULTS, **getattr(settings, 'API_THROTTLING', {})}
+
+
+def get_shedding_settings():
+    """Возвращает настройки сброса нагрузки."""
+    return {**SHEDDING_DEFAULTS,
+            **getattr(settings, 'API_LOAD_SHEDDING', {})}
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """Разбирает частоту вида `100/min` в пару (запросов, секунд)."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+class TokenBucket:
+    """Корзина токенов одного клиента на одном маршруте."""
+
+    __slots__ = ('capacity', 'period', 'rate', 'tokens', 'updated',
+                 'pending', 'synced')
+
+    def __init__(self, capacity, period, now):
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = now
+        self.pending = 0
+        self.synced = now
+
+    def available(self, now):
+        """Возвращает число токенов с учётом пополнения."""
+        return min(self.capacity,
+                   self.tokens + (now - self.updated) * self.rate)
+
+    def consume(self, now):
+        """Забирает токен, если он есть."""
+        tokens = self.available(now)
+        self.updated = now
+        if tokens < 1:
+            self.tokens = tokens
+            return False
+        self.tokens = tokens - 1
+        self.pending += 1
+        return True
+
+    def wait(self):
+        """Возвращает время в секундах до появления токена."""
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def sync(self, cache, key, now, wall_time):
+        """Согласует корзину с общим счётчиком текущего окна в кеше."""
+        shared_key = SHARED_KEY.format(key, int(wall_time // self.period))
+        pending, self.pending = self.pending, 0
+        self.synced = now
+        if cache.add(shared_key, pending, timeout=self.period * 2):
+            used = pending
+        elif pending:
+            used = cache.incr(shared_key, pending)
+        else:
+            used = cache.get(shared_key, 0)
+        self.tokens = min(self.available(now), max(0, self.capacity - used))
+        self.updated = now
+
+
+class BucketStore:
+    """Корзины токенов процесса в порядке последнего обращения.
+
+    При превышении MAX_BUCKETS удаляются корзины, к которым дольше всего
+    не обращались, поэтому корзины активных клиентов сохраняются.
+    """
+
+    def __init__(self):
+        self.buckets = OrderedDict()
+
+    def get(self, key, capacity, period, now, max_size):
+        """Возвращает корзину клиента, создавая её при необходимости."""
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            self.evict(max_size - 1)
+            return self.buckets.setdefault(
+                key, TokenBucket(capacity, period, now)
+            )
+        try:
+            self.buckets.move_to_end(key)
+        except KeyError:
+            # Корзину только что удалил другой поток.
+            pass
+        return bucket
+
+    def evict(self, max_size):
+        """Удаляет давно не использованные корзины сверх max_size."""
+        while len(self.buckets) > max_size:
+            try:
+                self.buckets.popitem(last=False)
+            except KeyError:
+                break
+
+    def clear(self):
+        """Удаляет все корзины."""
+        self.buckets.clear()
+
+
+buckets = BucketStore()
+
+
+class RouteThrottle(BaseThrottle):
+    """Ограничивает частоту запросов к маршрутам из API_THROTTLING.
+
+    Маршрут — имя URL (`posts-list`, `comments-list`,
+    `api-token-auth`); частота задаётся в RATES строкой вида
+    `100/min`. Запросы к маршрутам без частоты не ограничиваются.
+    """
+
+    wait_time = None
+
+    def get_cache_key(self, request, route):
+        """Возвращает ключ корзины: маршрут и пользователь или адрес."""
+        if request.user and request.user.is_authenticated:
+            return f'{route}:user:{request.user.pk}'
+        return f'{route}:ip:{self.get_ident(request)}'
+
+    def get_ident(self, request):
+        """Возвращает адрес клиента.
+
+        X-Forwarded-For учитывается, только если в NUM_PROXIES задано
+        число прокси перед приложением: иначе клиент получал бы новую
+        корзину, подставляя в заголовок любой адрес.
+        """
+        if api_settings.NUM_PROXIES is None:
+            return request.META.get('REMOTE_ADDR')
+        return super().get_ident(request)
+
+    def allow_request(self, request, view):
+        """Пропускает запрос, если в корзине клиента есть токен."""
+        options = get_throttle_settings()
+        match = request.resolver_match
+        route = match.url_name if match else None
+        rate = options['RATES'].get(route) if options['ENABLED'] else None
+        if rate is None:
+            return True
+        capacity, period = parse_rate(rate)
+        key = self.get_cache_key(request, route)
+        now = time.monotonic()
+        bucket = buckets.get(key, capacity, period, now,
+                             options['MAX_BUCKETS'])
+        if (options['CACHE_ALIAS']
+                and now - bucket.synced >= options['SYNC_INTERVAL']):
+            bucket.sync(caches[options['CACHE_ALIAS']], key, now,
+                        time.time())
+        if bucket.consume(now):
+            return True
+        self.wait_time = bucket.wait()
+        return False
+
+    def wait(self):
+        """Возвращает время до следующего разрешённого запроса."""
+        return self.wait_time
+
+
+class LatencyMonitor:
+    """Медиана времени одного запроса к БД за последние запросы.
+
+    Хранит среднее время запроса к БД для последних window HTTP-запросов.
+    Сервер считается перегруженным, если замеров не меньше min_samples
+    и их медиана выше порога, поэтому единичный медленный запрос не
+    включает сброс. Если замеров нет дольше PROBE_INTERVAL (все запросы
+    сбрасываются), перегрузка снимается, а старые замеры отбрасываются.
+    """
+
+    def __init__(self, threshold, probe_interval, window, min_samples):
+        self.threshold = threshold
+        self.probe_interval = probe_interval
+        self.min_samples = min_samples
+        self.samples = deque(maxlen=window)
+        self.median = 0.0
+        self.updated = 0.0
+
+    def observe(self, queries, db_time, now):
+        """Учитывает запросы к БД одного HTTP-запроса."""
+        if not queries:
+            return
+        if now - self.updated >= self.probe_interval:
+            self.samples.clear()
+        self.samples.append(db_time / queries)
+        self.median = statistics.median(self.samples)
+        self.updated = now
+
+    def overloaded(self, now):
+        """Проверяет, превышает ли задержка БД порог."""
+        return (len(self.samples) >= self.min_samples
+                and self.median > self.threshold
+                and now - self.updated < self.probe_interval)
@@ -0,0 +1,345 @@
+"""Модуль предвычисленных лент постов.
+
+Лента — упорядоченный от новых к старым список идентификаторов постов,
+который хранится в кеше и обновляется сигналами при сохранении и
+удалении постов. Чтение страницы ленты — бинарный поиск позиции курсора
+в списке и выборка постов по первичному ключу, без сортировки таблицы
+постов. В кеше хранятся только последние записи; страницы за пределами
+этого окна дочитываются из БД по индексу.
+
+Изменения лент в процессе сериализуются блокировкой, а между
+процессами возможна потеря обновления при одновременной записи. Такие
+расхождения исправляются пересборкой ленты после истечения TIMEOUT.
+"""
+import calendar
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count
+
+from api.pagination import KeysetPagination
+from posts.models import Follow, Post
+
+TIMELINE_DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'SIZE': 1000,
+    'FEED_SIZE': 500,
+    'FANOUT_THRESHOLD': 1000,
+    'TIMEOUT': 24 * 60 * 60,
+}
+TIMELINE_KEY = 'api:timeline:{}'
+PULLED_AUTHORS_KEY = 'api:timeline:pulled-authors'
+TIMELINE_ORDERING = ('-pub_date', '-id')
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+_lock = Lock()
+
+
+def get_timeline_settings():
+    """Возвращает настройки лент."""
+    return {**TIMELINE_DEFAULTS, **getattr(settings, 'API_TIMELINES', {})}
+
+
+def get_cache():
+    """Возвращает кеш, в котором хранятся ленты."""
+    return caches[get_timeline_settings()['CACHE_ALIAS']]
+
+
+def make_entry(pub_date, post_id):
+    """Возвращает запись ленты для поста.
+
+    Запись — пара отрицательных значений (микросекунды даты, id), так
+    что возрастающий порядок записей соответствует порядку «сначала
+    новые».
+    """
+    microseconds = (calendar.timegm(pub_date.utctimetuple()) * 10 ** 6
+                    + pub_date.microsecond)
+    return (-microseconds, -post_id)
+
+
+def entry_position(entry):
+    """Возвращает дату публикации и id поста из записи ленты."""
+    return [EPOCH + timedelta(microseconds=-entry[0]), -entry[1]]
+
+
+def read_entries(queryset, after=None, limit=None):
+    """Читает записи ленты из queryset постов, начиная после курсора."""
+    queryset = queryset.order_by(*TIMELINE_ORDERING)
+    if after is not None:
+        queryset = queryset.filter(KeysetPagination.after(
+            TIMELINE_ORDERING, entry_position(after)
+        ))
+    rows = queryset.values_list('pub_date', 'id')[:limit]
+    return [make_entry(*row) for row in rows]
+
+
+class Timeline:
+    """Лента постов в кеше с дочитыванием из queryset.
+
+    get_source() возвращает queryset всех постов ленты; он используется
+    для сборки ленты при промахе кеша и для страниц за пределами окна из
+    size последних записей.
+    """
+
+    def __init__(self, name, source=None, size=None):
+        self.key = TIMELINE_KEY.format(name)
+        self.source = source
+        self.settings = get_timeline_settings()
+        self.size = size or self.settings['SIZE']
+        self.cache = caches[self.settings['CACHE_ALIAS']]
+
+    def get_source(self):
+        """Возвращает queryset всех постов ленты."""
+        return self.source
+
+    def collect(self):
+        """Читает из БД окно ленты."""
+        entries = read_entries(self.get_source(), limit=self.size + 1)
+        return {'entries': entries[:self.size],
+                'complete': len(entries) <= self.size}
+
+    def build(self):
+        """Собирает окно ленты из БД и сохраняет его в кеш."""
+        data = self.collect()
+        self.cache.set(self.key, data, self.settings['TIMEOUT'])
+        return data
+
+    def load(self):
+        """Возвращает окно ленты, собирая его при промахе кеша."""
+        data = self.cache.get(self.key)
+        if data is None:
+            data = self.build()
+        return data
+
+    def insert(self, data, entry):
+        """Вставляет запись в окно ленты и сообщает, изменилось ли оно."""
+        entries = data['entries']
+        index = bisect_left(entries, entry)
+        if index < len(entries) and entries[index] == entry:
+            return False
+        if index == len(entries) and not data['complete']:
+            return False
+        entries.insert(index, entry)
+        if len(entries) > self.size:
+            entries.pop()
+            data['complete'] = False
+        return True
+
+    @staticmethod
+    def discard(data, post_id):
+        """Удаляет пост из окна ленты и сообщает, изменилось ли оно."""
+        entries = [entry for entry in data['entries']
+                   if entry[1] != -post_id]
+        changed = len(entries) != len(data['entries'])
+        data['entries'] = entries
+        return changed
+
+    def add(self, pub_date, post_id):
+        """Вставляет пост в ленту, если она уже есть в кеше."""
+        add_to_timelines([self], pub_date, post_id)
+
+    def remove(self, post_id):
+        """Удаляет пост из ленты, если она уже есть в кеше."""
+        remove_from_timelines([self], post_id)
+
+    def clear(self):
+        """Удаляет ленту из кеша."""
+        self.cache.delete(self.key)
+
+    def read(self, after, limit):
+        """Возвращает до limit записей после курсора after.
+
+        after — запись, на которой закончилась предыдущая страница, или
+        None для первой страницы.
+        """
+        return self.read_window(self.load(), after, limit)
+
+    def read_window(self, data, after, limit):
+        """Читает записи из окна ленты, дочитывая недостающие из БД."""
+        entries = data['entries']
+        start = 0 if after is None else bisect_right(entries, after)
+        chunk = entries[start:start + limit]
+        if len(chunk) < limit and not data['complete']:
+            last = chunk[-1] if chunk else after
+            chunk += read_entries(self.get_source(), last,
+                                  limit - len(chunk))
+        return chunk
+
+    def page(self, after, limit):
+        """Возвращает записи страницы и признак следующей страницы."""
+        chunk = self.read(after, limit + 1)
+        return chunk[:limit], len(chunk) > limit
+
+
+def update_timelines(timelines, change):
+    """Применяет change(timeline, data) к лентам, которые есть в кеше.
+
+    Ленты читаются и записываются пакетно, поэтому рассылка поста
+    подписчикам стоит два обращения к кешу независимо от их числа.
+    """
+    if not timelines:
+        return
+    cache = get_cache()
+    with _lock:
+        found = cache.get_many([timeline.key for timeline in timelines])
+        changed = {
+            timeline.key: found[timeline.key] for timeline in timelines
+            if timeline.key in found and change(timeline,
+                                                found[timeline.key])
+        }
+        if changed:
+            cache.set_many(changed, get_timeline_settings()['TIMEOUT'])
+
+
+def add_to_timelines(timelines, pub_date, post_id):
+    """Вставляет пост во все ленты из списка."""
+    entry = make_entry(pub_date, post_id)
+    update_timelines(
+        timelines, lambda timeline, data: timeline.insert(data, entry)
+    )
+
+
+def remove_from_timelines(timelines, post_id):
+    """Удаляет пост из всех лент списка."""
+    update_timelines(
+        timelines, lambda timeline, data: timeline.discard(data, post_id)
+    )
+
+
+def group_timeline(group_id):
+    """Возвращает ленту постов группы."""
+    return Timeline(f'group:{group_id}',
+                    Post.objects.filter(group_id=group_id))
+
+
+def author_timeline(author_id):
+    """Возвращает ленту постов автора."""
+    return Timeline(f'author:{author_id}',
+                    Post.objects.filter(author_id=author_id),
+                    size=get_timeline_settings()['FEED_SIZE'])
+
+
+class HomeTimeline(Timeline):
+    """Лента подписок пользователя с гибридной рассылкой.
+
+    Посты обычных авторов при публикации рассылаются в ленты подписчиков
+    (fan-out on write). Посты авторов, у которых подписчиков больше
+    FANOUT_THRESHOLD, не рассылаются, а при чтении подмешиваются из лент
+    этих авторов (fan-out on read). Список таких авторов из подписок
+    хранится в окне ленты, поэтому чтение из кеша не обращается к БД.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        super().__init__(f'home:{user_id}',
+                         size=get_timeline_settings()['FEED_SIZE'])
+
+    def get_source(self):
+        """Возвращает посты всех авторов из подписок пользователя."""
+        return Post.objects.filter(author_id__in=Follow.objects.filter(
+            user_id=self.user_id
+        ).values('following_id'))
+
+    def collect(self):
+        """Читает окно ленты и популярных авторов из подписок."""
+        data = super().collect()
+        authors = get_pulled_authors()
+        data['pulled'] = list(Follow.objects.filter(
+            user_id=self.user_id, following_id__in=authors
+        ).values_list('following_id', flat=True)) if authors else []
+        return data
+
+    def read(self, after, limit):
+        """Объединяет разосланные записи с лентами популярных авторов."""
+        data = self.load()
+        entries = set(self.read_window(data, after, limit))
+        for author_id in data['pulled']:
+            entries.update(author_timeline(author_id).read(after, limit))
+        return sorted(entries)[:limit]
+
+
+def home_timelines(user_ids):
+    """Возвращает ленты подписок пользователей."""
+    return [HomeTimeline(user_id) for user_id in user_ids]
+
+
+def get_pulled_authors():
+    """Возвращает множество авторов, посты которых не рассылаются.
+
+    Множество хранится в кеше и при промахе вычисляется группировкой
+    подписок по автору.
+    """
+    cache = get_cache()
+    authors = cache.get(PULLED_AUTHORS_KEY)
+    if authors is None:
+        authors = set(
+            Follow.objects.values('following_id')
+            .annotate(followers=Count('id'))
+            .filter(followers__gt=get_timeline_settings()['FANOUT_THRESHOLD'])
+            .values_list('following_id', flat=True)
+        )
+        cache.set(PULLED_AUTHORS_KEY, authors,
+                  get_timeline_settings()['TIMEOUT'])
+    return authors
+
+
+def fan_out_post(author_id, pub_date, post_id):
+    """Добавляет пост в ленту автора и рассылает его подписчикам.
+
+    Лента автора обновляется всегда, как и при удалении поста: иначе
+    после возврата автора в популярные её окно в кеше осталось бы без
+    постов, опубликованных в промежутке.
+    """
+    author_timeline(author_id).add(pub_date, post_id)
+    if author_id in get_pulled_authors():
+        return
+    followers = Follow.objects.filter(
+        following_id=author_id
+    ).values_list('user_id', flat=True)
+    add_to_timelines(home_timelines(followers), pub_date, post_id)
+
+
+def fan_out_removal(author_id, post_id):
+    """Удаляет пост из лент подписчиков и из ленты автора."""
+    author_timeline(author_id).remove(post_id)
+    if author_id in get_pulled_authors():
+        return
+    followers = Follow.objects.filter(
+        following_id=author_id
+    ).values_list('user_id', flat=True)
+    remove_from_timelines(home_timelines(followers), post_id)
+
+
+def follows_changed(user_id, author_id):
+    """Обновляет ленты после подписки или отписки.
+
+    Лента подписчика удаляется и соберётся заново при чтении. Если автор
+    перешёл порог числа подписчиков, меняется множество авторов, посты
+    которых подмешиваются при чтении, и ленты всех его подписчиков
+    удаляются: в них либо нет его новых постов, либо устарел список
+    подмешиваемых авторов.
+    """
+    HomeTimeline(user_id).clear()
+    options = get_timeline_settings()
+    authors = get_pulled_authors()
+    threshold = options['FANOUT_THRESHOLD']
+    pulled = Follow.objects.filter(
+        following_id=author_id
+    )[threshold:threshold + 1].exists()
+    if pulled == (author_id in authors):
+        return
+    if pulled:
+        authors.add(author_id)
+    else:
+        authors.discard(author_id)
+    cache = get_cache()
+    cache.set(PULLED_AUTHORS_KEY, authors, options['TIMEOUT'])
+    followers = Follow.objects.filter(
+        following_id=author_id
+    ).values_list('user_id', flat=True)
+    cache.delete_many(
+        [timeline.key for timeline in home_timelines(followers)]
+    )
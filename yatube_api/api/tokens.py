@@ -0,0 +1,140 @@
+"""Модуль подписанных токенов с ограниченным сроком действия.
+
+Токен — подписанная SECRET_KEY строка django.core.signing с
+идентификатором пользователя, идентификатором самого токена, сроком
+действия и отпечатком хеша пароля, поэтому проверка токена не читает
+таблицу токенов. Токены, отозванные до истечения срока, хранятся в
+таблице RevokedToken, а проверка сверяется с их списком в памяти
+процесса, который перечитывается раз в REFRESH_INTERVAL секунд. Смена
+пароля меняет отпечаток и отзывает все токены пользователя без записей
+в БД.
+"""
+import secrets
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+from threading import Lock
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+from api.models import RevokedToken
+
+SIGNED_TOKENS_DEFAULTS = {
+    'LIFETIME': 60 * 60,
+    'REFRESH_INTERVAL': 30,
+}
+TOKEN_SALT = 'api.tokens'
+
+
+def get_signed_tokens_settings():
+    """Возвращает настройки подписанных токенов."""
+    return {**SIGNED_TOKENS_DEFAULTS,
+            **getattr(settings, 'API_SIGNED_TOKENS', {})}
+
+
+@dataclass(frozen=True)
+class SignedToken:
+    """Проверенное содержимое подписанного токена."""
+
+    user_id: int
+    jti: str
+    fingerprint: str
+    expires: datetime
+
+
+def password_fingerprint(user):
+    """Возвращает короткий отпечаток хеша пароля пользователя."""
+    return salted_hmac(TOKEN_SALT, user.password).hexdigest()[:8]
+
+
+def issue(user):
+    """Выпускает токен пользователя и возвращает его со сроком действия."""
+    expires = int(time.time()) + get_signed_tokens_settings()['LIFETIME']
+    token = signing.Signer(salt=TOKEN_SALT).sign_object({
+        'u': user.pk,
+        'j': secrets.token_hex(8),
+        'p': password_fingerprint(user),
+        'e': expires,
+    })
+    return {'token': token,
+            'expires': datetime.fromtimestamp(expires, dt_timezone.utc)}
+
+
+def parse(value):
+    """Проверяет подпись и срок действия токена.
+
+    Для поддельного токена выбрасывает signing.BadSignature, для
+    просроченного — signing.SignatureExpired.
+    """
+    try:
+        payload = signing.Signer(salt=TOKEN_SALT).unsign_object(value)
+        token = SignedToken(payload['u'], payload['j'], payload['p'],
+                            datetime.fromtimestamp(payload['e'],
+                                                   dt_timezone.utc))
+    except (KeyError, TypeError, ValueError) as error:
+        raise signing.BadSignature('Некорректный токен.') from error
+    if token.expires <= timezone.now():
+        raise signing.SignatureExpired('Срок действия токена истёк.')
+    return token
+
+
+class RevocationList:
+    """Идентификаторы отозванных токенов, срок которых не истёк.
+
+    Проверка читает неизменяемое множество без блокировок; раз в
+    REFRESH_INTERVAL секунд один из потоков перечитывает его из БД, а
+    остальные до конца обновления проверяют по прежнему множеству.
+    """
+
+    def __init__(self):
+        self.revoked = frozenset()
+        self.refreshed = None
+        self.lock = Lock()
+
+    def __contains__(self, jti):
+        self.refresh_if_stale()
+        return jti in self.revoked
+
+    def refresh_if_stale(self):
+        """Перечитывает список, если он устарел."""
+        interval = get_signed_tokens_settings()['REFRESH_INTERVAL']
+        if (self.refreshed is not None
+                and time.monotonic() - self.refreshed < interval):
+            return
+        # Пока список не загружен ни разу, проверки ждут загрузки.
+        if self.lock.acquire(blocking=self.refreshed is None):
+            try:
+                self.refresh()
+            finally:
+                self.lock.release()
+
+    def refresh(self):
+        """Загружает из БД токены, срок которых не истёк."""
+        self.revoked = frozenset(RevokedToken.objects.filter(
+            expires__gt=timezone.now()
+        ).values_list('jti', flat=True))
+        self.refreshed = time.monotonic()
+
+    def add(self, jti):
+        """Добавляет токен в список процесса до следующего обновления."""
+        self.revoked = self.revoked | {jti}
+
+    def clear(self):
+        """Сбрасывает список; он загрузится при следующей проверке."""
+        self.revoked = frozenset()
+        self.refreshed = None
+
+
+revocations = RevocationList()
+
+
+def revoke(token):
+    """Отзывает токен и удаляет из БД записи о просроченных токенах."""
+    RevokedToken.objects.filter(expires__lte=timezone.now()).delete()
+    RevokedToken.objects.get_or_create(
+        jti=token.jti, defaults={'expires': token.expires}
+    )
+    revocations.add(token.jti)
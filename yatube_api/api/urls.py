@@ -1,19 +1,40 @@
 """Модуль URL-конфигурации для приложения API."""
 from django.urls import include, path
-from rest_framework.authtoken import views
 from rest_framework.routers import DefaultRouter
 
-from .views import CommentViewSet, GroupViewSet, PostViewSet
+from .views import (ChangesView, CommentStreamView, CommentViewSet, FeedView,
+                    FollowViewSet, GroupPostsView, GroupViewSet, MetricsView,
+                    PostViewSet, SignedTokenRefreshView,
+                    SignedTokenRevokeView, SignedTokenView, TokenAuthView)
 
 v1_router = DefaultRouter()
 v1_router.register('posts', PostViewSet, basename='posts')
 v1_router.register('groups', GroupViewSet, basename='groups')
+v1_router.register('follow', FollowViewSet, basename='follow')
 v1_router.register(r'posts/(?P<post_id>\d+)/comments',
                    CommentViewSet, basename='comments'
                    )
 
 urlpatterns = [
     path('v1/', include(v1_router.urls)),
-    path('v1/api-token-auth/', views.obtain_auth_token),
+    path('v1/groups/<slug:slug>/posts/', GroupPostsView.as_view(),
+         name='group-posts'),
+    path('v1/feed/', FeedView.as_view(), name='feed'),
+    path('v1/changes/', ChangesView.as_view(), name='changes'),
+    path('v1/api-token-auth/', TokenAuthView.as_view(),
+         name='api-token-auth'),
+    path('v1/tokens/', SignedTokenView.as_view(), name='tokens'),
+    path('v1/tokens/refresh/', SignedTokenRefreshView.as_view(),
+         name='tokens-refresh'),
+    path('v1/tokens/revoke/', SignedTokenRevokeView.as_view(),
+         name='tokens-revoke'),
+    path('v1/metrics/', MetricsView.as_view(), name='metrics'),
 
 ]
+
+# Потоки событий держат соединение открытым и подключаются только под
+# ASGI, в yatube_api.urls_asgi.
+stream_urlpatterns = [
+    path('v1/posts/<int:post_id>/comments/stream/',
+         CommentStreamView.as_view(), name='comments-stream'),
+]
@@ -1,52 +1,308 @@
 """Модуль представлений (views) для API."""
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 
-from rest_framework import permissions, viewsets
+from rest_framework import (filters, generics, mixins, permissions, status,
+                            viewsets)
+from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
+from api import caching, changes, streams, tokens
+from api.authentication import SignedTokenAuthentication
+from api.events import EventStreamRenderer, EventStreamResponse
+from api.filters import KeysetOrderingFilter, PostFilter, PostSearchFilter
+from api.instrumentation import password_metrics, registry
+from api.mixins import (AtomicWriteMixin, BulkModelMixin,
+                        ConditionalResponseMixin, FastReadMixin,
+                        OptimizedQuerySetMixin, ReplicaReadMixin,
+                        SparseFieldsMixin, StreamingListMixin,
+                        TimelineListMixin)
+from api.pagination import (CommentPagination, PostPagination,
+                            TimelinePagination)
 from api.permissions import IsAuthorOrReadOnly
-from api.serializers import CommentSerializer, GroupSerializer, PostSerializer
+from api.serializers import (CommentSerializer, FollowSerializer,
+                             GroupSerializer, PostSerializer,
+                             TokenAuthSerializer)
+from api.throttling import RouteThrottle
+from api.timelines import HomeTimeline, group_timeline
 from posts.models import Comment, Group, Post
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(ReplicaReadMixin, ConditionalResponseMixin,
+                  OptimizedQuerySetMixin, SparseFieldsMixin, FastReadMixin,
+                  StreamingListMixin, BulkModelMixin, AtomicWriteMixin,
+                  viewsets.ModelViewSet):
     """Вьюсет для работы с постами."""
 
     queryset = Post.objects.all()
     serializer_class = PostSerializer
+    pagination_class = PostPagination
+    filter_backends = [PostSearchFilter, PostFilter, KeysetOrderingFilter]
+    ordering_fields = ['pub_date', 'id']
     permission_classes = [permissions.IsAuthenticated, IsAuthorOrReadOnly]
 
+    def get_cache_scopes(self):
+        """Возвращает области данных для списка или одного поста."""
+        if self.action == 'retrieve':
+            return [caching.post_scope(self.kwargs['pk']),
+                    caching.GROUPS_SCOPE]
+        return [caching.POSTS_SCOPE, caching.GROUPS_SCOPE]
+
     def perform_create(self, serializer):
         """Сохраняет новый пост с автором, указанным в запросе."""
         serializer.save(author=self.request.user)
 
+    def get_bulk_save_kwargs(self):
+        """Задаёт автора для постов, создаваемых пакетом."""
+        return {'author': self.request.user}
+
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ReplicaReadMixin, ConditionalResponseMixin,
+                     OptimizedQuerySetMixin, SparseFieldsMixin, FastReadMixin,
+                     StreamingListMixin, BulkModelMixin, AtomicWriteMixin,
+                     viewsets.ModelViewSet):
     """Вьюсет для работы с комментариями."""
 
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
+    pagination_class = CommentPagination
     permission_classes = [permissions.IsAuthenticated, IsAuthorOrReadOnly]
 
     def get_post(self):
-        """Возвращает объект поста или вызывает 404."""
-        post_id = self.kwargs['post_id']
-        return get_object_or_404(Post, id=post_id)
+        """Возвращает объект поста или вызывает 404.
+
+        Пост запрашивается из БД не больше одного раза за запрос.
+        """
+        if not hasattr(self, '_post'):
+            self._post = get_object_or_404(Post, id=self.kwargs['post_id'])
+        return self._post
 
     def get_queryset(self):
-        """Возвращает комментарии для указанного поста."""
-        post = self.get_post()
-        return post.comments.all()
+        """Возвращает комментарии для указанного поста.
+
+        Пост отдельно не запрашивается: для чтения одного комментария
+        отсутствие поста и так даёт 404, а для списка существование поста
+        проверяется, только если комментариев не нашлось.
+        """
+        return super().get_queryset().filter(post_id=self.kwargs['post_id'])
+
+    def list(self, request, *args, **kwargs):
+        """Возвращает комментарии к посту или 404, если поста нет."""
+        if self.is_stream_requested():
+            self.get_post()
+        response = super().list(request, *args, **kwargs)
+        data = getattr(response, 'data', None)
+        if isinstance(data, dict):
+            data = data.get('results')
+        if response.status_code == 200 and data == []:
+            self.get_post()
+        return response
+
+    def get_cache_scopes(self):
+        """Возвращает область данных комментариев к посту."""
+        return [caching.comments_scope(self.kwargs['post_id'])]
 
     def perform_create(self, serializer):
         """Сохраняет новый комментарий с автором и постом."""
         post = self.get_post()
         serializer.save(author=self.request.user, post=post)
 
+    def get_bulk_save_kwargs(self):
+        """Задаёт автора и пост для комментариев, создаваемых пакетом."""
+        return {'author': self.request.user, 'post': self.get_post()}
+
+
+class CommentStreamView(APIView):
+    """Новые комментарии к посту потоком server-sent events.
 
-class GroupViewSet(ReadOnlyModelViewSet):
+    Работает только под ASGI (yatube_api.urls_asgi): открытый поток не
+    занимает поток сервера. Клиент, переподключившийся с заголовком
+    Last-Event-ID или параметром `?last_event_id=`, получает и
+    комментарии, созданные, пока он был отключён.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+
+    def get_last_event_id(self):
+        """Возвращает id последнего полученного клиентом комментария."""
+        value = self.request.headers.get(
+            'Last-Event-ID', self.request.query_params.get('last_event_id')
+        )
+        if value is None:
+            return None
+        if not (value.isascii() and value.isdigit()):
+            raise ValidationError(
+                {'last_event_id': ['Ожидается id комментария.']}
+            )
+        return int(value)
+
+    def get(self, request, post_id):
+        """Открывает поток комментариев или возвращает 404 без поста."""
+        get_object_or_404(Post.objects.only('id'), id=post_id)
+        return EventStreamResponse(
+            streams.comment_events(post_id, self.get_last_event_id())
+        )
+
+
+class GroupViewSet(ReplicaReadMixin, ConditionalResponseMixin,
+                   OptimizedQuerySetMixin, SparseFieldsMixin, FastReadMixin,
+                   ReadOnlyModelViewSet):
     """Вьюсет для работы с группами."""
 
     queryset = Group.objects.all()
     serializer_class = GroupSerializer
     permission_classes = [permissions.IsAuthenticated]
+
+    def get_cache_scopes(self):
+        """Возвращает область данных групп."""
+        return [caching.GROUPS_SCOPE]
+
+
+class GroupPostsView(ConditionalResponseMixin, OptimizedQuerySetMixin,
+                     SparseFieldsMixin, FastReadMixin, TimelineListMixin,
+                     generics.ListAPIView):
+    """Лента постов группы по её слагу."""
+
+    queryset = Post.objects.all()
+    serializer_class = PostSerializer
+    pagination_class = TimelinePagination
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_cache_scopes(self):
+        """Возвращает области данных постов и групп."""
+        return [caching.POSTS_SCOPE, caching.GROUPS_SCOPE]
+
+    def get_timeline(self):
+        """Возвращает ленту группы или вызывает 404, если группы нет."""
+        group = get_object_or_404(
+            Group.objects.only('id'), slug=self.kwargs['slug']
+        )
+        return group_timeline(group.id)
+
+
+class FeedView(OptimizedQuerySetMixin, SparseFieldsMixin, FastReadMixin,
+               TimelineListMixin, generics.ListAPIView):
+    """Лента постов авторов, на которых подписан пользователь."""
+
+    queryset = Post.objects.all()
+    serializer_class = PostSerializer
+    pagination_class = TimelinePagination
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_timeline(self):
+        """Возвращает ленту подписок текущего пользователя."""
+        return HomeTimeline(self.request.user.id)
+
+
+class FollowViewSet(ReplicaReadMixin, mixins.CreateModelMixin,
+                    mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Вьюсет для подписок текущего пользователя."""
+
+    serializer_class = FollowSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [filters.SearchFilter]
+    search_fields = ['following__username']
+
+    def get_queryset(self):
+        """Возвращает подписки текущего пользователя."""
+        return self.request.user.follower.select_related(
+            'user', 'following'
+        )
+
+    def perform_create(self, serializer):
+        """Сохраняет подписку от имени текущего пользователя."""
+        serializer.save(user=self.request.user)
+
+
+class ChangesView(ReplicaReadMixin, APIView):
+    """Изменения постов, комментариев и групп после курсора `?since=`.
+
+    Без курсора возвращается только курсор последнего изменения: клиент
+    запоминает его перед полной загрузкой данных и дальше запрашивает
+    изменения после него.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        """Возвращает пачку изменений и курсор для следующего запроса."""
+        since = request.query_params.get('since')
+        if since is None:
+            return Response({'cursor': str(changes.latest_cursor())})
+        return Response(changes.read_changes(
+            changes.parse_cursor(since),
+            changes.get_changes_settings()['BATCH_SIZE'],
+            {'request': request},
+        ))
+
+
+class TokenAuthView(ObtainAuthToken):
+    """Выдача токена по логину и паролю.
+
+    Частота попыток ограничена, а пароль проверяется в пуле процессов
+    (api.passwords), а не в потоке запроса. Под ASGI представление
+    выполняется в пуле потоков чтения, чтобы входы проверялись
+    параллельно и не задерживали запись в общем потоке.
+    """
+
+    throttle_classes = [RouteThrottle]
+    serializer_class = TokenAuthSerializer
+    async_read_pool = True
+
+
+class SignedTokenView(APIView):
+    """Выдача подписанного токена с ограниченным сроком действия."""
+
+    authentication_classes = ()
+    permission_classes = ()
+    throttle_classes = [RouteThrottle]
+    async_read_pool = True
+
+    def post(self, request):
+        """Проверяет логин и пароль и возвращает токен и срок действия."""
+        serializer = TokenAuthSerializer(data=request.data,
+                                         context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        return Response(tokens.issue(serializer.validated_data['user']))
+
+
+class SignedTokenRefreshView(APIView):
+    """Замена подписанного токена новым; прежний токен отзывается."""
+
+    authentication_classes = [SignedTokenAuthentication]
+    throttle_classes = [RouteThrottle]
+
+    def post(self, request):
+        """Отзывает токен запроса и возвращает новый."""
+        tokens.revoke(request.auth)
+        return Response(tokens.issue(request.user))
+
+
+class SignedTokenRevokeView(APIView):
+    """Отзыв подписанного токена до истечения срока действия."""
+
+    authentication_classes = [SignedTokenAuthentication]
+
+    def post(self, request):
+        """Отзывает токен запроса."""
+        tokens.revoke(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class MetricsView(APIView):
+    """Метрики производительности в текстовом формате Prometheus."""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        """Возвращает накопленные метрики по представлениям."""
+        return HttpResponse(
+            registry.render_prometheus()
+            + password_metrics.render_prometheus(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
@@ -1,7 +1,8 @@
 """Модуль административной панели для управления моделями приложения."""
 from django.contrib import admin
 
-from .models import Comment, Group, Post
+from .models import Comment, Follow, Group, Post
+from .search import search_posts
 
 
 @admin.register(Post)
@@ -13,6 +14,13 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Ищет посты по полнотекстовому индексу вместо LIKE."""
+        if not search_term.strip():
+            return queryset, False
+        return search_posts(queryset, search_term), False
+
 
 admin.site.register(Group)
 admin.site.register(Comment)
+admin.site.register(Follow)
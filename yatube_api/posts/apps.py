@@ -8,3 +8,7 @@ class PostsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'posts'
     verbose_name = 'Посты'
+
+    def ready(self):
+        """Подключает обработчики сигналов."""
+        from . import signals  # noqa: F401
@@ -1,2 +1,10 @@
 """Константы."""
 TITLE_LENGTH = 30
+# Варианты изображения поста: имя и наибольшая сторона в пикселях
+# (None — исходный размер).
+IMAGE_VARIANTS = {
+    'small': 320,
+    'medium': 960,
+    'webp': None,
+}
+WEBP_QUALITY = 80
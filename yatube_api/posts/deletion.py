@@ -0,0 +1,69 @@
+"""Отметки постов, удаляемых в текущей транзакции.
+
+Комментарии удаляются каскадом раньше своего поста, и их обработчики по
+отметке поста узнают, что пост удаляется вместе с ними: счётчики поста
+не пересчитываются, а записи журнала изменений о комментариях
+откладываются и пишутся одним запросом с записью о посте.
+
+Отметка ставится в pre_delete поста, но удаление может прерваться
+исключением раньше post_delete. Поэтому отметка привязана к транзакции
+удаления: Django заменяет список обработчиков on_commit соединения при
+фиксации и откате транзакции и при откате точки сохранения, и отметка
+действует, только пока список тот же. Прерванное удаление не влияет на
+следующие удаления в том же потоке, а устаревшие отметки отбрасываются
+при следующей отметке.
+"""
+from dataclasses import dataclass, field
+from threading import local
+
+from django.db import connections
+
+_local = local()
+
+
+@dataclass
+class PostDeletion:
+    """Отметка поста, удаляемого в транзакции соединения using."""
+
+    using: str
+    hooks: list
+    comments: list = field(default_factory=list)
+
+    @property
+    def active(self):
+        """Не завершилась ли транзакция, в которой поставлена отметка."""
+        return self.hooks is connections[self.using].run_on_commit
+
+
+def _deletions():
+    """Возвращает отметки потока по ключу (алиас БД, id поста)."""
+    if not hasattr(_local, 'posts'):
+        _local.posts = {}
+    return _local.posts
+
+
+def begin_post_deletion(post_id, using):
+    """Отмечает пост, удаляемый в текущей транзакции."""
+    deletions = _deletions()
+    for key, deletion in list(deletions.items()):
+        if not deletion.active:
+            del deletions[key]
+    deletions[using, post_id] = PostDeletion(
+        using, connections[using].run_on_commit
+    )
+
+
+def get_post_deletion(post_id, using):
+    """Возвращает отметку поста, если он удаляется, иначе None."""
+    deletion = _deletions().get((using, post_id))
+    if deletion is None or not deletion.active:
+        return None
+    return deletion
+
+
+def finish_post_deletion(post_id, using):
+    """Снимает отметку удалённого поста и возвращает её или None."""
+    deletion = _deletions().pop((using, post_id), None)
+    if deletion is None or not deletion.active:
+        return None
+    return deletion
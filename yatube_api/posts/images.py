@@ -0,0 +1,153 @@
+"""Фоновая обработка изображений постов.
+
+Для загруженного изображения создаются уменьшенные копии в формате WebP,
+которые сохраняются рядом с оригиналом. Обработка идёт в пуле потоков с
+ограниченной очередью, поэтому запрос на создание поста не ждёт, пока
+изображение будет перекодировано.
+"""
+import logging
+import os
+import queue
+import threading
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections
+
+from .constants import IMAGE_VARIANTS, WEBP_QUALITY
+
+logger = logging.getLogger(__name__)
+
+IMAGE_PROCESSING_DEFAULTS = {
+    'ASYNC': True,
+    'WORKERS': 2,
+    'QUEUE_SIZE': 1000,
+}
+
+
+def get_image_processing_settings():
+    """Возвращает настройки обработки изображений."""
+    return {**IMAGE_PROCESSING_DEFAULTS,
+            **getattr(settings, 'POST_IMAGE_PROCESSING', {})}
+
+
+def variant_name(name, variant):
+    """Возвращает имя файла варианта рядом с оригиналом."""
+    stem, _ = os.path.splitext(name)
+    return f'{stem}_{variant}.webp'
+
+
+def generate_variants(storage, name):
+    """Создаёт варианты изображения и возвращает словарь их имён."""
+    from PIL import Image
+
+    with storage.open(name, 'rb') as source:
+        image = Image.open(source)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    variants = {}
+    for variant, size in IMAGE_VARIANTS.items():
+        copy = image.copy()
+        if size:
+            copy.thumbnail((size, size))
+        buffer = BytesIO()
+        copy.save(buffer, 'WEBP', quality=WEBP_QUALITY)
+        target = variant_name(name, variant)
+        if storage.exists(target):
+            storage.delete(target)
+        variants[variant] = storage.save(
+            target, ContentFile(buffer.getvalue())
+        )
+    return variants
+
+
+def delete_variants(storage, variants):
+    """Удаляет файлы вариантов."""
+    for variant, name in variants.items():
+        if variant != 'source' and name:
+            storage.delete(name)
+
+
+def process_post_image(post_id, name):
+    """Создаёт варианты изображения поста и сохраняет их в посте.
+
+    Варианты записываются запросом UPDATE только при том же изображении
+    поста, без сигналов post_save. Если за время обработки изображение
+    поста сменилось или пост удалён, созданные файлы удаляются.
+    """
+    from .models import Post
+
+    storage = Post._meta.get_field('image').storage
+    try:
+        variants = generate_variants(storage, name)
+    except Exception:
+        logger.exception('Не удалось обработать изображение %s', name)
+        return
+    updated = Post.objects.filter(pk=post_id, image=name).update(
+        image_variants={'source': name, **variants}
+    )
+    if not updated:
+        delete_variants(storage, variants)
+        return
+    from .signals import post_image_processed
+    post_image_processed.send(sender=Post, post_id=post_id)
+
+
+class ImageProcessor:
+    """Пул потоков с ограниченной очередью задач обработки изображений."""
+
+    def __init__(self):
+        self._queue = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        """Запускает потоки-обработчики при первой задаче."""
+        options = get_image_processing_settings()
+        self._queue = queue.Queue(maxsize=options['QUEUE_SIZE'])
+        for index in range(options['WORKERS']):
+            threading.Thread(
+                target=self._work, name=f'post-images-{index}', daemon=True
+            ).start()
+
+    def _work(self):
+        """Обрабатывает задачи из очереди."""
+        while True:
+            post_id, name = self._queue.get()
+            try:
+                process_post_image(post_id, name)
+            except Exception:
+                logger.exception('Ошибка обработки изображения поста %s',
+                                 post_id)
+            finally:
+                close_old_connections()
+                self._queue.task_done()
+
+    def submit(self, post_id, name):
+        """Ставит изображение поста в очередь на обработку.
+
+        Если фоновая обработка выключена, изображение обрабатывается
+        сразу. При переполненной очереди задача отбрасывается: такие
+        посты можно обработать командой process_post_images.
+        """
+        if not get_image_processing_settings()['ASYNC']:
+            process_post_image(post_id, name)
+            return
+        with self._lock:
+            if self._queue is None:
+                self._start()
+        try:
+            self._queue.put_nowait((post_id, name))
+        except queue.Full:
+            logger.warning('Очередь обработки изображений переполнена, '
+                           'пост %s пропущен', post_id)
+
+    def join(self):
+        """Ждёт завершения всех поставленных задач."""
+        if self._queue is not None:
+            self._queue.join()
+
+
+image_processor = ImageProcessor()
@@ -0,0 +1,31 @@
+"""Команда обработки изображений постов без вариантов."""
+from django.core.management.base import BaseCommand
+
+from posts.images import process_post_image
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    """Создаёт варианты изображений для постов, где их нет."""
+
+    help = 'Создаёт уменьшенные WebP-копии изображений постов.'
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы команды."""
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересоздать варианты для всех постов с изображением.'
+        )
+
+    def handle(self, *args, **options):
+        """Обрабатывает изображения постов по одному."""
+        posts = Post.objects.exclude(image='').exclude(image__isnull=True)
+        processed = 0
+        for post in posts.only('image', 'image_variants').iterator():
+            if (not options['all']
+                    and post.image_variants.get('source') == post.image.name):
+                continue
+            process_post_image(post.pk, post.image.name)
+            processed += 1
+        if options['verbosity']:
+            self.stdout.write(f'Обработано изображений: {processed}')
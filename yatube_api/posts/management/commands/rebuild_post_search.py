@@ -0,0 +1,28 @@
+"""Команда перестроения поискового индекса постов."""
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from posts.search import get_search_backend
+
+
+class Command(BaseCommand):
+    """Создаёт недостающий поисковый индекс и перестраивает его."""
+
+    help = 'Перестраивает полнотекстовый индекс постов.'
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы команды."""
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Алиас БД, в которой перестраивается индекс.'
+        )
+
+    def handle(self, *args, **options):
+        """Перестраивает индекс выбранной БД."""
+        backend = get_search_backend(options['database'])
+        backend.install()
+        backend.rebuild()
+        if options['verbosity']:
+            self.stdout.write(
+                f'Индекс перестроен: {type(backend).__name__}.'
+            )
@@ -0,0 +1,46 @@
+"""Команда пересчёта счётчиков комментариев постов."""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Min, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from posts.models import Comment, Post
+from posts.signals import last_comment_subquery, posts_bulk_updated
+
+
+class Command(BaseCommand):
+    """Пересчитывает comment_count и last_comment_at пачками постов."""
+
+    help = 'Пересчитывает счётчики комментариев и дату активности постов.'
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы команды."""
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество постов, обновляемых одним запросом.'
+        )
+
+    def handle(self, *args, **options):
+        """Обновляет посты диапазонами идентификаторов."""
+        batch_size = options['batch_size']
+        bounds = Post.objects.aggregate(first=Min('id'), last=Max('id'))
+        if bounds['last'] is None:
+            self.stdout.write('Постов нет.')
+            return
+        comment_count = Subquery(
+            Comment.objects.filter(post_id=OuterRef('pk')).order_by()
+            .values('post_id').annotate(total=Count('id')).values('total')
+        )
+        updated = 0
+        for start in range(bounds['first'], bounds['last'] + 1,
+                           batch_size):
+            with transaction.atomic():
+                updated += Post.objects.filter(
+                    id__gte=start, id__lt=start + batch_size
+                ).update(
+                    comment_count=Coalesce(comment_count, Value(0)),
+                    last_comment_at=last_comment_subquery(),
+                )
+        posts_bulk_updated.send(sender=Post)
+        if options['verbosity']:
+            self.stdout.write(f'Обновлено постов: {updated}')
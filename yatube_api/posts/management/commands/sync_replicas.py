@@ -0,0 +1,32 @@
+"""Команда копирования основной базы SQLite в реплики."""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from yatube_api.db.routers import get_replica_settings
+
+
+class Command(BaseCommand):
+    """Копирует основную базу в файлы реплик.
+
+    Заменяет репликацию при локальной проверке реплик на SQLite:
+    реплика получает снимок основной базы на момент запуска команды.
+    """
+
+    help = 'Копирует основную базу SQLite в реплики для чтения.'
+
+    def handle(self, *args, **options):
+        """Копирует основную базу в каждую реплику через backup()."""
+        aliases = get_replica_settings()['ALIASES']
+        if not aliases:
+            raise CommandError('Реплики не настроены в DATABASE_REPLICAS.')
+        source = connections[DEFAULT_DB_ALIAS]
+        for alias in (source.alias, *aliases):
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(f'База {alias} — не SQLite.')
+        source.ensure_connection()
+        for alias in aliases:
+            target = connections[alias]
+            target.ensure_connection()
+            source.connection.backup(target.connection)
+            if options['verbosity']:
+                self.stdout.write(f'Реплика {alias} обновлена.')
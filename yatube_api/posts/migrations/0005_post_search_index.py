@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def install_search_index(apps, schema_editor):
+    """Создаёт поисковый индекс постов для текущей БД."""
+    from posts.search import get_search_backend
+
+    get_search_backend(schema_editor.connection.alias).install()
+
+
+def uninstall_search_index(apps, schema_editor):
+    """Удаляет поисковый индекс постов."""
+    from posts.search import get_search_backend
+
+    get_search_backend(schema_editor.connection.alias).uninstall()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_post_comment_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
@@ -6,6 +6,8 @@ from .constants import TITLE_LENGTH
 
 User = get_user_model()
 
+POST_COUNTER_FIELDS = frozenset({'comment_count', 'last_comment_at'})
+
 
 class Group(models.Model):
     """Модель группы, содержащая информацию о заголовке, слагу и описании."""
@@ -42,6 +44,12 @@ class Post(models.Model):
         blank=True,
         verbose_name='Изображение'
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Варианты изображения'
+    )
     group = models.ForeignKey(
         Group,
         on_delete=models.SET_NULL,
@@ -50,11 +58,52 @@ class Post(models.Model):
         null=True,
         verbose_name='Группа'
     )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
+    last_comment_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Дата последнего комментария'
+    )
+
+    class Meta:
+        """Настройки модели Post."""
+
+        indexes = [
+            models.Index(fields=['pub_date', 'id'],
+                         name='post_pub_date_id_idx'),
+            models.Index(fields=['group', 'pub_date'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['author', 'pub_date'],
+                         name='post_author_pub_date_idx'),
+        ]
 
     def __str__(self):
         """Возвращает текст поста."""
         return self.text[:TITLE_LENGTH]
 
+    def save(self, *args, **kwargs):
+        """Сохраняет пост, не перезаписывая счётчики комментариев.
+
+        Счётчики меняются только запросами UPDATE с F-выражениями, а
+        значения в загруженном объекте могут устареть, поэтому при
+        изменении существующего поста без update_fields сохраняются
+        все загруженные поля, кроме счётчиков.
+        """
+        if (not self._state.adding and not kwargs.get('force_insert')
+                and kwargs.get('update_fields') is None):
+            skipped = POST_COUNTER_FIELDS | self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+                and field.name not in skipped
+            ]
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     """Модель комментария.
@@ -74,7 +123,46 @@ class Comment(models.Model):
         'Дата добавления', auto_now_add=True, db_index=True
     )
 
+    class Meta:
+        """Настройки модели Comment."""
+
+        indexes = [
+            models.Index(fields=['post', 'created', 'id'],
+                         name='comment_post_created_id_idx'),
+        ]
+
     def __str__(self):
         """Возвращает текст комментария."""
         return (f'{self.post} - {self.author.username}'
                 f' - {self.text[:TITLE_LENGTH]}')
+
+
+class Follow(models.Model):
+    """Модель подписки пользователя на автора."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower',
+        verbose_name='Подписчик'
+    )
+    following = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name='Автор'
+    )
+
+    class Meta:
+        """Настройки модели Follow."""
+
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'following'],
+                                    name='unique_follow'),
+            models.CheckConstraint(check=~models.Q(user=models.F('following')),
+                                   name='prevent_self_follow'),
+        ]
+
+    def __str__(self):
+        """Возвращает подписчика и автора."""
+        return f'{self.user} -> {self.following}'
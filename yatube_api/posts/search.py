@@ -0,0 +1,221 @@
+"""Полнотекстовый поиск по постам.
+
+Поиск выполняется через сменный бэкенд. Для SQLite текст постов
+индексируется виртуальной таблицей FTS5, которую синхронизируют триггеры
+на таблице постов, поэтому индекс обновляется и при bulk_create(), и при
+update() в обход сигналов. Для остальных СУБД используется простой
+поиск по вхождению слов.
+"""
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import DatabaseError, connections, router
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Post
+
+SEARCH_DEFAULTS = {
+    'BACKEND': None,
+    'MAX_TERMS': 16,
+}
+TERM_PATTERN = re.compile(r'\w+')
+
+
+def get_search_settings():
+    """Возвращает настройки поиска по постам."""
+    return {**SEARCH_DEFAULTS, **getattr(settings, 'POST_SEARCH', {})}
+
+
+def parse_terms(query):
+    """Разбивает поисковую строку на слова в нижнем регистре."""
+    terms = TERM_PATTERN.findall(query.lower())
+    return terms[:get_search_settings()['MAX_TERMS']]
+
+
+class BaseSearchBackend:
+    """Интерфейс бэкенда поиска по постам.
+
+    search() возвращает queryset постов, содержащих все слова запроса,
+    отсортированный по релевантности. install() и uninstall() вызываются
+    миграцией и после каждого migrate, rebuild() — командой
+    rebuild_post_search.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def search(self, queryset, query):
+        """Возвращает найденные посты по убыванию релевантности."""
+        raise NotImplementedError
+
+    def install(self):
+        """Создаёт структуры индекса, если их ещё нет."""
+
+    def uninstall(self):
+        """Удаляет структуры индекса."""
+
+    def rebuild(self):
+        """Перестраивает индекс по текущим данным."""
+
+
+class ContainsSearchBackend(BaseSearchBackend):
+    """Поиск по вхождению всех слов без индекса."""
+
+    def search(self, queryset, query):
+        """Фильтрует посты по вхождению каждого слова в текст."""
+        terms = parse_terms(query)
+        if not terms:
+            return queryset.none()
+        condition = Q()
+        for term in terms:
+            condition &= Q(text__icontains=term)
+        return queryset.filter(condition).order_by('-pub_date', '-id')
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """Поиск по индексу FTS5 с ранжированием по BM25.
+
+    Индекс хранит только словарь и ссылки на строки таблицы постов
+    (external content), сам текст в нём не дублируется. Последнее слово
+    запроса ищется по префиксу.
+    """
+
+    table = 'posts_post_fts'
+    triggers = {
+        'ai': 'AFTER INSERT ON {content} BEGIN {insert}; END',
+        'ad': 'AFTER DELETE ON {content} BEGIN {delete}; END',
+        'au': 'AFTER UPDATE OF text ON {content} BEGIN {delete}; '
+              '{insert}; END',
+    }
+
+    @classmethod
+    def is_available(cls, connection):
+        """Проверяет, что SQLite собран с модулем FTS5."""
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM pragma_module_list WHERE name = 'fts5'"
+                )
+                return cursor.fetchone() is not None
+        except DatabaseError:
+            return False
+
+    def quote(self, name):
+        """Экранирует имя таблицы или триггера."""
+        return self.connection.ops.quote_name(name)
+
+    @staticmethod
+    def match_expression(terms):
+        """Собирает выражение MATCH из слов запроса.
+
+        Каждое слово берётся в кавычки, поэтому операторы FTS5 в запросе
+        пользователя не интерпретируются.
+        """
+        return ' '.join(
+            [f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*']
+        )
+
+    def search(self, queryset, query):
+        """Соединяет посты с индексом и сортирует по рангу BM25."""
+        terms = parse_terms(query)
+        if not terms:
+            return queryset.none()
+        table = self.quote(self.table)
+        content = self.quote(Post._meta.db_table)
+        return queryset.extra(
+            tables=[self.table],
+            where=[f'{table}.rowid = {content}.id', f'{table} MATCH %s'],
+            params=[self.match_expression(terms)],
+            select={'search_rank': f'{table}.rank'},
+        ).order_by('search_rank', '-pub_date', '-id')
+
+    def get_trigger_names(self):
+        """Возвращает имена триггеров, поддерживающих индекс."""
+        return [f'{self.table}_{suffix}' for suffix in self.triggers]
+
+    def is_installed(self):
+        """Проверяет, что таблица индекса и все триггеры на месте."""
+        names = [self.table, *self.get_trigger_names()]
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT COUNT(*) FROM sqlite_master WHERE name IN '
+                f'({", ".join(["%s"] * len(names))})', names
+            )
+            return cursor.fetchone()[0] == len(names)
+
+    def install(self):
+        """Создаёт индекс и триггеры и заполняет индекс.
+
+        Пересоздание таблицы постов в миграциях SQLite удаляет триггеры,
+        поэтому установка повторяется после каждого migrate и
+        перестраивает индекс, только если чего-то не хватало.
+        """
+        if self.is_installed():
+            return
+        table = self.quote(self.table)
+        content = self.quote(Post._meta.db_table)
+        statements = {
+            'content': content,
+            'insert': f'INSERT INTO {table}(rowid, text) '
+                      'VALUES (new.id, new.text)',
+            'delete': f"INSERT INTO {table}({table}, rowid, text) "
+                      "VALUES ('delete', old.id, old.text)",
+        }
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5('
+                f"text, content={content}, content_rowid='id', "
+                "tokenize='unicode61 remove_diacritics 2')"
+            )
+            for suffix, body in self.triggers.items():
+                name = self.quote(f'{self.table}_{suffix}')
+                cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} '
+                               + body.format(**statements))
+        self.rebuild()
+
+    def uninstall(self):
+        """Удаляет триггеры и таблицу индекса."""
+        with self.connection.cursor() as cursor:
+            for name in self.get_trigger_names():
+                cursor.execute(f'DROP TRIGGER IF EXISTS {self.quote(name)}')
+            cursor.execute(f'DROP TABLE IF EXISTS {self.quote(self.table)}')
+
+    def rebuild(self):
+        """Перестраивает индекс по таблице постов."""
+        table = self.quote(self.table)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table}({table}) VALUES ('rebuild')"
+            )
+
+
+@lru_cache(maxsize=None)
+def detect_backend_class(alias):
+    """Выбирает класс бэкенда по возможностям подключения к БД."""
+    connection = connections[alias]
+    if (connection.vendor == 'sqlite'
+            and SQLiteFTS5Backend.is_available(connection)):
+        return SQLiteFTS5Backend
+    return ContainsSearchBackend
+
+
+def get_search_backend(using=None):
+    """Возвращает бэкенд поиска для БД, из которой читаются посты.
+
+    Бэкенд из настройки POST_SEARCH['BACKEND'] имеет приоритет над
+    выбранным автоматически.
+    """
+    alias = using or router.db_for_read(Post)
+    path = get_search_settings()['BACKEND']
+    if path:
+        backend_class = import_string(path)
+    else:
+        backend_class = detect_backend_class(alias)
+    return backend_class(connections[alias])
+
+
+def search_posts(queryset, query):
+    """Возвращает посты из queryset, найденные по строке query."""
+    return get_search_backend(queryset.db).search(queryset, query)
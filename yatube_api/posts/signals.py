@@ -0,0 +1,115 @@
+"""Модуль обработчиков сигналов моделей постов."""
+from django.db import connections, transaction
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import (post_delete, post_migrate, post_save,
+                                      pre_delete)
+from django.dispatch import Signal, receiver
+
+from .deletion import begin_post_deletion, get_post_deletion
+from .images import delete_variants, image_processor
+from .models import Comment, Post
+from .search import get_search_backend
+
+# Отправляется после изменения постов в обход save(), например при
+# пересчёте счётчиков комментариев.
+posts_bulk_updated = Signal()
+# Отправляется после записи вариантов изображения поста с аргументом
+# post_id.
+post_image_processed = Signal()
+
+SEARCH_MIGRATION = '0005_post_search_index'
+
+
+def last_comment_subquery():
+    """Возвращает подзапрос даты последнего комментария к посту."""
+    return Subquery(
+        Comment.objects.filter(post_id=OuterRef('pk'))
+        .order_by('-created').values('created')[:1]
+    )
+
+
+@receiver(post_save, sender=Post)
+def schedule_image_processing(sender, instance, raw=False,
+                              update_fields=None, **kwargs):
+    """Ставит новое изображение поста в очередь на обработку.
+
+    Ссылки на старые варианты сразу убираются, чтобы в ответах не было
+    копий предыдущего изображения, а их файлы удаляются после фиксации
+    транзакции.
+    """
+    if raw or (update_fields is not None and 'image' not in update_fields):
+        return
+    name = instance.image.name
+    variants = instance.image_variants or {}
+    if name and variants.get('source') == name:
+        return
+    if variants:
+        storage = instance.image.storage
+        transaction.on_commit(lambda: delete_variants(storage, variants))
+        Post.objects.filter(pk=instance.pk).update(image_variants={})
+        instance.image_variants = {}
+    if name:
+        transaction.on_commit(
+            lambda: image_processor.submit(instance.pk, name)
+        )
+
+
+@receiver(post_delete, sender=Post)
+def delete_image_variants(sender, instance, **kwargs):
+    """Удаляет варианты изображения поста после фиксации удаления.
+
+    При откате транзакции пост остаётся, и файлы его вариантов нужны.
+    """
+    variants = instance.image_variants
+    if variants:
+        storage = instance.image.storage
+        transaction.on_commit(lambda: delete_variants(storage, variants))
+
+
+@receiver(pre_delete, sender=Post)
+def mark_post_deleting(sender, instance, using, **kwargs):
+    """Отмечает удаляемый пост, чтобы не пересчитывать его счётчики."""
+    begin_post_deletion(instance.pk, using)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created=False, raw=False,
+                            **kwargs):
+    """Увеличивает счётчик комментариев поста и дату активности."""
+    if not created or raw:
+        return
+    Post.objects.filter(pk=instance.post_id).update(
+        comment_count=F('comment_count') + 1,
+        last_comment_at=Coalesce(
+            Greatest('last_comment_at', Value(instance.created)),
+            Value(instance.created)
+        ),
+    )
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, using, **kwargs):
+    """Уменьшает счётчик комментариев поста и пересчитывает дату."""
+    if get_post_deletion(instance.post_id, using) is not None:
+        return
+    Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1,
+        last_comment_at=last_comment_subquery(),
+    )
+
+
+@receiver(post_migrate)
+def install_search_index(sender, using, **kwargs):
+    """Восстанавливает поисковый индекс постов после migrate.
+
+    SQLite пересоздаёт таблицу при изменении её схемы, и триггеры
+    индекса при этом удаляются. Если миграция индекса откачена,
+    индекс не создаётся.
+    """
+    if sender.name != 'posts':
+        return
+    applied = MigrationRecorder(connections[using]).applied_migrations()
+    if (sender.label, SEARCH_MIGRATION) in applied:
+        get_search_backend(using).install()
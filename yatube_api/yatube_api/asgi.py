@@ -0,0 +1,97 @@
+"""
+ASGI config for yatube_api project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Requests are resolved with ``yatube_api.urls_asgi``, where API views are
+async and serve reads from a bounded thread pool.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
+"""
+
+import os
+from contextvars import ContextVar
+
+import django
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube_api.settings')
+
+ASGI_URLCONF = 'yatube_api.urls_asgi'
+
+_receive = ContextVar('receive')
+
+
+class YatubeASGIHandler(ASGIHandler):
+    """Обработчик ASGI, который разрешает адреса по ASGI_URLCONF.
+
+    Асинхронные потоковые ответы (`is_async`) отдаются по мере появления
+    событий, пока клиент не отключится, а синхронные потоковые ответы
+    перебираются в пуле потоков чтения, а не в цикле событий.
+    """
+
+    async def __call__(self, scope, receive, send):
+        token = _receive.set(receive)
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            _receive.reset(token)
+
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = ASGI_URLCONF
+        return request, error_response
+
+    async def send_response(self, response, send):
+        if getattr(response, 'is_async', False):
+            await self.send_event_stream(response, send)
+        elif response.streaming:
+            await self.send_pooled_stream(response, send)
+        else:
+            await super().send_response(response, send)
+
+    @staticmethod
+    async def start_response(response, send):
+        """Отправляет статус и заголовки ответа."""
+        headers = [
+            (name.encode('ascii'), value.encode('latin1'))
+            for name, value in response.items()
+        ]
+        headers += [
+            (b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+            for cookie in response.cookies.values()
+        ]
+        await send({'type': 'http.response.start',
+                    'status': response.status_code, 'headers': headers})
+
+    async def send_event_stream(self, response, send):
+        """Отправляет поток событий, пока клиент не отключится."""
+        from api.events import send_event_stream
+
+        await self.start_response(response, send)
+        try:
+            await send_event_stream(response, send, _receive.get())
+        finally:
+            await sync_to_async(response.close, thread_sensitive=True)()
+
+    async def send_pooled_stream(self, response, send):
+        """Отправляет потоковый ответ, перебирая его в пуле потоков."""
+        from api.async_views import iterate_in_pool
+
+        await self.start_response(response, send)
+        parts = iterate_in_pool(response)
+        try:
+            async for part in parts:
+                for chunk, _ in self.chunk_bytes(part):
+                    await send({'type': 'http.response.body', 'body': chunk,
+                                'more_body': True})
+            await send({'type': 'http.response.body'})
+        finally:
+            await parts.aclose()
+            await sync_to_async(response.close, thread_sensitive=True)()
+
+
+django.setup(set_prefix=False)
+application = YatubeASGIHandler()
@@ -0,0 +1,11 @@
+"""Бэкенд SQLite для продакшен-настроек.
+
+Подключается через `'ENGINE': 'yatube_api.db'` и дополнительно к
+стандартному бэкенду поддерживает ключи настроек базы:
+
+- `PRAGMAS` — словарь PRAGMA, которые выполняются при открытии
+  соединения (режим WAL, synchronous, mmap_size, busy_timeout);
+- `CONN_HEALTH_CHECKS` — проверка постоянного соединения запросом
+  `SELECT 1` перед первым использованием в каждом запросе;
+- `POOL` — пул открытых соединений, общий для потоков процесса.
+"""
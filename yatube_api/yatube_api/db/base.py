@@ -0,0 +1,116 @@
+"""Обёртка соединения SQLite с PRAGMA, проверкой и пулом соединений."""
+import time
+
+from django.db.backends.sqlite3 import base
+
+from yatube_api.db.pool import get_pool
+
+Database = base.Database
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Соединение SQLite с PRAGMA, проверкой и пулом соединений.
+
+    Настраивается ключами PRAGMAS, POOL, CONN_HEALTH_CHECKS и
+    TRANSACTION_MODE словаря базы. С пулом соединение возвращается в
+    него в конце каждого запроса, а CONN_MAX_AGE ограничивает время
+    жизни соединения в пуле.
+    База в памяти пулом не обслуживается.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connection_created_at = None
+        self.health_check_done = False
+
+    def get_pool(self):
+        """Возвращает пул соединений базы или None без пула."""
+        if not self.settings_dict.get('POOL') or self.is_in_memory_db():
+            return None
+        return get_pool(self.alias, self.settings_dict)
+
+    @property
+    def health_checks(self):
+        """Включена ли проверка соединений перед использованием."""
+        return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+    @staticmethod
+    def check_connection(connection):
+        """Проверяет, что соединение выполняет запросы."""
+        try:
+            connection.execute('SELECT 1')
+        except Database.Error:
+            return False
+        return True
+
+    def get_new_connection(self, conn_params):
+        """Берёт соединение из пула или открывает новое с PRAGMA."""
+        pool = self.get_pool()
+        if pool is not None:
+            pooled = pool.acquire(
+                self.check_connection if self.health_checks else None
+            )
+            if pooled is not None:
+                connection, self.connection_created_at = pooled
+                self.health_check_done = True
+                return connection
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict.get('PRAGMAS', {}).items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        self.connection_created_at = time.monotonic()
+        self.health_check_done = True
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        """Начинает транзакцию в режиме TRANSACTION_MODE.
+
+        Обычная транзакция SQLite берёт блокировку записи при первой
+        записи, и если другая транзакция уже пишет, запись сразу
+        завершается ошибкой «database is locked» без ожидания
+        busy_timeout. Транзакция IMMEDIATE берёт блокировку при начале
+        и ждёт её.
+        """
+        mode = self.settings_dict.get('TRANSACTION_MODE')
+        self.cursor().execute(f'BEGIN {mode}' if mode else 'BEGIN')
+
+    def is_usable(self):
+        """Проверяет соединение запросом вместо безусловного True."""
+        return self.check_connection(self.connection)
+
+    def ensure_connection(self):
+        """Проверяет соединение перед первым использованием в запросе.
+
+        Неработающее соединение закрывается и открывается заново.
+        """
+        if (self.connection is not None and self.health_checks
+                and not self.health_check_done):
+            self.health_check_done = True
+            if not self.in_atomic_block and not self.is_usable():
+                self.errors_occurred = True
+                self.close()
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        """Закрывает устаревшее соединение или возвращает его в пул.
+
+        С пулом в него возвращается любое соединение вне транзакции.
+        Метод вызывается в начале и в конце каждого запроса: поток,
+        обслуживший запрос, может завершиться, и соединение, оставленное
+        за ним, больше не будет использовано.
+        """
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+        if (self.connection is not None and not self.in_atomic_block
+                and self.get_pool() is not None):
+            self.close()
+
+    def _close(self):
+        """Возвращает исправное соединение вне транзакции в пул."""
+        pool = self.get_pool()
+        if pool is None or self.in_atomic_block or self.errors_occurred:
+            super()._close()
+            return
+        with self.wrap_database_errors:
+            if self.connection.in_transaction:
+                self.connection.rollback()
+        pool.release(self.connection, self.connection_created_at)
@@ -0,0 +1,93 @@
+"""Пул соединений с БД, общий для потоков процесса.
+
+Многопоточный WSGI-сервер и пул потоков ASGI обслуживают запросы в
+разных потоках, а соединения Django привязаны к потоку: без пула
+соединение потока, который завершился после запроса, не
+переиспользуется. Пул хранит свободные соединения и отдаёт их следующему
+потоку, которому нужна БД.
+"""
+import time
+from collections import deque
+from threading import Lock
+
+POOL_DEFAULTS = {
+    'MAX_SIZE': 8,
+}
+
+_pools = {}
+_pools_lock = Lock()
+
+
+class ConnectionPool:
+    """Стек свободных соединений с ограниченным размером.
+
+    max_size — сколько свободных соединений хранится; лишние при
+    возврате закрываются. max_age — время жизни соединения в секундах
+    (CONN_MAX_AGE), None — без ограничения.
+    """
+
+    def __init__(self, max_size, max_age=None):
+        self.max_size = max_size
+        self.max_age = max_age
+        self.idle = deque()
+        self.lock = Lock()
+
+    def expired(self, created):
+        """Сообщает, истекло ли время жизни соединения."""
+        return (self.max_age is not None
+                and time.monotonic() - created >= self.max_age)
+
+    def acquire(self, check=None):
+        """Возвращает свободное соединение и время его создания.
+
+        Устаревшие соединения и соединения, не прошедшие проверку
+        check(connection), закрываются. Если свободных нет, возвращает
+        None.
+        """
+        while True:
+            with self.lock:
+                if not self.idle:
+                    return None
+                connection, created = self.idle.pop()
+            if not self.expired(created) and (check is None
+                                              or check(connection)):
+                return connection, created
+            connection.close()
+
+    def release(self, connection, created):
+        """Возвращает соединение в пул или закрывает его."""
+        if not self.expired(created):
+            with self.lock:
+                if len(self.idle) < self.max_size:
+                    self.idle.append((connection, created))
+                    return
+        connection.close()
+
+    def clear(self):
+        """Закрывает все свободные соединения."""
+        with self.lock:
+            idle, self.idle = self.idle, deque()
+        for connection, _ in idle:
+            connection.close()
+
+
+def get_pool(alias, settings_dict):
+    """Возвращает пул для базы, создавая его при первом обращении."""
+    key = (alias, str(settings_dict['NAME']))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            options = {**POOL_DEFAULTS, **settings_dict['POOL']}
+            pool = _pools[key] = ConnectionPool(
+                options['MAX_SIZE'], settings_dict['CONN_MAX_AGE']
+            )
+        return pool
+
+
+def close_pools():
+    """Закрывает соединения всех пулов процесса."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.clear()
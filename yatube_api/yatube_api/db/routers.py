@@ -0,0 +1,101 @@
+"""Маршрутизация запросов между основной базой и репликами для чтения.
+
+Запись всегда идёт в основную базу. Из реплик читают только участки
+кода внутри replica_reads() — это GET- и HEAD-запросы к вьюсетам API.
+Реплика отстаёт от основной базы, поэтому после записи пользователь
+закрепляется за основной базой на STICKY_TIMEOUT секунд и видит свои
+изменения.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_DEFAULTS = {
+    'ALIASES': [],
+    'STICKY_TIMEOUT': 5,
+    'CACHE_ALIAS': 'default',
+}
+STICKY_KEY = 'db:primary:{}'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def get_replica_settings():
+    """Возвращает настройки реплик."""
+    return {**REPLICA_DEFAULTS, **getattr(settings, 'DATABASE_REPLICAS', {})}
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Включает или выключает чтение из реплик внутри блока."""
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def primary_reads():
+    """Возвращает блок, внутри которого всё читается из основной базы."""
+    return replica_reads(False)
+
+
+def pin_to_primary(user_id):
+    """Закрепляет пользователя за основной базой после записи."""
+    options = get_replica_settings()
+    if options['ALIASES']:
+        caches[options['CACHE_ALIAS']].set(
+            STICKY_KEY.format(user_id), True, options['STICKY_TIMEOUT']
+        )
+
+
+def can_read_from_replicas(user_id):
+    """Проверяет, что реплики настроены и пользователь не закреплён."""
+    options = get_replica_settings()
+    return bool(options['ALIASES']) and not caches[
+        options['CACHE_ALIAS']
+    ].get(STICKY_KEY.format(user_id))
+
+
+def may_lag(changed_at):
+    """Проверяет, могли ли изменения в момент changed_at не дойти до реплик.
+
+    Отставание реплик считается не больше STICKY_TIMEOUT.
+    """
+    return time.time() - changed_at < get_replica_settings()['STICKY_TIMEOUT']
+
+
+class ReplicaRouter:
+    """Роутер: чтение из реплик внутри replica_reads(), запись в default."""
+
+    def db_for_read(self, model, **hints):
+        """Выбирает случайную реплику, если чтение из реплик включено."""
+        aliases = get_replica_settings()['ALIASES']
+        if not aliases or not _replica_reads.get():
+            return None
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        """Направляет запись в основную базу.
+
+        Объекты, прочитанные из реплики, тоже сохраняются в основную.
+        """
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Разрешает связи между объектами основной базы и реплик."""
+        databases = {DEFAULT_DB_ALIAS, *get_replica_settings()['ALIASES']}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        """Запрещает миграции реплик: схема приходит с основной базы."""
+        if db in get_replica_settings()['ALIASES']:
+            return False
+        return None
@@ -1,4 +1,5 @@
 """Настройки для приложения."""
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -27,6 +28,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.LoadSheddingMiddleware',
+    'api.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,14 +58,40 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'yatube_api.wsgi.application'
+ASGI_APPLICATION = 'yatube_api.asgi.application'
 
 # Database
 
+# Реплика для чтения. Без DJANGO_REPLICA_DATABASE алиас replica указывает
+# на основную базу и не используется роутером; чтобы проверить реплику
+# локально, задайте путь ко второму файлу SQLite и скопируйте в него
+# основную базу командой sync_replicas.
+REPLICA_DATABASE = os.environ.get('DJANGO_REPLICA_DATABASE')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': REPLICA_DATABASE or BASE_DIR / 'db.sqlite3',
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
+}
+
+DATABASE_ROUTERS = ['yatube_api.db.routers.ReplicaRouter']
+
+# Чтение из реплик: ALIASES — алиасы баз, из которых читают GET- и
+# HEAD-запросы к вьюсетам API. После записи пользователь STICKY_TIMEOUT
+# секунд читает из основной базы; метка хранится в кеше CACHE_ALIAS,
+# который при нескольких процессах должен быть общим.
+DATABASE_REPLICAS = {
+    'ALIASES': ['replica'] if REPLICA_DATABASE else [],
+    'STICKY_TIMEOUT': 5,
+    'CACHE_ALIAS': 'default',
 }
 
 # Password validation
@@ -107,6 +136,154 @@ REST_FRAMEWORK = {
         # 'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
-    ]
+        'api.authentication.CachedTokenAuthentication',
+        'api.authentication.SignedTokenAuthentication',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.RouteThrottle',
+    ],
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Фоновая обработка изображений постов: число потоков и размер очереди.
+# При ASYNC=False изображения обрабатываются сразу после сохранения поста.
+POST_IMAGE_PROCESSING = {
+    'ASYNC': True,
+    'WORKERS': 2,
+    'QUEUE_SIZE': 1000,
+}
+
+# Полнотекстовый поиск по постам. BACKEND — путь к классу бэкенда из
+# posts.search; при None на SQLite используется индекс FTS5.
+POST_SEARCH = {
+    'BACKEND': None,
+    'MAX_TERMS': 16,
+}
+
+# Версии данных и кеш ответов API. При нескольких процессах CACHE_ALIAS
+# должен указывать на общий кеш (Redis, Memcached), иначе процессы не
+# увидят изменения друг друга.
+API_RESPONSE_CACHE = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+
+# Предвычисленные ленты постов: алиас кеша, число последних записей
+# ленты группы (SIZE) и ленты подписок (FEED_SIZE) в кеше и время жизни
+# ленты в секундах. Посты авторов, у которых подписчиков больше
+# FANOUT_THRESHOLD, не рассылаются по лентам, а подмешиваются при чтении.
+API_TIMELINES = {
+    'CACHE_ALIAS': 'default',
+    'SIZE': 1000,
+    'FEED_SIZE': 500,
+    'FANOUT_THRESHOLD': 1000,
+    'TIMEOUT': 24 * 60 * 60,
+}
+
+# Журнал изменений для /api/v1/changes/: наибольшее число записей
+# журнала в одном ответе.
+API_CHANGES = {
+    'BATCH_SIZE': 500,
+}
+
+# Асинхронные представления API под ASGI (yatube_api.asgi): число потоков
+# пула, в котором выполняются запросы на чтение, и на сколько частей
+# перебор потокового ответа в пуле может опережать клиента.
+API_ASYNC = {
+    'WORKERS': 16,
+    'STREAM_BUFFER': 4,
+}
+
+# События для потоков server-sent events под ASGI: путь к классу брокера
+# (LocalBroker работает только внутри процесса), размер очереди
+# подписчика, интервал пустых событий в секундах и задержка
+# переподключения клиента в миллисекундах.
+API_EVENTS = {
+    'BROKER': 'api.events.LocalBroker',
+    'QUEUE_SIZE': 100,
+    'HEARTBEAT': 15,
+    'RETRY': 3000,
+}
+
+# Сбор метрик производительности запросов: заголовок Server-Timing и
+# эндпоинт /api/v1/metrics/. При ENABLED=False middleware не подключается.
+API_PERFORMANCE = {
+    'ENABLED': True,
+    'SERVER_TIMING': True,
+}
+
+# Ограничение частоты запросов корзинами токенов в памяти процесса.
+# RATES — частота по имени маршрута для пользователя (анонимного — по
+# адресу; X-Forwarded-For учитывается только при заданном в
+# REST_FRAMEWORK NUM_PROXIES). При нескольких процессах CACHE_ALIAS
+# указывает на общий кеш, с которым корзины согласуются раз в
+# SYNC_INTERVAL секунд. Сверх MAX_BUCKETS удаляются корзины, к которым
+# дольше всего не обращались.
+API_THROTTLING = {
+    'ENABLED': True,
+    'RATES': {
+        'posts-list': '600/min',
+        'comments-list': '600/min',
+        'api-token-auth': '10/min',
+        'tokens': '10/min',
+        'tokens-refresh': '10/min',
+    },
+    'CACHE_ALIAS': None,
+    'SYNC_INTERVAL': 1.0,
+    'MAX_BUCKETS': 100000,
+}
+
+# Сброс нагрузки: ответ 503 без обработки запроса, когда в обработке
+# больше MAX_IN_FLIGHT запросов или медиана времени запроса к БД за
+# последние LATENCY_WINDOW HTTP-запросов выше MAX_DB_LATENCY секунд;
+# пока замеров меньше MIN_SAMPLES, запросы по задержке не сбрасываются.
+# PROBE_INTERVAL — через сколько секунд без замеров запросы снова
+# пропускаются, чтобы набрать новые замеры. Время запросов к БД берётся
+# из метрик API_PERFORMANCE, без них middleware не запускается.
+API_LOAD_SHEDDING = {
+    'ENABLED': False,
+    'MAX_IN_FLIGHT': 64,
+    'MAX_DB_LATENCY': 0.1,
+    'LATENCY_WINDOW': 100,
+    'MIN_SAMPLES': 20,
+    'PROBE_INTERVAL': 1.0,
+    'RETRY_AFTER': 1,
+    'EXEMPT_PATHS': ['/admin/', '/api/v1/metrics/'],
+}
+
+# Проверка паролей при выдаче токенов: число процессов пула (0 — в
+# потоке запроса), наибольшее число проверок в очереди, после которого
+# вход отклоняется с ответом 503, размер и время жизни в секундах кеша
+# успешных проверок.
+API_LOGIN = {
+    'WORKERS': 2,
+    'MAX_PENDING': 64,
+    'CACHE_SIZE': 10000,
+    'CACHE_TIMEOUT': 60,
+}
+
+# Подписанные токены (/api/v1/tokens/, заголовок Authorization: Bearer):
+# срок действия токена и интервал обновления списка отозванных токенов
+# в памяти процесса, в секундах.
+API_SIGNED_TOKENS = {
+    'LIFETIME': 60 * 60,
+    'REFRESH_INTERVAL': 30,
+}
+
+# Кеш аутентификации по токену: размер LRU в процессе, время жизни записи
+# в общем кеше и в LRU процесса в секундах и необязательный алиас из
+# CACHES для общего кеша. Сигналы очищают LRU только в своём процессе,
+# поэтому LOCAL_TIMEOUT ограничивает, сколько удалённый токен проходит
+# аутентификацию в других процессах.
+TOKEN_AUTH_CACHE = {
+    'MAX_SIZE': 10000,
+    'TIMEOUT': 300,
+    'LOCAL_TIMEOUT': 5,
+    'CACHE_ALIAS': None,
 }
@@ -0,0 +1,91 @@
+"""Настройки для продакшена.
+
+Подключаются через `DJANGO_SETTINGS_MODULE=yatube_api.settings_production`
+и переопределяют базовые настройки из yatube_api.settings.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from yatube_api.settings import *  # noqa: F401,F403
+from yatube_api.settings import (API_LOAD_SHEDDING, API_THROTTLING, BASE_DIR,
+                                 REPLICA_DATABASE, TOKEN_AUTH_CACHE)
+
+
+def require_env(name):
+    """Возвращает обязательную переменную окружения."""
+    value = os.environ.get(name)
+    if not value:
+        raise ImproperlyConfigured(
+            f'В продакшене нужно задать переменную окружения {name}.'
+        )
+    return value
+
+
+# Ключ из репозитория общедоступен: с ним можно подделать подписанные
+# токены, поэтому в продакшене ключ обязателен.
+SECRET_KEY = require_env('DJANGO_SECRET_KEY')
+
+DEBUG = False
+
+# Имена хостов сервера через запятую.
+ALLOWED_HOSTS = require_env('DJANGO_ALLOWED_HOSTS').split(',')
+
+# Постоянные соединения с БД. Соединение живёт CONN_MAX_AGE секунд и
+# проверяется запросом перед первым использованием в каждом запросе.
+# POOL — пул свободных соединений, общий для потоков воркера: MAX_SIZE
+# соединений хранятся открытыми, лишние закрываются. PRAGMAS
+# выполняются при открытии соединения: WAL позволяет читать во время
+# записи, synchronous=NORMAL в режиме WAL синхронизирует диск только при
+# контрольных точках, mmap_size — размер отображения файла базы в память
+# в байтах, busy_timeout — ожидание блокировки записи в миллисекундах.
+# TRANSACTION_MODE=IMMEDIATE: транзакции записи сразу берут блокировку
+# и ждут её busy_timeout, а не падают при одновременной записи.
+DATABASES = {
+    'default': {
+        'ENGINE': 'yatube_api.db',
+        'NAME': os.environ.get('DJANGO_DATABASE', BASE_DIR / 'db.sqlite3'),
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'TRANSACTION_MODE': 'IMMEDIATE',
+        'POOL': {
+            'MAX_SIZE': 8,
+        },
+        'PRAGMAS': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'mmap_size': 256 * 1024 * 1024,
+            'busy_timeout': 5000,
+        },
+    }
+}
+
+if REPLICA_DATABASE:
+    DATABASES['replica'] = {**DATABASES['default'], 'NAME': REPLICA_DATABASE}
+
+API_LOAD_SHEDDING = {**API_LOAD_SHEDDING, 'ENABLED': True}
+
+# Общий кеш воркеров: версии данных и кеш ответов, ленты, метки чтения
+# из основной базы, корзины ограничения частоты и токены. По умолчанию —
+# Memcached (пакет pymemcache) по адресам DJANGO_CACHE_LOCATION через
+# запятую; DJANGO_CACHE_BACKEND задаёт другой бэкенд. Кеш в памяти
+# процесса не допускается: каждый воркер видел бы только свои изменения.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'DJANGO_CACHE_BACKEND',
+            'django.core.cache.backends.memcached.PyMemcacheCache',
+        ),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION',
+                                   '127.0.0.1:11211'),
+    }
+}
+
+if CACHES['default']['BACKEND'].endswith('.LocMemCache'):
+    raise ImproperlyConfigured(
+        'В продакшене нужен общий для воркеров кеш, а не LocMemCache.'
+    )
+
+API_THROTTLING = {**API_THROTTLING, 'CACHE_ALIAS': 'default'}
+
+TOKEN_AUTH_CACHE = {**TOKEN_AUTH_CACHE, 'CACHE_ALIAS': 'default'}
@@ -0,0 +1,14 @@
+"""URL-адреса проекта для ASGI с асинхронными представлениями API.
+
+Кроме адресов yatube_api.urls здесь подключены потоки событий API.
+"""
+from django.urls import include, path
+
+from api.async_views import async_patterns
+from api.urls import stream_urlpatterns
+from yatube_api.urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = async_patterns([
+    path('api/', include(stream_urlpatterns)),
+    *sync_urlpatterns,
+])